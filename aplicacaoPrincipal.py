@@ -1,5 +1,27 @@
+import csv
+import itertools
+import json
+import os
+import threading
+import time
+from decimal import Decimal, InvalidOperation
 import psycopg2 as pg
+import redis
 from psycopg2 import OperationalError
+from psycopg2.extras import execute_values
+from library.esquema import EsquemaPacotes
+from library.resiliencia import enviar_com_bisseccao
+from library.sinks import CopySink, ExecuteValuesSink
+from library.cache import CachePacotes
+
+# Colunas que podem ser alteradas, pelo nome usado nas alterações em lote
+COLUNAS_ALTERAVEIS = {'origem': 'Origem', 'peso': 'Peso', 'tamanho': 'Tamanho'}
+
+# Pacotes exibidos por página na consulta do menu
+TAMANHO_PAGINA = 20
+
+# Campos de cada pacote nos arquivos importados, na ordem das colunas da tabela
+CAMPOS_IMPORTACAO = ('destino', 'origem', 'peso', 'tamanho')
 
 class Postgre:
     """
@@ -8,27 +30,40 @@ class Postgre:
     
     methods
         criar_tabela()
-            Cria a tabela 'pacotes' no banco de dados.
+            Cria a tabela 'pacotes' no banco de dados, migrando-a se estiver no esquema antigo.
+        consultar_pacote(destino)
+            Retorna os pacotes de um destino, passando pelo cache quando houver.
         inserir_pacote(destino, origem, peso, tamanho)
             Insere um novo pacote na tabela 'pacotes'.
+        inserir_pacotes(pacotes)
+            Insere vários pacotes na tabela 'pacotes' com um único commit.
         consultar_pacotes()
             Retorna todos os pacotes armazenados no banco de dados.
-        atualizar_pacote(destino, peso_novo, tamanho_novo)
-            Atualiza o peso e tamanho de um pacote com base no destino.
+        iterar_pacotes(destino, origem, itersize)
+            Percorre os pacotes com um cursor no servidor, sem carregar a tabela na memória.
+        pagina_pacotes(limite, apos, destino, origem)
+            Retorna uma página de pacotes ordenada por destino, usando paginação por chave.
+        atualizar_pacote(destino, peso_novo, tamanho_novo, origem_nova)
+            Atualiza o peso, o tamanho e a origem de um pacote com base no destino.
+        atualizar_pacotes(alteracoes)
+            Aplica muitas alterações (destino, mudanças) com um único UPDATE.
         deletar_pacote(destino)
             Remove um pacote da tabela com base no destino.
         fechar_conexao()
             Fecha a conexão com o banco de dados PostgreSQL.
     """
-    def __init__(self) -> None:
+    def __init__(self, cache=None) -> None:
         """
         summary
             Inicializa a conexão com o banco de dados PostgreSQL.
         
         parameters
-            None
+            cache : CachePacotes
+                Cache de leitura usado por `consultar_pacote` e atualizado pelas escritas (padrão: None).
         """
         self.db_postgre = self.connect_to_db()
+        self.cache = cache
+        self._cursores = itertools.count()  # Numeração dos cursores nomeados no servidor
 
     def connect_to_db(self):
         """
@@ -56,20 +91,10 @@ class Postgre:
 
     def criar_tabela(self) -> None:
         """
-        Cria a tabela 'pacotes' no banco de dados, caso não exista.
+        Cria a tabela 'pacotes' com os seus índices, caso não exista, ou a migra para o esquema atual.
         """
         self.garantir_conexao()
-        cursor = self.db_postgre.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS pacotes (
-                Destino VARCHAR(50),
-                Origem VARCHAR(50),
-                Peso VARCHAR(50),
-                Tamanho VARCHAR(50)
-            )
-        """)
-        self.db_postgre.commit()
-        cursor.close()
+        EsquemaPacotes().migrar(self.db_postgre)
 
     def inserir_pacote(self, destino, origem, peso, tamanho) -> None:
         """
@@ -83,50 +108,231 @@ class Postgre:
                 VALUES (%s, %s, %s, %s)
             """, (destino, origem, peso, tamanho))
             self.db_postgre.commit()
+            if self.cache is not None:
+                self.cache.invalidar(destino)
         except Exception as e:
             print(f"Erro ao inserir pacote: {e}")
             self.db_postgre.rollback()
         finally:
             cursor.close()
 
-    def consultar_pacotes(self) -> list:
+    def inserir_pacotes(self, pacotes, page_size=1000) -> int:
         """
-        Consulta e retorna todos os pacotes cadastrados na tabela.
+        Insere vários pacotes de uma vez, em comandos de até `page_size` linhas e um único commit.
+        Cada pacote é uma tupla (destino, origem, peso, tamanho). Retorna o número de pacotes inseridos.
         """
         self.garantir_conexao()
         cursor = self.db_postgre.cursor()
-        cursor.execute("SELECT * FROM pacotes")
-        pacotes = cursor.fetchall()
-        cursor.close()
-        return pacotes
+        try:
+            execute_values(cursor, """
+                INSERT INTO pacotes (Destino, Origem, Peso, Tamanho)
+                VALUES %s
+            """, pacotes, page_size=page_size)
+            self.db_postgre.commit()
+            if self.cache is not None:
+                self.cache.invalidar(*{pacote[0] for pacote in pacotes})
+            return len(pacotes)
+        except Exception as e:
+            print(f"Erro ao inserir pacotes: {e}")
+            self.db_postgre.rollback()
+            return 0
+        finally:
+            cursor.close()
 
-    def atualizar_pacote(self, destino, peso_novo=None, tamanho_novo=None, origem_nova=None) -> None:
+    def consultar_pacote(self, destino) -> list:
+        """
+        Retorna os pacotes (id, Destino, Origem, Peso, Tamanho) de um destino. Com cache, a consulta
+        passa primeiro pela memória do processo e pelo Redis e só chega ao PostgreSQL em uma falta.
         """
-        Atualiza as informações de um pacote com base no destino.
+        if self.cache is None:
+            return self._carregar_pacote(destino)
+        return self.cache.obter(destino, self._carregar_pacote)
+
+    def _carregar_pacote(self, destino) -> list:
+        """
+        Consulta no PostgreSQL os pacotes de um destino, pelo índice em (Destino, id).
         """
         self.garantir_conexao()
         cursor = self.db_postgre.cursor()
         try:
-            cursor.execute("SELECT * FROM pacotes WHERE Destino = %s", (destino,))
-            pacote = cursor.fetchone()
+            cursor.execute("""
+                SELECT id, Destino, Origem, Peso, Tamanho FROM pacotes
+                WHERE Destino = %s
+                ORDER BY id
+            """, (destino,))
+            pacotes = cursor.fetchall()
+            self.db_postgre.commit()
+            return pacotes
+        finally:
+            cursor.close()
 
-            if not pacote:
-                print("Pacote não encontrado.")
-                cursor.close()
-                return
-
-            if peso_novo is not None:
-                cursor.execute("UPDATE pacotes SET Peso = %s WHERE Destino = %s", (peso_novo, destino))
-            if tamanho_novo is not None:
-                cursor.execute("UPDATE pacotes SET Tamanho = %s WHERE Destino = %s", (tamanho_novo, destino))
-            if origem_nova is not None:
-                cursor.execute("UPDATE pacotes SET Origem = %s WHERE Destino = %s", (origem_nova, destino))
-            
+    def consultar_pacotes(self, destino=None, origem=None) -> list:
+        """
+        Consulta e retorna todos os pacotes cadastrados na tabela como tuplas (id, Destino, Origem,
+        Peso, Tamanho). Carrega todos na memória; para tabelas grandes use `iterar_pacotes` ou `pagina_pacotes`.
+        """
+        return list(self.iterar_pacotes(destino, origem))
+
+    @staticmethod
+    def _filtros(destino, origem) -> tuple:
+        """
+        Monta as condições do WHERE e os seus parâmetros a partir dos filtros informados.
+        """
+        condicoes = []
+        parametros = []
+        if destino is not None:
+            condicoes.append("Destino = %s")
+            parametros.append(destino)
+        if origem is not None:
+            condicoes.append("Origem = %s")
+            parametros.append(origem)
+        return condicoes, parametros
+
+    def iterar_pacotes(self, destino=None, origem=None, itersize=2000):
+        """
+        Gera os pacotes (id, Destino, Origem, Peso, Tamanho), opcionalmente filtrados por destino e
+        origem, por meio de um cursor nomeado no servidor que traz `itersize` linhas por vez. A
+        memória usada não depende do tamanho da tabela. A conexão fica em uma transação até o fim
+        da iteração ou até o gerador ser fechado.
+        """
+        self.garantir_conexao()
+        condicoes, parametros = self._filtros(destino, origem)
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+
+        cursor = self.db_postgre.cursor(name=f"pacotes_{next(self._cursores)}")
+        cursor.itersize = itersize
+        try:
+            cursor.execute(f"SELECT id, Destino, Origem, Peso, Tamanho FROM pacotes {where}", parametros)
+            yield from cursor
+        finally:
+            cursor.close()
+            self.db_postgre.commit()  # Encerra a transação do cursor no servidor
+
+    def pagina_pacotes(self, limite=20, apos=None, destino=None, origem=None) -> tuple:
+        """
+        Retorna uma página de até `limite` pacotes ordenados por (Destino, id), opcionalmente filtrados.
+        `apos` é a chave devolvida pela página anterior: a consulta continua a partir dela pelo índice
+        em (Destino, id), sem OFFSET, então o custo de cada página não cresce com a posição. Pacotes
+        sem destino não aparecem na paginação. Retorna (pacotes, chave da próxima página ou None).
+        """
+        self.garantir_conexao()
+        condicoes, parametros = self._filtros(destino, origem)
+        if apos is not None:
+            condicoes.append("(Destino, id) > (%s, %s)")
+            parametros.extend(apos)
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+
+        cursor = self.db_postgre.cursor()
+        try:
+            cursor.execute(f"""
+                SELECT id, Destino, Origem, Peso, Tamanho FROM pacotes {where}
+                ORDER BY Destino, id
+                LIMIT %s
+            """, parametros + [limite])
+            pacotes = cursor.fetchall()
             self.db_postgre.commit()
-            print("Pacote atualizado com sucesso.")
+        finally:
+            cursor.close()
+
+        proxima = (pacotes[-1][1], pacotes[-1][0]) if len(pacotes) == limite else None
+        return pacotes, proxima
+
+    def atualizar_pacote(self, destino, peso_novo=None, tamanho_novo=None, origem_nova=None) -> list:
+        """
+        Atualiza, com um único UPDATE, apenas as informações fornecidas dos pacotes com o destino informado.
+        Retorna as linhas atualizadas (id, Destino, Origem, Peso, Tamanho).
+        """
+        mudancas = {'peso': peso_novo, 'tamanho': tamanho_novo, 'origem': origem_nova}
+        mudancas = {campo: valor for campo, valor in mudancas.items() if valor is not None}
+        if not mudancas:
+            print("Nenhuma alteração informada.")
+            return []
+
+        self.garantir_conexao()
+        cursor = self.db_postgre.cursor()
+        try:
+            atribuicoes = ", ".join(f"{COLUNAS_ALTERAVEIS[campo]} = %({campo})s" for campo in mudancas)
+            cursor.execute(f"""
+                UPDATE pacotes SET {atribuicoes}
+                WHERE Destino = %(destino)s
+                RETURNING id, Destino, Origem, Peso, Tamanho
+            """, dict(mudancas, destino=destino))
+            pacotes = sorted(cursor.fetchall())
+            self.db_postgre.commit()
+            # O UPDATE alcança todos os pacotes do destino, então o retorno é o conteúdo atual no cache
+            if self.cache is not None:
+                self.cache.definir(destino, pacotes)
+
+            if pacotes:
+                print("Pacote atualizado com sucesso.")
+            else:
+                print("Pacote não encontrado.")
+            return pacotes
         except Exception as e:
             print(f"Erro ao atualizar pacote: {e}")
             self.db_postgre.rollback()
+            return []
+        finally:
+            cursor.close()
+
+    def atualizar_pacotes(self, alteracoes) -> int:
+        """
+        Aplica muitas alterações com um único UPDATE e um único commit. Cada alteração é um par
+        (destino, mudanças), em que mudanças é um dicionário com as chaves 'origem', 'peso' e/ou
+        'tamanho'; colunas ausentes não são alteradas. Se o mesmo destino aparecer mais de uma vez,
+        as mudanças são combinadas, prevalecendo a última. As alterações são enviadas com COPY a uma
+        tabela temporária, unida aos pacotes pelo índice em Destino. Retorna o número de linhas atualizadas.
+        """
+        combinadas = {}
+        for destino, mudancas in alteracoes:
+            desconhecidas = set(mudancas) - set(COLUNAS_ALTERAVEIS)
+            if desconhecidas:
+                raise ValueError(f"Colunas não alteráveis: {', '.join(sorted(desconhecidas))}")
+            combinadas.setdefault(destino, {}).update(mudancas)
+        if not combinadas:
+            return 0
+
+        campos = tuple(COLUNAS_ALTERAVEIS)
+        # Cada coluna leva uma marca indicando se foi alterada, para distinguir "não alterar" de NULL
+        linhas = [
+            (destino,) + tuple(mudancas.get(campo) for campo in campos) + tuple(campo in mudancas for campo in campos)
+            for destino, mudancas in combinadas.items()
+        ]
+
+        self.garantir_conexao()
+        cursor = self.db_postgre.cursor()
+        try:
+            cursor.execute("""
+                CREATE TEMP TABLE alteracoes_pacotes (
+                    destino VARCHAR(50) PRIMARY KEY,
+                    origem VARCHAR(50),
+                    peso NUMERIC(12, 3),
+                    tamanho NUMERIC(12, 3),
+                    altera_origem BOOLEAN,
+                    altera_peso BOOLEAN,
+                    altera_tamanho BOOLEAN
+                ) ON COMMIT DROP
+            """)
+            colunas = ('destino',) + campos + tuple(f"altera_{campo}" for campo in campos)
+            CopySink(tabela='alteracoes_pacotes', colunas=colunas).gravar(cursor, linhas)
+            atribuicoes = ", ".join(
+                f"{coluna} = CASE WHEN a.altera_{campo} THEN a.{campo} ELSE p.{coluna} END"
+                for campo, coluna in COLUNAS_ALTERAVEIS.items()
+            )
+            cursor.execute(f"""
+                UPDATE pacotes p SET {atribuicoes}
+                FROM alteracoes_pacotes a
+                WHERE p.Destino = a.destino
+            """)
+            atualizadas = cursor.rowcount
+            self.db_postgre.commit()
+            if self.cache is not None:
+                self.cache.invalidar(*combinadas)
+            return atualizadas
+        except Exception as e:
+            print(f"Erro ao atualizar pacotes: {e}")
+            self.db_postgre.rollback()
+            return 0
         finally:
             cursor.close()
 
@@ -139,6 +345,8 @@ class Postgre:
         try:
             cursor.execute("DELETE FROM pacotes WHERE Destino = %s", (destino,))
             self.db_postgre.commit()
+            if self.cache is not None:
+                self.cache.definir(destino, [])
             print("Pacote deletado com sucesso!")
         except Exception as e:
             print(f"Erro ao deletar pacote: {e}")
@@ -154,31 +362,311 @@ class Postgre:
             self.db_postgre.close()
 
 
-def exibir_menu() -> None:
+class SinkImportacao(ExecuteValuesSink):
     """
-    Exibe o menu principal do sistema para o usuário.
+    summary
+        Grava os pares (número da linha, pacote) de uma importação, enviando apenas os pacotes. Assim
+        as linhas isoladas por `enviar_com_bisseccao` chegam com o número da linha do arquivo.
+    """
+    def __init__(self, page_size=1000):
+        super().__init__(colunas=('Destino', 'Origem', 'Peso', 'Tamanho'), page_size=page_size)
+
+    def preparar(self, linhas):
+        """
+        Descarta o número da linha de cada par.
+        """
+        return [pacote for _, pacote in linhas]
+
+
+class ImportacaoPacotes:
+    """
+    summary
+        Importa pacotes de um arquivo CSV (com cabeçalho) ou JSONL em uma thread de segundo plano,
+        para que o menu continue respondendo. O arquivo é lido como fluxo, linha a linha, e os pacotes
+        válidos são gravados em lotes de `tamanho_lote`, cada um com um único INSERT de várias linhas
+        e um único commit, por uma conexão própria. Linhas inválidas não interrompem a importação:
+        vão para um arquivo de rejeitados em JSONL, com o número da linha e o motivo. Se o banco
+        recusar um lote, as linhas responsáveis são isoladas por bissecção e rejeitadas com a
+        mensagem do banco; as demais são gravadas. O andamento é exibido pela própria thread a cada
+        `intervalo_progresso` segundos.
+
+    methods
+        iniciar()
+            Inicia a importação em segundo plano.
+        em_andamento()
+            Indica se a importação ainda está em execução.
+        aguardar()
+            Espera a importação terminar.
+        progresso()
+            Descreve o andamento da importação em uma linha.
+    """
+    def __init__(self, caminho, cache=None, tamanho_lote=5000, caminho_rejeitados=None,
+                 intervalo_progresso=5.0) -> None:
+        """
+        summary
+            Prepara a importação de um arquivo; nada é lido até `iniciar`.
+
+        parameters
+            caminho : str
+                Arquivo a importar. Extensões .jsonl e .ndjson são lidas como JSONL; as demais, como CSV.
+            cache : CachePacotes
+                Cache invalidado pelos destinos importados (padrão: None).
+            tamanho_lote : int
+                Pacotes por INSERT e por commit.
+            caminho_rejeitados : str
+                Arquivo das linhas rejeitadas (padrão: o arquivo importado com o sufixo .rejeitados.jsonl).
+            intervalo_progresso : float
+                Segundos entre as linhas de andamento exibidas durante a importação; None não as exibe.
+        """
+        self.caminho = caminho
+        self.cache = cache
+        self.tamanho_lote = tamanho_lote
+        self.caminho_rejeitados = caminho_rejeitados or f"{caminho}.rejeitados.jsonl"
+        self.jsonl = caminho.lower().endswith(('.jsonl', '.ndjson'))
+        self.total_bytes = os.path.getsize(caminho)
+        self.bytes_lidos = 0
+        self.lidas = 0
+        self.inseridas = 0
+        self.rejeitadas = 0
+        self.erro = None
+        self.inicio = None
+        self.fim = None
+        self.intervalo_progresso = intervalo_progresso
+        self._ultimo_progresso = None
+        self._thread = threading.Thread(target=self._executar, name=f"importacao-{os.path.basename(caminho)}", daemon=True)
+
+    def iniciar(self) -> 'ImportacaoPacotes':
+        """
+        Inicia a importação em segundo plano e retorna a própria importação.
+        """
+        self.inicio = self._ultimo_progresso = time.monotonic()
+        self._thread.start()
+        return self
+
+    def em_andamento(self) -> bool:
+        """
+        Indica se a importação ainda está em execução.
+        """
+        return self._thread.is_alive()
+
+    def aguardar(self) -> None:
+        """
+        Espera a importação terminar.
+        """
+        self._thread.join()
+
+    def progresso(self) -> str:
+        """
+        Descreve o andamento em uma linha: fração do arquivo lida, contagens e taxa de linhas por segundo.
+        """
+        decorrido = (self.fim or time.monotonic()) - self.inicio
+        fracao = self.bytes_lidos / self.total_bytes if self.total_bytes else 1.0
+        if self.erro is not None:
+            situacao = f"falhou: {self.erro}"
+        elif self.em_andamento():
+            situacao = f"{fracao:.0%}"
+        else:
+            situacao = "concluída"
+        texto = (
+            f"{self.caminho}: {situacao} - {self.lidas} lidas, {self.inseridas} inseridas, "
+            f"{self.rejeitadas} rejeitadas, {self.lidas / decorrido if decorrido else 0:.0f} linhas/s"
+        )
+        if self.rejeitadas:
+            texto += f" (rejeitadas em {self.caminho_rejeitados})"
+        return texto
+
+    def _informar(self) -> None:
+        """
+        Exibe o andamento se já se passaram `intervalo_progresso` segundos desde a última exibição.
+        """
+        if self.intervalo_progresso is None:
+            return
+        agora = time.monotonic()
+        if agora - self._ultimo_progresso >= self.intervalo_progresso:
+            self._ultimo_progresso = agora
+            print(f"\nImportação {self.progresso()}", flush=True)
+
+    def _linhas(self, arquivo):
+        """
+        Gera as linhas do arquivo, contando os bytes lidos para o progresso.
+        """
+        for linha in arquivo:
+            self.bytes_lidos += len(linha.encode())
+            yield linha
+
+    def _registros(self, arquivo):
+        """
+        Gera tuplas (número da linha, registro, motivo) com os campos de cada registro em minúsculas.
+        `motivo` é preenchido quando a linha não pôde ser interpretada.
+        """
+        if not self.jsonl:
+            leitor = csv.DictReader(self._linhas(arquivo))
+            for registro in leitor:
+                registro = {str(campo).strip().lower(): valor for campo, valor in registro.items()}
+                yield leitor.line_num, registro, None
+            return
+
+        for numero, linha in enumerate(self._linhas(arquivo), start=1):
+            if not linha.strip():
+                continue
+            try:
+                registro = json.loads(linha)
+            except json.JSONDecodeError as e:
+                yield numero, linha.rstrip('\n'), f"JSON inválido: {e}"
+                continue
+            if not isinstance(registro, dict):
+                yield numero, registro, "a linha não é um objeto JSON"
+                continue
+            yield numero, {str(campo).strip().lower(): valor for campo, valor in registro.items()}, None
+
+    @staticmethod
+    def validar(registro) -> tuple:
+        """
+        Converte um registro na tupla (destino, origem, peso, tamanho). Retorna (pacote, None) ou
+        (None, motivo) se algum campo faltar, for longo demais ou não for um número aceito pela tabela.
+        """
+        faltando = [campo for campo in CAMPOS_IMPORTACAO if registro.get(campo) in (None, '')]
+        if faltando:
+            return None, f"campos ausentes: {', '.join(faltando)}"
+
+        destino, origem = str(registro['destino']).strip(), str(registro['origem']).strip()
+        if len(destino) > 50 or len(origem) > 50:
+            return None, "destino ou origem com mais de 50 caracteres"
+
+        numeros = []
+        for campo in ('peso', 'tamanho'):
+            try:
+                valor = Decimal(str(registro[campo]).strip().replace(',', '.'))
+            except InvalidOperation:
+                return None, f"{campo} não numérico: {registro[campo]!r}"
+            # NUMERIC(12, 3) aceita até nove dígitos na parte inteira
+            if not valor.is_finite() or abs(valor) >= 10 ** 9:
+                return None, f"{campo} fora do intervalo: {registro[campo]!r}"
+            numeros.append(valor)
+        return (destino, origem, *numeros), None
+
+    def _executar(self) -> None:
+        """
+        Corpo da thread de importação. Usa uma conexão própria, pois a do menu pode estar em uso.
+        """
+        db = None
+        rejeitados = None
+        try:
+            db = Postgre(cache=self.cache)
+            with open(self.caminho, newline='', encoding='utf-8') as arquivo:
+                lote = []
+                for numero, registro, motivo in self._registros(arquivo):
+                    self.lidas += 1
+                    if self.lidas % 1000 == 0:
+                        self._informar()
+                    pacote = None
+                    if motivo is None:
+                        pacote, motivo = self.validar(registro)
+                    if motivo is not None:
+                        if rejeitados is None:
+                            rejeitados = open(self.caminho_rejeitados, 'w', encoding='utf-8')
+                        self._rejeitar(rejeitados, numero, motivo, registro)
+                        continue
+                    lote.append((numero, pacote))
+                    if len(lote) >= self.tamanho_lote:
+                        rejeitados = self._gravar(db, lote, rejeitados)
+                        lote = []
+                if lote:
+                    rejeitados = self._gravar(db, lote, rejeitados)
+        except Exception as e:
+            self.erro = str(e)
+        finally:
+            if rejeitados is not None:
+                rejeitados.close()
+            if db is not None:
+                db.fechar_conexao()
+            self.fim = time.monotonic()
+            if self.intervalo_progresso is not None:
+                print(f"\nImportação {self.progresso()}", flush=True)
+
+    def _gravar(self, db, lote, rejeitados):
+        """
+        Grava um lote de (número da linha, pacote) com um único commit. Linhas recusadas pelo banco
+        por erro de dados são isoladas com `enviar_com_bisseccao` e rejeitadas com a mensagem do banco;
+        se o lote inteiro falhar por outro motivo (conexão perdida, por exemplo), todas as suas linhas
+        são rejeitadas com esse erro. Retorna o arquivo de rejeitados, aberto se for preciso.
+        """
+        db.garantir_conexao()
+        cursor = db.db_postgre.cursor()
+        try:
+            inseridas, ruins = enviar_com_bisseccao(cursor, SinkImportacao(page_size=self.tamanho_lote), lote)
+            db.db_postgre.commit()
+        except Exception as e:
+            db.db_postgre.rollback()
+            inseridas, ruins = 0, [(linha, f"erro ao gravar o lote: {str(e).strip()}") for linha in lote]
+        finally:
+            cursor.close()
+
+        if inseridas:
+            self.inseridas += inseridas
+            if self.cache is not None:
+                self.cache.invalidar(*{pacote[0] for _, pacote in lote})
+        if ruins and rejeitados is None:
+            rejeitados = open(self.caminho_rejeitados, 'w', encoding='utf-8')
+        for (numero, pacote), motivo in ruins:
+            self._rejeitar(rejeitados, numero, motivo, dict(zip(CAMPOS_IMPORTACAO, pacote)))
+        return rejeitados
+
+    def _rejeitar(self, rejeitados, numero, motivo, registro) -> None:
+        """
+        Registra uma linha rejeitada no arquivo de rejeitados.
+        """
+        self.rejeitadas += 1
+        rejeitados.write(json.dumps(
+            {'linha': numero, 'motivo': motivo, 'registro': registro}, ensure_ascii=False, default=str
+        ) + "\n")
+
+
+def exibir_menu(importacoes=()) -> None:
+    """
+    Exibe o menu principal do sistema para o usuário, com o andamento das importações.
     """
     print("\n")
     print("=====================================")
     print("         Sistema de Pacotes")
     print("=====================================")
+    for importacao in importacoes:
+        print(f"Importação {importacao.progresso()}")
+    if importacoes:
+        print("=====================================")
     print("1. Inserir Pacote")
     print("2. Consultar Pacotes")
     print("3. Atualizar Pacote")
     print("4. Deletar Pacote")
-    print("5. Sair")
+    print("5. Buscar Pacote por Destino")
+    print("6. Importar Pacotes de Arquivo (CSV ou JSONL)")
+    print("7. Sair")
     print("=====================================")
 
 
+def criar_cache() -> CachePacotes:
+    """
+    Cria o cache de pacotes, usando o Redis como segundo nível se ele estiver acessível.
+    """
+    redis_conn = redis.Redis(host=os.getenv('HOST_TO_REDIS', 'localhost'), port=6379, decode_responses=True)
+    try:
+        redis_conn.ping()
+    except redis.exceptions.RedisError:
+        print("Redis indisponível; o cache de pacotes usará apenas a memória.")
+        redis_conn = None
+    return CachePacotes(redis_conn)
+
+
 def main() -> None:
     """
     Função principal do programa. Controla o fluxo do sistema de pacotes.
     """
-    db = Postgre()
+    db = Postgre(cache=criar_cache())
     db.criar_tabela()
+    importacoes = []
 
     while True:
-        exibir_menu()
+        exibir_menu(importacoes)
         opcao = input("Escolha uma opção: ")
         
         if opcao == '1':  # Inserir pacote
@@ -189,14 +677,19 @@ def main() -> None:
             db.inserir_pacote(destino, origem, peso, tamanho)
             print("Pacote inserido com sucesso!")
 
-        elif opcao == '2':  # Consultar pacotes
-            pacotes = db.consultar_pacotes()
+        elif opcao == '2':  # Consultar pacotes, uma página por vez
+            destino = input("Filtrar por destino (Enter para todos): ") or None
+            pacotes, proxima = db.pagina_pacotes(limite=TAMANHO_PAGINA, destino=destino)
             if pacotes:
                 print("Pacotes cadastrados:")
-                for pacote in pacotes:
-                    print(f"Destino: {pacote[0]}, Origem: {pacote[1]}, Peso: {pacote[2]}, Tamanho: {pacote[3]}")
             else:
                 print("Nenhum pacote encontrado.")
+            while pacotes:
+                for pacote in pacotes:
+                    print(f"Destino: {pacote[1]}, Origem: {pacote[2]}, Peso: {pacote[3]}, Tamanho: {pacote[4]}")
+                if proxima is None or input("Enter para a próxima página, 'q' para voltar: ").lower() == 'q':
+                    break
+                pacotes, proxima = db.pagina_pacotes(limite=TAMANHO_PAGINA, apos=proxima, destino=destino)
 
         elif opcao == '3':  # Atualizar pacote
             destino = input("Digite o destino do pacote a ser atualizado: ")
@@ -242,7 +735,29 @@ def main() -> None:
             db.deletar_pacote(destino)
             print("Pacote deletado com sucesso!")
 
-        elif opcao == '5':  # Sair
+        elif opcao == '5':  # Buscar pacote por destino
+            destino = input("Digite o destino do pacote: ")
+            pacotes = db.consultar_pacote(destino)
+            for pacote in pacotes:
+                print(f"Destino: {pacote[1]}, Origem: {pacote[2]}, Peso: {pacote[3]}, Tamanho: {pacote[4]}")
+            if not pacotes:
+                print("Pacote não encontrado.")
+            print(f"Cache: {db.cache.estatisticas()}")
+
+        elif opcao == '6':  # Importar pacotes em segundo plano
+            caminho = input("Digite o caminho do arquivo: ").strip()
+            if not os.path.isfile(caminho):
+                print("Arquivo não encontrado.")
+                continue
+            importacoes.append(ImportacaoPacotes(caminho, cache=db.cache).iniciar())
+            print("Importação iniciada; o andamento é exibido durante a importação e no menu.")
+
+        elif opcao == '7':  # Sair
+            for importacao in importacoes:
+                if importacao.em_andamento():
+                    print(f"Aguardando a importação de {importacao.caminho}...")
+                    importacao.aguardar()
+                print(f"Importação {importacao.progresso()}")
             db.fechar_conexao()
             print("Conexão encerrada. Saindo do sistema...")
             break
@@ -0,0 +1,8 @@
+"""
+Mantido por compatibilidade: equivale a `transfer-info bench`.
+"""
+import sys
+from library.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main(['bench'] + sys.argv[1:]))
@@ -5,9 +5,18 @@ setup(
     version="0.1.0",  # Versão atual da biblioteca
     description="Biblioteca para transferir dados do Redis ao PostGreSQL",  # Descrição breve do que a biblioteca faz
     author="Daniel, Francinaldo, Luis, Rita, Iago, Cristina",  # Lista de autores da biblioteca
-    packages=find_packages(),  # Encontrar todos os pacotes da biblioteca para incluir na distribuição
+    package_dir={"": "src"},  # O pacote `library` fica em src/
+    packages=find_packages("src"),  # Encontrar todos os pacotes da biblioteca para incluir na distribuição
     install_requires=[  # Dependências que serão instaladas automaticamente
         "redis",  # Dependência para conectar com o Redis
     ],
+    extras_require={  # Dependências opcionais, instaladas com pip install .[postgres], .[dados] ou .[async]
+        "postgres": ["psycopg2-binary"],  # transfer-info transfer e export
+        "dados": ["faker"],  # Dados realistas no povoamento (DADOS=realistas)
+        "async": ["asyncpg"],  # Transferência assíncrona (worker/TransferirInfosAsync.py)
+    },
+    entry_points={  # Comando `transfer-info populate|transfer|export|bench`
+        "console_scripts": ["transfer-info=library.cli:main"],
+    },
     python_requires=">=3.9.13",  # Especifica a versão mínima do Python necessária
-)
\ No newline at end of file
+)
@@ -0,0 +1,32 @@
+"""
+Biblioteca para transferir pacotes entre o Redis e o PostgreSQL. Os nomes abaixo são importados apenas
+no primeiro acesso, de modo que `import library` não carrega os drivers do Redis e do PostgreSQL.
+"""
+from importlib import import_module
+
+# Nome exportado -> módulo em que ele é definido
+_EXPORTADOS = {
+    'Connections': 'library.transferencia',
+    'DataTransfer': 'library.transferencia',
+    'criar_transferencia': 'library.transferencia',
+    'DataExport': 'library.exportacao',
+    'criar_exportacao': 'library.exportacao',
+    'RedisConnector': 'library.povoamento',
+    'RedisPopulator': 'library.povoamento',
+    'GeradorPacotes': 'library.gerador',
+    'carregar_configuracao': 'library.config',
+    'main': 'library.cli',
+}
+
+__all__ = list(_EXPORTADOS)
+
+def __getattr__(nome):
+    modulo = _EXPORTADOS.get(nome)
+    if modulo is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+    valor = getattr(import_module(modulo), nome)
+    globals()[nome] = valor  # Os próximos acessos não passam por aqui
+    return valor
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
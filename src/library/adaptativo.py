@@ -0,0 +1,162 @@
+import threading
+from collections import deque
+from time import perf_counter
+
+class ControladorAdaptativo:
+    """
+    summary
+        Ajusta o tamanho dos lotes e o número de trabalhadores ativos durante a transferência, no
+        estilo AIMD: enquanto não há sinal de saturação, o lote cresce em passos fixos e um
+        trabalhador é acrescentado sempre que isso aumentou a vazão; ao detectar erro, pico na
+        latência do commit ou lotes lentos demais, ambos são reduzidos multiplicativamente.
+
+        As decisões são tomadas a cada `janela` lotes concluídos. O agendador consulta `batch_size`
+        ao gerar cada lote e chama `aguardar_vaga` antes de entregá-lo, limitando os lotes em
+        andamento a `workers`; cada lote concluído deve ser informado com `registrar`.
+
+    parameters
+        batch_inicial : int
+            Tamanho do primeiro lote.
+        batch_min : int
+            Menor tamanho de lote permitido.
+        batch_max : int
+            Maior tamanho de lote permitido.
+        passo_batch : int
+            Aumento aditivo do lote por janela sem saturação.
+        workers_inicial : int
+            Número inicial de trabalhadores ativos.
+        workers_min : int
+            Menor número de trabalhadores ativos.
+        workers_max : int
+            Maior número de trabalhadores ativos; limitado também pelas threads disponíveis.
+        fator_reducao : float
+            Fator multiplicativo aplicado ao lote e aos trabalhadores quando há saturação.
+        fator_pico_commit : float
+            Um commit médio acima de `fator_pico_commit` vezes o menor commit médio já observado é
+            considerado um pico.
+        commit_minimo : float
+            Latência de commit, em segundos, abaixo da qual nunca se considera que houve pico.
+        latencia_max : float
+            Duração média de lote, em segundos, acima da qual o lote é reduzido.
+        ganho_minimo : float
+            Ganho relativo de vazão necessário para acrescentar mais um trabalhador.
+        janela : int
+            Número de lotes concluídos entre duas decisões.
+    """
+    def __init__(self, batch_inicial=10000, batch_min=1000, batch_max=200000, passo_batch=2000,
+                 workers_inicial=1, workers_min=1, workers_max=8, fator_reducao=0.5,
+                 fator_pico_commit=3.0, commit_minimo=0.05, latencia_max=10.0, ganho_minimo=0.05, janela=4):
+        self.batch_min = batch_min
+        self.batch_max = batch_max
+        self.passo_batch = passo_batch
+        self.workers_min = workers_min
+        self.workers_max = workers_max
+        self.fator_reducao = fator_reducao
+        self.fator_pico_commit = fator_pico_commit
+        self.commit_minimo = commit_minimo
+        self.latencia_max = latencia_max
+        self.ganho_minimo = ganho_minimo
+        self.janela = janela
+
+        self.batch_size = min(max(batch_inicial, batch_min), batch_max)
+        self.workers = min(max(workers_inicial, workers_min), workers_max)
+        self.historico = deque(maxlen=1000)  # Decisões tomadas, para inspeção e métricas
+
+        self._cond = threading.Condition()
+        self._em_andamento = 0
+        self._amostras = []
+        self._inicio_janela = perf_counter()
+        self._vazao_anterior = 0.0
+        self._commit_base = None
+
+    def limitar_workers(self, maximo):
+        """
+        summary
+            Limita `workers_max` ao número de trabalhadores realmente disponíveis.
+
+        parameters
+            maximo : int
+                Número de threads ou processos iniciados pelo agendador.
+
+        return
+            None
+        """
+        with self._cond:
+            self.workers_max = min(self.workers_max, maximo)
+            self.workers = min(self.workers, self.workers_max)
+
+    def aguardar_vaga(self):
+        """
+        summary
+            Bloqueia até que haja menos de `workers` lotes em andamento e reserva uma vaga.
+
+        return
+            None
+        """
+        with self._cond:
+            while self._em_andamento >= self.workers:
+                self._cond.wait()
+            self._em_andamento += 1
+
+    def registrar(self, resultado):
+        """
+        summary
+            Informa a conclusão de um lote, liberando a sua vaga, e ajusta os parâmetros ao fim de cada janela.
+
+        parameters
+            resultado : ResultadoLote
+                Resultado do lote. `None` apenas libera a vaga (por exemplo, quando o trabalhador falhou).
+
+        return
+            None
+        """
+        with self._cond:
+            self._em_andamento = max(self._em_andamento - 1, 0)
+            if resultado is not None:
+                self._amostras.append(resultado)
+                if len(self._amostras) >= self.janela:
+                    self._ajustar()
+            self._cond.notify_all()
+
+    def _ajustar(self):
+        """
+        summary
+            Aplica a regra AIMD sobre as amostras da janela atual. Deve ser chamado com `_cond` adquirida.
+
+        return
+            None
+        """
+        agora = perf_counter()
+        amostras = self._amostras
+        vazao = sum(amostra.linhas for amostra in amostras) / max(agora - self._inicio_janela, 1e-9)
+        commit_medio = sum(amostra.duracao_commit for amostra in amostras) / len(amostras)
+        latencia_media = sum(amostra.duracao for amostra in amostras) / len(amostras)
+        houve_erro = any(amostra.erro for amostra in amostras)
+
+        if self._commit_base is None or commit_medio < self._commit_base:
+            self._commit_base = commit_medio
+        pico_commit = commit_medio > max(self.commit_minimo, self._commit_base * self.fator_pico_commit)
+
+        if houve_erro or pico_commit or latencia_media > self.latencia_max:
+            # Diminuição multiplicativa
+            self.batch_size = max(self.batch_min, int(self.batch_size * self.fator_reducao))
+            self.workers = max(self.workers_min, int(self.workers * self.fator_reducao))
+            decisao = 'reduzir'
+        else:
+            # Aumento aditivo; mais um trabalhador só enquanto isso aumentar a vazão
+            self.batch_size = min(self.batch_max, self.batch_size + self.passo_batch)
+            if vazao > self._vazao_anterior * (1 + self.ganho_minimo):
+                self.workers = min(self.workers_max, self.workers + 1)
+            decisao = 'aumentar'
+
+        self.historico.append({
+            'decisao': decisao,
+            'vazao': round(vazao, 1),
+            'commit_medio_s': round(commit_medio, 4),
+            'latencia_media_s': round(latencia_media, 4),
+            'batch_size': self.batch_size,
+            'workers': self.workers,
+        })
+        self._vazao_anterior = vazao
+        self._amostras = []
+        self._inicio_janela = agora
@@ -0,0 +1,294 @@
+"""
+Benchmarks reprodutíveis dos caminhos de povoamento (RedisPopulator.run) e de transferência
+(transteferir_infos) contra instâncias locais do Redis e do PostgreSQL, como os serviços do
+docker-compose.yml.
+
+Uso:
+    transfer-info bench executar --saida atual.json --threads 1 2 4 --batch-sizes 1000 10000
+    transfer-info bench comparar base.json atual.json --tolerancia 0.10
+
+Cada caso roda em um subprocesso próprio, de modo que o pico de memória (RSS) e o tempo de CPU
+medidos pertencem apenas a ele. Os hosts são lidos de HOST_TO_REDIS e HOST_TO_POSTGRES.
+"""
+import argparse
+import itertools
+import json
+import platform
+import resource
+import subprocess
+import sys
+from time import perf_counter
+
+def gerar_casos(args):
+    """
+    Gera a combinação de parâmetros de cada caso a ser medido.
+
+    Parameters:
+        args (argparse.Namespace): Parâmetros da linha de comando.
+
+    Returns:
+        generator: Dicionários com a configuração de cada caso.
+    """
+    for alvo in args.alvos:
+        backends = args.modos_escrita if alvo == 'populate' else args.sinks
+        for threads, batch_size, tamanho, backend, execucao in itertools.product(
+            args.threads, args.batch_sizes, args.tamanhos, backends, args.execucao
+        ):
+            yield {
+                'alvo': alvo,
+                'threads': threads,
+                'batch_size': batch_size,
+                'tamanho': tamanho,
+                'backend': backend,
+                'execucao': execucao,
+            }
+
+def chave_caso(caso):
+    """
+    Identifica um caso pelos seus parâmetros, para comparar execuções diferentes.
+
+    Parameters:
+        caso (dict): Configuração do caso.
+
+    Returns:
+        tuple: Valores que identificam o caso.
+    """
+    return tuple(caso[campo] for campo in ('alvo', 'threads', 'batch_size', 'tamanho', 'backend', 'execucao'))
+
+def medir_recursos():
+    """
+    Lê o tempo de CPU e o pico de memória do processo atual e dos seus filhos já encerrados.
+
+    Returns:
+        tuple: (segundos de CPU, pico de RSS em MB).
+    """
+    proprio = resource.getrusage(resource.RUSAGE_SELF)
+    filhos = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = proprio.ru_utime + proprio.ru_stime + filhos.ru_utime + filhos.ru_stime
+    # ru_maxrss é dado em KB no Linux e em bytes no macOS
+    divisor = 1024 * 1024 if platform.system() == 'Darwin' else 1024
+    return cpu, max(proprio.ru_maxrss, filhos.ru_maxrss) / divisor
+
+def executar_povoamento(caso, metricas):
+    """
+    Mede `RedisPopulator.run` em um Redis esvaziado antes da medição.
+
+    Parameters:
+        caso (dict): Configuração do caso.
+        metricas (Metricas): Coletor da latência dos lotes.
+
+    Returns:
+        tuple: (chaves gravadas, duração em segundos).
+    """
+    from library.povoamento import RedisConnector, RedisPopulator
+
+    redis_conn = RedisConnector(max_connections=caso['threads']).db_redis
+    redis_conn.flushdb()
+
+    populator = RedisPopulator(
+        redis_conn, num_threads=caso['threads'], batch_size=caso['batch_size'], write_mode=caso['backend']
+    )
+
+    # No modo 'threads' cada lote é cronometrado; no modo 'processos' os lotes rodam em outros processos
+    populate_batch = populator.populate_batch
+
+    def populate_batch_cronometrado(batch_start, batch_end):
+        inicio = perf_counter()
+        chaves = populate_batch(batch_start, batch_end)
+        metricas.registrar_lote(chaves, perf_counter() - inicio)
+        return chaves
+
+    populator.populate_batch = populate_batch_cronometrado
+
+    inicio = perf_counter()
+    resultados = populator.run(start=1, end=caso['tamanho'] + 1, mode=caso['execucao'])
+    duracao = perf_counter() - inicio
+    return sum(chaves for _, _, chaves in resultados), duracao
+
+def executar_transferencia(caso, metricas):
+    """
+    Mede `transteferir_infos` a partir de um Redis povoado (fora da medição) com `tamanho` chaves.
+
+    Parameters:
+        caso (dict): Configuração do caso.
+        metricas (Metricas): Coletor de métricas da transferência.
+
+    Returns:
+        tuple: (linhas gravadas no PostgreSQL, duração em segundos).
+    """
+    from functools import partial
+    from library.povoamento import RedisConnector, RedisPopulator
+    from library.transferencia import Connections, DataTransfer, criar_transferencia
+    from library.transfer_info import transteferir_infos
+
+    redis_conn = RedisConnector(max_connections=1).db_redis
+    if redis_conn.dbsize() != caso['tamanho']:
+        redis_conn.flushdb()
+        RedisPopulator(redis_conn, num_threads=1, batch_size=10000, write_mode='lua').run(1, caso['tamanho'] + 1)
+
+    conexoes = Connections(num_threads=caso['threads'])
+    transferencia = DataTransfer(
+        conexoes.db_redis,
+        conexoes.db_postgre,
+        num_threads=caso['threads'],
+        batch_size=caso['batch_size'],
+        sink=caso['backend'],
+        postgres_pool=conexoes.postgre_pool,
+        metricas=metricas
+    )
+    transferencia.criar_tabela()
+
+    inicio = perf_counter()
+    resultados = transteferir_infos(
+        transferencia, start=1, end=caso['tamanho'] + 1, modo=caso['execucao'],
+        fabrica=partial(criar_transferencia, batch_size=caso['batch_size'], sink=caso['backend'])
+    )
+    duracao = perf_counter() - inicio
+    conexoes.fechar_conexoes()
+    return sum(resultado.linhas for resultado in resultados), duracao
+
+def executar_caso(caso):
+    """
+    Executa um caso no processo atual e mede vazão, latência, CPU e memória.
+
+    Parameters:
+        caso (dict): Configuração do caso.
+
+    Returns:
+        dict: Configuração do caso acrescida das medições.
+    """
+    from library.metricas import Metricas
+
+    metricas = Metricas()
+    if caso['alvo'] == 'populate':
+        linhas, duracao = executar_povoamento(caso, metricas)
+    else:
+        linhas, duracao = executar_transferencia(caso, metricas)
+
+    cpu, pico_rss = medir_recursos()
+    latencia = metricas.snapshot()['latencia_lote_ms'] if metricas.lotes else None
+    return dict(
+        caso,
+        linhas=linhas,
+        duracao_s=round(duracao, 3),
+        linhas_por_s=round(linhas / duracao, 1) if duracao else None,
+        latencia_lote_ms=latencia,
+        cpu_s=round(cpu, 3),
+        pico_rss_mb=round(pico_rss, 1),
+    )
+
+def executar(args):
+    """
+    Executa todos os casos, cada um em um subprocesso, e grava os resultados em JSON.
+
+    Parameters:
+        args (argparse.Namespace): Parâmetros da linha de comando.
+    """
+    resultados = []
+    for caso in gerar_casos(args):
+        print(f"Executando {json.dumps(caso)}", file=sys.stderr)
+        for _ in range(args.repeticoes):
+            processo = subprocess.run(
+                [sys.executable, '-m', 'library.benchmark', '_caso', json.dumps(caso)],
+                capture_output=True, text=True
+            )
+            if processo.returncode != 0:
+                print(processo.stderr, file=sys.stderr)
+                resultados.append(dict(caso, erro=processo.stderr.strip().splitlines()[-1:]))
+                continue
+            resultados.append(json.loads(processo.stdout.strip().splitlines()[-1]))
+
+    with open(args.saida, 'w') as arquivo:
+        json.dump({'python': platform.python_version(), 'resultados': resultados}, arquivo, indent=2)
+    print(f"{len(resultados)} resultados gravados em {args.saida}")
+
+def agrupar(resultados):
+    """
+    Agrupa as repetições de cada caso, guardando a melhor vazão e a menor latência p99.
+
+    Parameters:
+        resultados (list): Resultados lidos de um arquivo JSON.
+
+    Returns:
+        dict: Por chave de caso, o dicionário {'linhas_por_s', 'p99'}.
+    """
+    agrupados = {}
+    for resultado in resultados:
+        if resultado.get('erro') or not resultado.get('linhas_por_s'):
+            continue
+        atual = agrupados.setdefault(chave_caso(resultado), {'linhas_por_s': 0.0, 'p99': None})
+        atual['linhas_por_s'] = max(atual['linhas_por_s'], resultado['linhas_por_s'])
+        if resultado.get('latencia_lote_ms'):
+            p99 = resultado['latencia_lote_ms']['p99']
+            atual['p99'] = p99 if atual['p99'] is None else min(atual['p99'], p99)
+    return agrupados
+
+def comparar(args):
+    """
+    Compara duas execuções e aponta os casos em que a vazão caiu ou a latência p99 subiu além da
+    tolerância. Termina com código 1 se houver regressões.
+
+    Parameters:
+        args (argparse.Namespace): Parâmetros da linha de comando.
+    """
+    with open(args.base) as arquivo:
+        base = agrupar(json.load(arquivo)['resultados'])
+    with open(args.atual) as arquivo:
+        atual = agrupar(json.load(arquivo)['resultados'])
+
+    regressoes = 0
+    for chave in sorted(set(base) & set(atual), key=str):
+        antes, depois = base[chave], atual[chave]
+        variacao = depois['linhas_por_s'] / antes['linhas_por_s'] - 1
+        marcas = []
+        if variacao < -args.tolerancia:
+            marcas.append('VAZÃO')
+        if antes['p99'] and depois['p99'] and depois['p99'] / antes['p99'] - 1 > args.tolerancia:
+            marcas.append('P99')
+        regressoes += bool(marcas)
+        print(f"{'REGRESSÃO ' + '/'.join(marcas) if marcas else 'ok':<22} {chave} "
+              f"{antes['linhas_por_s']:.0f} -> {depois['linhas_por_s']:.0f} linhas/s ({variacao:+.1%})")
+
+    print(f"{regressoes} regressões em {len(set(base) & set(atual))} casos comparados.")
+    sys.exit(1 if regressoes else 0)
+
+def main(argv=None, prog=None):
+    """
+    Interpreta a linha de comando e executa o subcomando escolhido.
+
+    Parameters:
+        argv (list): Argumentos da linha de comando (padrão: sys.argv[1:]).
+        prog (str): Nome do programa exibido na ajuda (padrão: o nome do script).
+    """
+    parser = argparse.ArgumentParser(prog=prog, description="Benchmarks de povoamento e transferência.")
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+
+    executar_parser = subcomandos.add_parser('executar', help="Executa a varredura de parâmetros.")
+    executar_parser.add_argument('--saida', default='benchmark.json')
+    executar_parser.add_argument('--alvos', nargs='+', default=['populate', 'transfer'], choices=['populate', 'transfer'])
+    executar_parser.add_argument('--threads', nargs='+', type=int, default=[1, 2, 4])
+    executar_parser.add_argument('--batch-sizes', nargs='+', type=int, default=[1000, 10000])
+    executar_parser.add_argument('--tamanhos', nargs='+', type=int, default=[100000])
+    executar_parser.add_argument('--modos-escrita', nargs='+', default=['pipeline', 'lua'])
+    executar_parser.add_argument('--sinks', nargs='+', default=['copy', 'execute_values'])
+    executar_parser.add_argument('--execucao', nargs='+', default=['threads'], choices=['threads', 'processos'])
+    executar_parser.add_argument('--repeticoes', type=int, default=1)
+
+    comparar_parser = subcomandos.add_parser('comparar', help="Compara duas execuções e aponta regressões.")
+    comparar_parser.add_argument('base')
+    comparar_parser.add_argument('atual')
+    comparar_parser.add_argument('--tolerancia', type=float, default=0.10)
+
+    caso_parser = subcomandos.add_parser('_caso')  # Uso interno: executa um único caso
+    caso_parser.add_argument('caso')
+
+    args = parser.parse_args(argv)
+    if args.comando == 'executar':
+        executar(args)
+    elif args.comando == 'comparar':
+        comparar(args)
+    else:
+        print(json.dumps(executar_caso(json.loads(args.caso))))
+
+if __name__ == "__main__":
+    main()
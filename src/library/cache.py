@@ -0,0 +1,254 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+try:
+    from redis.exceptions import RedisError
+except ImportError:  # Sem o redis o cache usa apenas a memória e nenhum erro pode vir dele
+    class RedisError(Exception):
+        pass
+
+class CacheLRU:
+    """
+    summary
+        Cache em memória com limite de itens e tempo de validade. Ao atingir `tamanho_max`, descarta
+        o item usado há mais tempo; itens mais antigos que `ttl` segundos são tratados como ausentes.
+        Seguro para uso por várias threads.
+
+    parameters
+        tamanho_max : int
+            Número máximo de itens guardados.
+        ttl : float
+            Validade de cada item, em segundos.
+        relogio : callable
+            Função que retorna o instante atual em segundos (padrão: time.monotonic).
+    """
+    def __init__(self, tamanho_max=10000, ttl=60.0, relogio=time.monotonic):
+        self.tamanho_max = tamanho_max
+        self.ttl = ttl
+        self.relogio = relogio
+        self._itens = OrderedDict()  # chave -> (expira_em, valor), do menos para o mais recente
+        self._trava = threading.Lock()
+
+    def __len__(self):
+        return len(self._itens)
+
+    def obter(self, chave):
+        """
+        summary
+            Procura uma chave válida no cache e a marca como a mais recente.
+
+        parameters
+            chave : hashable
+                Chave procurada.
+
+        return
+            tuple : (True, valor) se encontrada, ou (False, None).
+        """
+        with self._trava:
+            item = self._itens.get(chave)
+            if item is None:
+                return False, None
+            expira_em, valor = item
+            if expira_em <= self.relogio():
+                del self._itens[chave]
+                return False, None
+            self._itens.move_to_end(chave)
+            return True, valor
+
+    def definir(self, chave, valor):
+        """
+        summary
+            Guarda um valor, descartando o item menos recente se o limite for ultrapassado.
+
+        parameters
+            chave : hashable
+                Chave do valor.
+            valor : object
+                Valor guardado.
+
+        return
+            None
+        """
+        with self._trava:
+            self._itens[chave] = (self.relogio() + self.ttl, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.tamanho_max:
+                self._itens.popitem(last=False)
+
+    def remover(self, chave):
+        """
+        summary
+            Remove uma chave do cache, se existir.
+
+        parameters
+            chave : hashable
+                Chave removida.
+
+        return
+            None
+        """
+        with self._trava:
+            self._itens.pop(chave, None)
+
+class CachePacotes:
+    """
+    summary
+        Cache de leitura dos pacotes por destino, em dois níveis: um `CacheLRU` no processo e, se
+        houver conexão, o Redis, compartilhado entre processos. Em uma falta nos dois níveis os
+        pacotes são carregados do PostgreSQL e guardados em ambos. Destinos sem pacotes também são
+        guardados, para que buscas repetidas por um destino inexistente não cheguem ao banco.
+
+        As escritas devem chamar `definir` (quando conhecem todos os pacotes do destino) ou `invalidar`.
+        Outros processos podem manter uma cópia antiga na memória por até `ttl` segundos.
+
+    parameters
+        redis_conn : redis.Redis
+            Conexão com o Redis usada como segundo nível, ou None para usar apenas a memória.
+        tamanho_max : int
+            Número máximo de destinos guardados na memória do processo.
+        ttl : float
+            Validade, em segundos, dos destinos guardados na memória.
+        ttl_redis : int
+            Validade, em segundos, dos destinos guardados no Redis.
+        prefixo : str
+            Prefixo das chaves criadas no Redis.
+    """
+    def __init__(self, redis_conn=None, tamanho_max=10000, ttl=60.0, ttl_redis=300, prefixo='cache:pacotes:'):
+        self.redis_conn = redis_conn
+        self.memoria = CacheLRU(tamanho_max=tamanho_max, ttl=ttl)
+        self.ttl_redis = ttl_redis
+        self.prefixo = prefixo
+        self._trava = threading.Lock()
+        self.acertos_memoria = 0
+        self.acertos_redis = 0
+        self.faltas = 0
+        self.erros_redis = 0
+
+    def obter(self, destino, carregar):
+        """
+        summary
+            Retorna os pacotes de um destino, consultando a memória, depois o Redis e por fim `carregar`.
+
+        parameters
+            destino : str
+                Destino procurado.
+            carregar : callable
+                Função que recebe o destino e consulta os pacotes no PostgreSQL.
+
+        return
+            list : Tuplas (id, Destino, Origem, Peso, Tamanho).
+        """
+        encontrado, pacotes = self.memoria.obter(destino)
+        if encontrado:
+            self._contar('acertos_memoria')
+            return pacotes
+
+        pacotes = self._ler_redis(destino)
+        if pacotes is not None:
+            self._contar('acertos_redis')
+            self.memoria.definir(destino, pacotes)
+            return pacotes
+
+        self._contar('faltas')
+        pacotes = [tuple(pacote) for pacote in carregar(destino)]
+        self.definir(destino, pacotes)
+        return pacotes
+
+    def definir(self, destino, pacotes):
+        """
+        summary
+            Guarda todos os pacotes de um destino nos dois níveis (escrita direta no cache).
+
+        parameters
+            destino : str
+                Destino dos pacotes.
+            pacotes : list
+                Tuplas (id, Destino, Origem, Peso, Tamanho); lista vazia se o destino não tem pacotes.
+
+        return
+            None
+        """
+        pacotes = [tuple(pacote) for pacote in pacotes]
+        self.memoria.definir(destino, pacotes)
+        if self.redis_conn is None:
+            return
+        try:
+            self.redis_conn.set(self.prefixo + str(destino), json.dumps(pacotes, default=str), ex=self.ttl_redis)
+        except RedisError:
+            self._contar('erros_redis')
+
+    def invalidar(self, *destinos):
+        """
+        summary
+            Remove destinos dos dois níveis, para que a próxima busca os carregue do PostgreSQL.
+
+        parameters
+            destinos : str
+                Destinos alterados.
+
+        return
+            None
+        """
+        for destino in destinos:
+            self.memoria.remover(destino)
+        if self.redis_conn is None or not destinos:
+            return
+        try:
+            self.redis_conn.delete(*(self.prefixo + str(destino) for destino in destinos))
+        except RedisError:
+            self._contar('erros_redis')
+
+    def estatisticas(self):
+        """
+        summary
+            Retorna os contadores de acertos e faltas do cache.
+
+        return
+            dict : Acertos por nível, faltas, taxa de acerto, erros do Redis e destinos na memória.
+        """
+        with self._trava:
+            consultas = self.acertos_memoria + self.acertos_redis + self.faltas
+            return {
+                'acertos_memoria': self.acertos_memoria,
+                'acertos_redis': self.acertos_redis,
+                'faltas': self.faltas,
+                'taxa_acerto': round((consultas - self.faltas) / consultas, 3) if consultas else 0.0,
+                'erros_redis': self.erros_redis,
+                'tamanho_memoria': len(self.memoria),
+            }
+
+    def _ler_redis(self, destino):
+        """
+        summary
+            Lê os pacotes de um destino no Redis.
+
+        parameters
+            destino : str
+                Destino procurado.
+
+        return
+            list : Pacotes guardados, ou None se ausentes, sem Redis ou em caso de erro.
+        """
+        if self.redis_conn is None:
+            return None
+        try:
+            dados = self.redis_conn.get(self.prefixo + str(destino))
+        except RedisError:
+            self._contar('erros_redis')
+            return None
+        if dados is None:
+            return None
+        # Peso e Tamanho são gravados como texto no JSON e voltam a ser Decimal, como vêm do PostgreSQL
+        return [
+            (id_, destino_, origem, _decimal(peso), _decimal(tamanho))
+            for id_, destino_, origem, peso, tamanho in json.loads(dados)
+        ]
+
+    def _contar(self, contador):
+        with self._trava:
+            setattr(self, contador, getattr(self, contador) + 1)
+
+def _decimal(valor):
+    return None if valor is None else Decimal(valor)
@@ -0,0 +1,209 @@
+import os
+import socket
+import time
+
+# Eventos de keyspace que alteram um pacote: comandos de hash e remoções da chave. Os demais eventos
+# entregues por 'Khgx' (EXPIRE, PERSIST...) não mudam o conteúdo do hash
+EVENTOS_PACOTE = frozenset({
+    'hset', 'hsetnx', 'hincrby', 'hincrbyfloat', 'hdel', 'del', 'expired', 'rename_from', 'rename_to'
+})
+
+# Prefixos das chaves que a própria biblioteca grava no Redis e que não são pacotes: o stream de
+# alterações, o cache de consultas (`library.cache`) e os buckets do formato compacto
+PREFIXOS_INTERNOS = ('pacotes:alteracoes', 'cache:pacotes:', 'pc:')
+
+class FonteNotificacoes:
+    """
+    summary
+        Fonte de alterações baseada nas notificações de keyspace do Redis. Cada comando de hash
+        (HSET, HDEL...) ou genérico (DEL, EXPIRE, expiração) em uma chave gera uma notificação com o
+        nome da chave. As notificações não são guardadas pelo Redis: alterações feitas enquanto a
+        sincronização está desconectada são perdidas. Use `FonteStream` quando isso não for aceitável.
+
+    parameters
+        redis_conn : redis.Redis
+            Conexão com o Redis, com `decode_responses=True`.
+        padrao : str
+            Padrão das chaves acompanhadas (padrão: todas).
+        db : int
+            Banco do Redis acompanhado.
+        configurar : bool
+            Se True, habilita as notificações com `CONFIG SET notify-keyspace-events Khgx`. Em
+            servidores que não permitem CONFIG, habilite-as na configuração do Redis.
+        ignorar : tuple
+            Prefixos de chaves cujas notificações são descartadas (padrão: `PREFIXOS_INTERNOS`).
+
+        Só as notificações de `EVENTOS_PACOTE` em chaves fora de `ignorar` viram alterações: as strings
+        do cache e o stream não são hashes de pacotes e o HMGET as rejeitaria com WRONGTYPE.
+    """
+    def __init__(self, redis_conn, padrao='*', db=0, configurar=True, ignorar=PREFIXOS_INTERNOS):
+        if configurar:
+            from redis.exceptions import ResponseError
+
+            try:
+                redis_conn.config_set('notify-keyspace-events', 'Khgx')
+            except ResponseError as e:
+                print(f"Não foi possível habilitar as notificações de keyspace: {e}")
+        self.prefixo = f"__keyspace@{db}__:"
+        self.ignorar = tuple(ignorar)
+        self.pubsub = redis_conn.pubsub(ignore_subscribe_messages=True)
+        self.pubsub.psubscribe(self.prefixo + padrao)
+
+    def ler(self, timeout):
+        """
+        summary
+            Espera até `timeout` segundos pela primeira notificação e retorna ela e as que já chegaram.
+
+        parameters
+            timeout : float
+                Tempo máximo de espera, em segundos.
+
+        return
+            list : Tuplas (chave, instante da alteração em segundos desde a época).
+        """
+        alteracoes = []
+        mensagem = self.pubsub.get_message(timeout=timeout)
+        while mensagem is not None:
+            if mensagem['type'] == 'pmessage' and mensagem['data'] in EVENTOS_PACOTE:
+                chave = mensagem['channel'][len(self.prefixo):]
+                if not chave.startswith(self.ignorar):
+                    alteracoes.append((chave, time.time()))
+            mensagem = self.pubsub.get_message(timeout=0)
+        return alteracoes
+
+    def confirmar(self):
+        """
+        summary
+            Notificações não precisam de confirmação.
+
+        return
+            None
+        """
+
+    def fechar(self):
+        """
+        summary
+            Cancela a inscrição e devolve a conexão.
+
+        return
+            None
+        """
+        self.pubsub.close()
+
+class FonteStream:
+    """
+    summary
+        Fonte de alterações baseada em um Redis Stream em que quem grava os pacotes acrescenta uma
+        entrada com o campo `chave` (ver `publicar_alteracao`). As entradas são lidas por um grupo de
+        consumidores e só são confirmadas (XACK) depois que o lote que as aplicou recebe commit, de
+        modo que alterações não se perdem se a sincronização cair: ao reiniciar, as entradas pendentes
+        do consumidor são lidas de novo.
+
+    parameters
+        redis_conn : redis.Redis
+            Conexão com o Redis, com `decode_responses=True`.
+        stream : str
+            Nome do stream de alterações.
+        grupo : str
+            Grupo de consumidores.
+        consumidor : str
+            Nome deste consumidor no grupo (padrão: host e PID).
+        inicio : str
+            ID a partir do qual um grupo novo começa a ler: '$' para apenas alterações futuras ou '0'
+            para todo o stream.
+        count : int
+            Número máximo de entradas por leitura.
+    """
+    def __init__(self, redis_conn, stream='pacotes:alteracoes', grupo='transfer-info', consumidor=None,
+                 inicio='$', count=1000):
+        from redis.exceptions import ResponseError
+
+        self.redis_conn = redis_conn
+        self.stream = stream
+        self.grupo = grupo
+        self.consumidor = consumidor or f"{socket.gethostname()}-{os.getpid()}"
+        self.count = count
+        self._ids = []  # IDs lidos e ainda não confirmados
+        self._pendentes = '0'  # Começa relendo as entradas pendentes deste consumidor; None ao terminar
+
+        try:
+            redis_conn.xgroup_create(stream, grupo, id=inicio, mkstream=True)
+        except ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+
+    def ler(self, timeout):
+        """
+        summary
+            Lê as próximas entradas do grupo, esperando até `timeout` segundos se não houver nenhuma.
+
+        parameters
+            timeout : float
+                Tempo máximo de espera, em segundos.
+
+        return
+            list : Tuplas (chave, instante da alteração em segundos desde a época, tirado do ID da entrada).
+        """
+        if self._pendentes is not None:
+            resposta = self.redis_conn.xreadgroup(
+                self.grupo, self.consumidor, {self.stream: self._pendentes}, count=self.count
+            )
+            if not resposta or not resposta[0][1]:
+                self._pendentes = None
+                return []
+            self._pendentes = resposta[0][1][-1][0]
+        else:
+            resposta = self.redis_conn.xreadgroup(
+                self.grupo, self.consumidor, {self.stream: '>'}, count=self.count, block=max(int(timeout * 1000), 1)
+            )
+
+        alteracoes = []
+        for _, entradas in resposta or []:
+            for id_entrada, campos in entradas:
+                self._ids.append(id_entrada)
+                if campos and 'chave' in campos:
+                    alteracoes.append((campos['chave'], int(id_entrada.split('-')[0]) / 1000))
+        return alteracoes
+
+    def confirmar(self):
+        """
+        summary
+            Confirma (XACK) as entradas lidas desde a última confirmação. Deve ser chamado depois do
+            commit das alterações correspondentes.
+
+        return
+            None
+        """
+        if self._ids:
+            self.redis_conn.xack(self.stream, self.grupo, *self._ids)
+            self._ids = []
+
+    def fechar(self):
+        """
+        summary
+            Nada a liberar: a conexão pertence a quem criou a fonte.
+
+        return
+            None
+        """
+
+def publicar_alteracao(redis_conn, chave, stream='pacotes:alteracoes', maxlen=1000000):
+    """
+    summary
+        Registra no stream de alterações que uma chave foi gravada ou apagada. Pode ser enfileirado
+        no mesmo pipeline que altera a chave.
+
+    parameters
+        redis_conn : redis.Redis | redis.client.Pipeline
+            Conexão ou pipeline do Redis.
+        chave : str
+            Chave alterada.
+        stream : str
+            Nome do stream de alterações.
+        maxlen : int
+            Tamanho aproximado máximo do stream.
+
+    return
+        str | Pipeline : ID da entrada, ou o próprio pipeline.
+    """
+    return redis_conn.xadd(stream, {'chave': chave}, maxlen=maxlen, approximate=True)
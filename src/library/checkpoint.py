@@ -0,0 +1,103 @@
+class PostgresCheckpoint:
+    """
+    summary
+        Diário de lotes concluídos de uma transferência, guardado em uma tabela do PostgreSQL.
+        Cada lote é registrado pelo mesmo cursor que grava os seus dados, antes do commit, de modo
+        que o registro e os dados são confirmados (ou desfeitos) juntos.
+
+    parameters
+        tabela : str
+            Nome da tabela do diário.
+        transferencia : str
+            Identificador da transferência, permitindo mais de um diário na mesma tabela.
+    """
+    def __init__(self, tabela='transferencia_checkpoint', transferencia='pacotes'):
+        self.tabela = tabela
+        self.transferencia = transferencia
+
+    def criar(self, conn):
+        """
+        summary
+            Cria a tabela do diário, caso ainda não exista, e faz commit.
+
+        parameters
+            conn : psycopg2.connection
+                Conexão com o PostgreSQL.
+
+        return
+            None
+        """
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.tabela} (
+                transferencia VARCHAR(100),
+                batch_start BIGINT,
+                batch_end BIGINT,
+                concluido_em TIMESTAMP DEFAULT now(),
+                PRIMARY KEY (transferencia, batch_start, batch_end)
+            )
+        """)
+        conn.commit()
+        cursor.close()
+
+    def limpar(self, conn):
+        """
+        summary
+            Remove os registros desta transferência, para uma nova execução completa, e faz commit.
+
+        parameters
+            conn : psycopg2.connection
+                Conexão com o PostgreSQL.
+
+        return
+            None
+        """
+        cursor = conn.cursor()
+        cursor.execute(f"DELETE FROM {self.tabela} WHERE transferencia = %s", (self.transferencia,))
+        conn.commit()
+        cursor.close()
+
+    def carregar(self, conn):
+        """
+        summary
+            Lê os intervalos já concluídos desta transferência.
+
+        parameters
+            conn : psycopg2.connection
+                Conexão com o PostgreSQL.
+
+        return
+            list : Tuplas (batch_start, batch_end), ordenadas pelo início.
+        """
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT batch_start, batch_end FROM {self.tabela}
+            WHERE transferencia = %s
+            ORDER BY batch_start
+        """, (self.transferencia,))
+        concluidos = cursor.fetchall()
+        conn.commit()
+        cursor.close()
+        return concluidos
+
+    def registrar(self, cursor, batch_start, batch_end):
+        """
+        summary
+            Registra um lote como concluído. Deve ser chamado na transação do lote, antes do commit.
+
+        parameters
+            cursor : psycopg2.cursor
+                Cursor da transação que grava os dados do lote.
+            batch_start : int
+                Índice inicial do lote.
+            batch_end : int
+                Índice final do lote.
+
+        return
+            None
+        """
+        cursor.execute(f"""
+            INSERT INTO {self.tabela} (transferencia, batch_start, batch_end)
+            VALUES (%s, %s, %s)
+            ON CONFLICT DO NOTHING
+        """, (self.transferencia, batch_start, batch_end))
@@ -0,0 +1,294 @@
+"""
+Ponto de entrada único da biblioteca, instalado como o comando `transfer-info`:
+
+    transfer-info populate   Popula o Redis com pacotes.
+    transfer-info transfer   Transfere os pacotes do Redis para o PostgreSQL.
+    transfer-info export     Exporta os pacotes do PostgreSQL para o Redis.
+    transfer-info bench      Executa e compara os benchmarks.
+
+As opções vêm, em ordem crescente de precedência, dos valores padrão, de um arquivo JSON (`--config`
+ou a variável TRANSFER_INFO_CONFIG), das variáveis de ambiente e das flags. Este módulo importa apenas
+a biblioteca padrão; os drivers e as classes de cada subcomando são importados só quando ele executa,
+de modo que `--help` e a validação das opções não pagam o custo de importar o redis e o psycopg2.
+"""
+import argparse
+import sys
+from library.config import OPCOES, carregar_configuracao, validar_configuracao
+
+def _adicionar_opcoes(parser, comando):
+    """
+    summary
+        Cria uma flag para cada opção de `OPCOES` usada pelo subcomando. As flags não têm valor padrão,
+        para que uma flag omitida não sobreponha o arquivo de configuração ou a variável de ambiente.
+
+    parameters
+        parser : argparse.ArgumentParser
+            Parser do subcomando.
+        comando : str
+            Nome do subcomando.
+
+    return
+        None
+    """
+    parser.add_argument('--config', help="Arquivo JSON de configuração.")
+    for nome, opcao in OPCOES.items():
+        if comando not in opcao.comandos:
+            continue
+        flag = '--' + nome.replace('_', '-')
+        ajuda = f"{opcao.ajuda} Variável: {opcao.variavel}."
+        if opcao.tipo is bool:
+            parser.add_argument(flag, dest=nome, action=argparse.BooleanOptionalAction, default=None, help=ajuda)
+        else:
+            parser.add_argument(flag, dest=nome, type=opcao.tipo, default=None, help=ajuda)
+
+def criar_parser():
+    """
+    summary
+        Monta o parser da linha de comando do `transfer-info`.
+
+    return
+        argparse.ArgumentParser : Parser com os subcomandos populate, transfer, export e bench.
+    """
+    parser = argparse.ArgumentParser(
+        prog='transfer-info', description="Povoa, transfere e exporta pacotes entre o Redis e o PostgreSQL."
+    )
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+
+    for comando, ajuda in (
+        ('populate', "Popula o Redis com pacotes."),
+        ('transfer', "Transfere os pacotes do Redis para o PostgreSQL."),
+        ('export', "Exporta os pacotes do PostgreSQL para o Redis."),
+    ):
+        _adicionar_opcoes(subcomandos.add_parser(comando, help=ajuda, description=ajuda), comando)
+
+    bench = subcomandos.add_parser('bench', help="Executa e compara os benchmarks.", add_help=False)
+    bench.add_argument('argumentos', nargs=argparse.REMAINDER)
+    return parser
+
+def povoar(config):
+    """
+    summary
+        Popula o Redis com as chaves de `inicio` a `fim`.
+
+    parameters
+        config : dict
+            Configuração de `carregar_configuracao`.
+
+    return
+        int : Código de saída.
+    """
+    from library.povoamento import RedisConnector, RedisPopulator
+
+    # DADOS=realistas gera cidades, pesos e tamanhos com distribuições realistas e reprodutíveis pela
+    # SEMENTE; ESQUEMA_DADOS aponta para um JSON com as distribuições de cada campo
+    gerador = None
+    if config['dados'] == 'realistas':
+        from library.gerador import GeradorPacotes
+        gerador = GeradorPacotes.de_arquivo(config['esquema_dados'], semente=config['semente']) \
+            if config['esquema_dados'] else GeradorPacotes(semente=config['semente'])
+
+    # Uma conexão do pool por thread; no modo 'processos' cada processo abre a sua própria conexão
+    redis_connector = RedisConnector(max_connections=config['threads'], config=config)
+    populator = RedisPopulator(
+        redis_connector.db_redis, num_threads=config['threads'], batch_size=config['batch_size'],
+        pipeline_size=config['pipeline_size'], write_mode=config['modo_escrita'], gerador=gerador, config=config
+    )
+    resultados = populator.run(start=config['inicio'], end=config['fim'], mode=config['modo_povoamento'])
+    print(f"Redis populado: {sum(chaves for _, _, chaves in resultados)} chaves em {len(resultados)} lotes.")
+    return 0
+
+def transferir(config):
+    """
+    summary
+        Transfere os pacotes do Redis para o PostgreSQL ou, com `sincronizacao`, aplica continuamente
+        as alterações do Redis até ser interrompida.
+
+    parameters
+        config : dict
+            Configuração de `carregar_configuracao`.
+
+    return
+        int : Código de saída; 1 se algum lote falhou.
+    """
+    from functools import partial
+    from library.adaptativo import ControladorAdaptativo
+    from library.checkpoint import PostgresCheckpoint
+    from library.compacto import CodecCompacto
+    from library.metricas import Metricas
+    from library.resiliencia import FilaRejeitados
+    from library.transfer_info import transteferir_infos, transferir_infos_scan, sincronizar_infos
+    from library.transferencia import Connections, DataTransfer, criar_transferencia
+
+    num_threads = config['threads']
+    batch_size = config['batch_size']
+    sincronizacao = config['sincronizacao']
+    codec = CodecCompacto() if config['formato_redis'] == 'compacto' else None
+
+    checkpoint = PostgresCheckpoint()
+    # Linhas recusadas pelo PostgreSQL e chaves com valores inválidos no Redis vão para pacotes_rejeitados
+    rejeitados = FilaRejeitados()
+    metricas = Metricas()
+    controlador = ControladorAdaptativo(batch_inicial=batch_size, workers_max=num_threads) \
+        if config['adaptativo'] else None
+    conexoes = Connections(num_threads=num_threads, decode_responses=codec is None, config=config)
+
+    transferencia = DataTransfer(
+        conexoes.db_redis,
+        conexoes.db_postgre,
+        num_threads=num_threads,
+        batch_size=batch_size,
+        sink=config['sink'],
+        postgres_pool=conexoes.postgre_pool,
+        checkpoint=checkpoint,
+        metricas=metricas,
+        controlador=controlador,
+        codec=codec,
+        rejeitados=rejeitados
+    )
+    # A sincronização mantém a tabela da carga inicial; retomar mantém a tabela e pula os lotes do diário.
+    # Com um sink de upsert a tabela é sempre mantida e os lotes são incorporados às linhas já gravadas
+    transferencia.criar_tabela(recriar=not (config['retomar'] or sincronizacao))
+    # A sincronização e os sinks de upsert dependem do índice único em Chave
+    reconstruir_indices = config['reconstruir_indices'] and not (sincronizacao or transferencia.upsert)
+    indices_removidos = transferencia.esquema.remover_indices(conexoes.db_postgre) if reconstruir_indices else []
+
+    metricas.iniciar_relatorio(intervalo=config['metricas_intervalo'])
+    if config['metricas_porta']:
+        metricas.iniciar_servidor_prometheus(porta=config['metricas_porta'])
+
+    codigo = 0
+    if sincronizacao:
+        from library.cdc import FonteNotificacoes, FonteStream
+
+        if sincronizacao == 'stream':
+            fonte_alteracoes = FonteStream(conexoes.db_redis, inicio=config['stream_inicio'])
+        else:
+            fonte_alteracoes = FonteNotificacoes(conexoes.db_redis, padrao=config['scan_match'] or '*')
+        try:
+            sincronizar_infos(transferencia, fonte_alteracoes, janela=config['janela_sincronizacao'])
+        except KeyboardInterrupt:
+            print("Sincronização interrompida.")
+        metricas.parar_relatorio()
+    else:
+        if config['fonte'] == 'scan':
+            resultados = transferir_infos_scan(transferencia, match=config['scan_match'], count=1000)
+        else:
+            resultados = transteferir_infos(
+                transferencia, start=config['inicio'], end=config['fim'],
+                modo=config['modo'], fabrica=partial(
+                    criar_transferencia, batch_size=batch_size, sink=config['sink'], checkpoint=checkpoint,
+                    codec=codec, rejeitados=rejeitados, config=config
+                ),
+                resume=config['retomar']
+            )
+        metricas.parar_relatorio()
+        if reconstruir_indices:
+            transferencia.esquema.restaurar_indices(conexoes.db_postgre, indices_removidos)
+        transferencia.criar_indices()
+        linhas = sum(resultado.linhas for resultado in resultados)
+        falhos = [resultado for resultado in resultados if resultado.erro]
+        print(f"Transferência concluída: {linhas} linhas em {len(resultados)} lotes, {len(falhos)} lotes com erro.")
+        codigo = 1 if falhos else 0
+
+    conexoes.fechar_conexoes()
+    return codigo
+
+def exportar(config):
+    """
+    summary
+        Exporta os pacotes do PostgreSQL para o Redis, reaquecendo o cache a partir da tabela `pacotes`.
+
+    parameters
+        config : dict
+            Configuração de `carregar_configuracao`.
+
+    return
+        int : Código de saída; 1 se algum lote falhou.
+    """
+    from functools import partial
+    from library.adaptativo import ControladorAdaptativo
+    from library.compacto import CodecCompacto
+    from library.exportacao import DataExport, criar_exportacao
+    from library.metricas import Metricas
+    from library.transfer_info import transteferir_infos
+    from library.transferencia import Connections
+
+    num_threads = config['threads']
+    particionamento = config['particionamento']
+    # Com particionamento 'ctid' cada lote é um intervalo de páginas da tabela
+    batch_size = config['batch_size'] if particionamento == 'id' else config['paginas_por_lote']
+    ttl = config['ttl']
+    metricas = Metricas()
+    controlador = ControladorAdaptativo(batch_inicial=batch_size, workers_max=num_threads) \
+        if config['adaptativo'] else None
+    codec = CodecCompacto() if config['formato_redis'] == 'compacto' else None
+    conexoes = Connections(num_threads=num_threads, decode_responses=codec is None, config=config)
+
+    exportacao = DataExport(
+        conexoes.db_redis,
+        conexoes.db_postgre,
+        num_threads=num_threads,
+        batch_size=batch_size,
+        ttl=ttl,
+        particionamento=particionamento,
+        postgres_pool=conexoes.postgre_pool,
+        metricas=metricas,
+        controlador=controlador,
+        codec=codec
+    )
+    start, end = exportacao.intervalo()
+
+    metricas.iniciar_relatorio(intervalo=config['metricas_intervalo'])
+    resultados = transteferir_infos(
+        exportacao, start=start, end=end, modo=config['modo'],
+        fabrica=partial(
+            criar_exportacao, batch_size=batch_size, ttl=ttl, particionamento=particionamento, codec=codec,
+            config=config
+        )
+    )
+    metricas.parar_relatorio()
+
+    linhas = sum(resultado.linhas for resultado in resultados)
+    falhos = [resultado for resultado in resultados if resultado.erro]
+    print(f"Exportação concluída: {linhas} pacotes em {len(resultados)} lotes, {len(falhos)} lotes com erro.")
+
+    conexoes.fechar_conexoes()
+    return 1 if falhos else 0
+
+# Função executada por cada subcomando, a partir da configuração
+COMANDOS = {
+    'populate': povoar,
+    'transfer': transferir,
+    'export': exportar,
+}
+
+def main(argv=None):
+    """
+    summary
+        Interpreta a linha de comando e executa o subcomando escolhido.
+
+    parameters
+        argv : list
+            Argumentos da linha de comando (padrão: sys.argv[1:]).
+
+    return
+        int : Código de saída do subcomando.
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ['bench']:
+        # Repassado sem interpretar: o benchmark tem os seus próprios subcomandos e flags
+        from library.benchmark import main as benchmark
+        return benchmark(argv[1:], prog='transfer-info bench') or 0
+
+    args = criar_parser().parse_args(argv)
+    argumentos = vars(args)
+    try:
+        config = carregar_configuracao(argumentos, arquivo=argumentos.pop('config'))
+        validar_configuracao(config, args.comando)
+    except (OSError, ValueError) as e:
+        print(f"transfer-info: configuração inválida: {e}", file=sys.stderr)
+        return 2
+    return COMANDOS[args.comando](config)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+import struct
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+# Cabeçalho de cada registro: Peso e Tamanho em milésimos (int64) e os tamanhos, em bytes, de
+# Destino e Origem (uint8), seguidos dos textos em UTF-8. 18 bytes fixos por registro.
+CABECALHO = struct.Struct('<qqBB')
+
+# Limite, em milésimos, dos valores aceitos pela coluna NUMERIC(12, 3): nove dígitos inteiros
+_LIMITE_MILESIMOS = 10 ** 12
+
+class CodecCompacto:
+    """
+    summary
+        Formato compacto dos pacotes no Redis. Em vez de um hash de quatro campos por chave, com os
+        nomes dos campos repetidos em cada uma, cada pacote vira um registro binário de layout fixo
+        (`CABECALHO` + Destino + Origem) e os registros são agrupados em hashes de `tamanho_bucket`
+        pacotes: o pacote `i` fica no campo `i % tamanho_bucket` do hash `prefixo + i // tamanho_bucket`.
+
+        Com os limites padrão do Redis (`hash-max-listpack-entries` 128 e `hash-max-listpack-value`
+        64 bytes), buckets de até 128 pacotes com registros de até 64 bytes (Destino e Origem somando
+        até 46 bytes) ficam na codificação listpack, bem mais econômica que um hash por chave.
+        Registros maiores continuam válidos, mas convertem o bucket para a codificação comum.
+
+        Peso e Tamanho são guardados com três casas decimais, a mesma escala da coluna NUMERIC(12, 3).
+        As leituras devem usar uma conexão com `decode_responses=False`.
+
+    parameters
+        tamanho_bucket : int
+            Número de pacotes por hash.
+        prefixo : str
+            Prefixo das chaves dos buckets.
+    """
+    def __init__(self, tamanho_bucket=100, prefixo='pc:'):
+        self.tamanho_bucket = tamanho_bucket
+        self.prefixo = prefixo
+
+    def localizar(self, chave):
+        """
+        summary
+            Calcula onde um pacote é guardado.
+
+        parameters
+            chave : int
+                Número do pacote.
+
+        return
+            tuple : (chave do bucket, campo dentro do bucket).
+        """
+        bucket, campo = divmod(int(chave), self.tamanho_bucket)
+        return f"{self.prefixo}{bucket}", campo
+
+    def agrupar(self, chaves):
+        """
+        summary
+            Agrupa chaves consecutivas por bucket, preservando a ordem, para ler cada bucket com um único HMGET.
+
+        parameters
+            chaves : iterable
+                Números dos pacotes.
+
+        return
+            list : Tuplas (chave do bucket, [chaves], [campos]).
+        """
+        grupos = []
+        atual = None
+        for chave in chaves:
+            bucket, campo = self.localizar(chave)
+            if atual is None or atual[0] != bucket:
+                atual = (bucket, [], [])
+                grupos.append(atual)
+            atual[1].append(chave)
+            atual[2].append(campo)
+        return grupos
+
+    def codificar(self, destino, origem, peso, tamanho):
+        """
+        summary
+            Codifica um pacote em um registro binário.
+
+        parameters
+            destino : str
+                Destino do pacote (até 255 bytes em UTF-8).
+            origem : str
+                Origem do pacote (até 255 bytes em UTF-8).
+            peso : int | float | str | Decimal
+                Peso do pacote.
+            tamanho : int | float | str | Decimal
+                Tamanho do pacote.
+
+        return
+            bytes : Registro codificado. Peso ou Tamanho fora de NUMERIC(12, 3) levantam ValueError.
+        """
+        destino = str(destino).encode()
+        origem = str(origem).encode()
+        if len(destino) > 255 or len(origem) > 255:
+            raise ValueError("Destino e Origem devem ter até 255 bytes no formato compacto.")
+        return CABECALHO.pack(
+            _para_milesimos(peso), _para_milesimos(tamanho), len(destino), len(origem)
+        ) + destino + origem
+
+    def decodificar(self, registro):
+        """
+        summary
+            Decodifica um registro binário em uma tupla de texto pronta para os sinks.
+
+        parameters
+            registro : bytes
+                Registro produzido por `codificar`.
+
+        return
+            tuple : (Destino, Origem, Peso, Tamanho), com Peso e Tamanho em texto com três casas decimais.
+        """
+        peso, tamanho, tamanho_destino, tamanho_origem = CABECALHO.unpack_from(registro)
+        inicio_origem = CABECALHO.size + tamanho_destino
+        if len(registro) != inicio_origem + tamanho_origem:
+            raise ValueError(f"registro compacto com {len(registro)} bytes, esperados {inicio_origem + tamanho_origem}")
+        return (
+            registro[CABECALHO.size:inicio_origem].decode(),
+            registro[inicio_origem:].decode(),
+            _milesimos_para_texto(peso),
+            _milesimos_para_texto(tamanho),
+        )
+
+def _para_milesimos(valor):
+    """
+    summary
+        Converte um valor numérico para um inteiro em milésimos, arredondando a terceira casa como o
+        PostgreSQL arredonda um NUMERIC (metade para longe do zero).
+
+    parameters
+        valor : int | float | str | Decimal
+            Valor a converter.
+
+    return
+        int : Valor em milésimos. Valores não numéricos ou fora de NUMERIC(12, 3) levantam ValueError.
+    """
+    if isinstance(valor, int):
+        milesimos = valor * 1000
+    else:
+        try:
+            decimal = Decimal(str(valor))
+        except InvalidOperation:
+            raise ValueError(f"valor não numérico: {valor!r}") from None
+        if not decimal.is_finite():
+            raise ValueError(f"valor não numérico: {valor!r}")
+        milesimos = int((decimal * 1000).to_integral_value(rounding=ROUND_HALF_UP))
+    if abs(milesimos) >= _LIMITE_MILESIMOS:
+        raise ValueError(f"valor fora de NUMERIC(12, 3): {valor!r}")
+    return milesimos
+
+def _milesimos_para_texto(milesimos):
+    """
+    summary
+        Formata um inteiro em milésimos como texto decimal, sem passar por float.
+
+    parameters
+        milesimos : int
+            Valor em milésimos.
+
+    return
+        str : Valor com três casas decimais, por exemplo '1.500'.
+    """
+    inteiro, fracao = divmod(abs(milesimos), 1000)
+    return f"{'-' if milesimos < 0 else ''}{inteiro}.{fracao:03d}"
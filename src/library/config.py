@@ -0,0 +1,166 @@
+import json
+import os
+from collections import namedtuple
+
+# Definição de uma opção de configuração: valor padrão, variável de ambiente, tipo, subcomandos que
+# a usam e descrição exibida no `--help`
+Opcao = namedtuple('Opcao', ['padrao', 'variavel', 'tipo', 'comandos', 'ajuda'])
+
+# Subcomandos que acessam o Redis e o PostgreSQL
+_TODOS = ('populate', 'transfer', 'export')
+
+# Opções aceitas no arquivo de configuração, nas variáveis de ambiente e como flags do `transfer-info`.
+# A precedência é: padrão < arquivo de configuração < variável de ambiente < flag.
+OPCOES = {
+    'redis_host': Opcao('localhost', 'HOST_TO_REDIS', str, _TODOS, "Host do Redis."),
+    'redis_port': Opcao(6379, 'REDIS_PORT', int, _TODOS, "Porta do Redis."),
+    'postgres_host': Opcao('localhost', 'HOST_TO_POSTGRES', str, ('transfer', 'export'), "Host do PostgreSQL."),
+    'postgres_port': Opcao(5432, 'POSTGRES_PORT', int, ('transfer', 'export'), "Porta do PostgreSQL."),
+    'postgres_db': Opcao('mydatabase', 'POSTGRES_DB', str, ('transfer', 'export'), "Banco do PostgreSQL."),
+    'postgres_user': Opcao('root', 'POSTGRES_USER', str, ('transfer', 'export'), "Usuário do PostgreSQL."),
+    'postgres_password': Opcao('root', 'POSTGRES_PASSWORD', str, ('transfer', 'export'), "Senha do PostgreSQL."),
+    'threads': Opcao(2, 'NUM_THREADS', int, _TODOS, "Número de threads ou processos trabalhadores."),
+    'batch_size': Opcao(10000, 'BATCH_SIZE', int, _TODOS, "Chaves (ou ids) por lote."),
+    'inicio': Opcao(1, 'INICIO', int, ('populate', 'transfer'), "Primeira chave do intervalo."),
+    'fim': Opcao(1000001, 'FIM', int, ('populate', 'transfer'), "Fim do intervalo de chaves (exclusivo)."),
+    'formato_redis': Opcao('hash', 'FORMATO_REDIS', str, ('transfer', 'export'),
+                           "Formato dos pacotes no Redis: hash ou compacto."),
+    'adaptativo': Opcao(False, 'ADAPTATIVO', bool, ('transfer', 'export'),
+                        "Ajusta o tamanho dos lotes e as threads ativas durante a execução."),
+    'metricas_intervalo': Opcao(10.0, 'METRICAS_INTERVALO', float, ('transfer', 'export'),
+                                "Intervalo, em segundos, do relatório de métricas."),
+    'metricas_porta': Opcao(None, 'METRICAS_PORTA', int, ('transfer',),
+                            "Porta do endpoint de métricas no formato do Prometheus."),
+    # populate
+    'modo_povoamento': Opcao('threads', 'MODO_POVOAMENTO', str, ('populate',), "threads ou processos."),
+    'modo_escrita': Opcao('pipeline', 'MODO_ESCRITA', str, ('populate',), "pipeline, lua ou compacto."),
+    'pipeline_size': Opcao(1000, 'PIPELINE_SIZE', int, ('populate',), "Comandos por envio do pipeline."),
+    'dados': Opcao('simples', 'DADOS', str, ('populate',), "simples ou realistas."),
+    'semente': Opcao(42, 'SEMENTE', int, ('populate',), "Semente dos dados realistas."),
+    'esquema_dados': Opcao(None, 'ESQUEMA_DADOS', str, ('populate',),
+                           "Arquivo JSON com as distribuições dos dados realistas."),
+    # transfer
+    'modo': Opcao('threads', 'MODO_TRANSFERENCIA', str, ('transfer', 'export'), "threads ou processos."),
+    'sink': Opcao('copy', 'SINK', str, ('transfer',), "copy, execute_values, insert, upsert_values ou upsert_copy."),
+    'retomar': Opcao(False, 'RETOMAR_TRANSFERENCIA', bool, ('transfer',),
+                     "Mantém a tabela e pula os lotes já registrados no diário."),
+    'fonte': Opcao('intervalo', 'FONTE_TRANSFERENCIA', str, ('transfer',), "intervalo ou scan."),
+    'scan_match': Opcao(None, 'SCAN_MATCH', str, ('transfer',), "Padrão de chaves do SCAN e das notificações."),
+    'reconstruir_indices': Opcao(False, 'RECONSTRUIR_INDICES', bool, ('transfer',),
+                                 "Remove restrições e índices durante a carga e os recria ao final."),
+    'sincronizacao': Opcao(None, 'SINCRONIZACAO', str, ('transfer',),
+                           "notificacoes ou stream: sincronização incremental contínua."),
+    'stream_inicio': Opcao('$', 'STREAM_INICIO', str, ('transfer',),
+                           "ID inicial de um grupo novo no stream de alterações."),
+    'janela_sincronizacao': Opcao(1.0, 'JANELA_SINCRONIZACAO', float, ('transfer',),
+                                  "Segundos em que as alterações são agrupadas."),
+    # export
+    'particionamento': Opcao('id', 'PARTICIONAMENTO', str, ('export',), "id ou ctid."),
+    'paginas_por_lote': Opcao(100, 'PAGINAS_POR_LOTE', int, ('export',),
+                              "Páginas da tabela por lote no particionamento ctid."),
+    'ttl': Opcao(None, 'TTL_EXPORTACAO', int, ('export',), "Tempo de vida, em segundos, das chaves exportadas."),
+}
+
+# Variável de ambiente com o caminho do arquivo de configuração, quando `--config` não é informado
+VARIAVEL_ARQUIVO = 'TRANSFER_INFO_CONFIG'
+
+def converter(nome, valor):
+    """
+    summary
+        Converte o valor de uma opção, lido de uma variável de ambiente ou de um arquivo, para o seu tipo.
+
+    parameters
+        nome : str
+            Nome da opção em `OPCOES`.
+        valor : object
+            Valor lido.
+
+    return
+        object : Valor convertido.
+    """
+    tipo = OPCOES[nome].tipo
+    if valor is None or isinstance(valor, tipo):
+        return valor
+    if tipo is bool:
+        return str(valor).strip().lower() in ('1', 'true', 'sim', 'yes', 'on')
+    return tipo(valor)
+
+def carregar_configuracao(argumentos=None, arquivo=None, ambiente=None):
+    """
+    summary
+        Monta a configuração a partir dos valores padrão, de um arquivo JSON, das variáveis de ambiente
+        e das flags, nessa ordem de precedência. Apenas a biblioteca padrão é usada: nenhum backend é
+        importado ou conectado.
+
+    parameters
+        argumentos : dict
+            Valores das flags; None significa que a flag não foi informada.
+        arquivo : str
+            Arquivo JSON com opções de `OPCOES` (padrão: a variável `TRANSFER_INFO_CONFIG`, se definida).
+        ambiente : Mapping
+            Variáveis de ambiente (padrão: os.environ).
+
+    return
+        dict : Valor de cada opção de `OPCOES`.
+    """
+    ambiente = os.environ if ambiente is None else ambiente
+    config = {nome: opcao.padrao for nome, opcao in OPCOES.items()}
+
+    arquivo = arquivo or ambiente.get(VARIAVEL_ARQUIVO)
+    if arquivo:
+        with open(arquivo) as entrada:
+            dados = json.load(entrada)
+        desconhecidas = set(dados) - set(OPCOES)
+        if desconhecidas:
+            raise ValueError(f"Opções desconhecidas em {arquivo}: {', '.join(sorted(desconhecidas))}")
+        config.update({nome: converter(nome, valor) for nome, valor in dados.items()})
+
+    for nome, opcao in OPCOES.items():
+        valor = ambiente.get(opcao.variavel)
+        if valor not in (None, ''):
+            config[nome] = converter(nome, valor)
+
+    for nome, valor in (argumentos or {}).items():
+        if nome in OPCOES and valor is not None:
+            config[nome] = valor
+    return config
+
+def validar_configuracao(config, comando):
+    """
+    summary
+        Recusa as combinações de opções que o subcomando não suporta, antes que qualquer conexão seja aberta.
+
+    parameters
+        config : dict
+            Configuração de `carregar_configuracao`.
+        comando : str
+            Subcomando que vai usar a configuração.
+
+    return
+        None
+    """
+    if comando == 'transfer' and config['formato_redis'] == 'compacto':
+        if config['sincronizacao']:
+            raise ValueError("A sincronização não é suportada com o formato compacto.")
+        if config['fonte'] == 'scan':
+            raise ValueError("A fonte 'scan' não é suportada com o formato compacto.")
+
+def parametros_postgres(config):
+    """
+    summary
+        Parâmetros de conexão com o PostgreSQL, no formato aceito por `psycopg2.connect` e pelos pools.
+
+    parameters
+        config : dict
+            Configuração de `carregar_configuracao`.
+
+    return
+        dict : dbname, user, password, host e port.
+    """
+    return {
+        'dbname': config['postgres_db'],
+        'user': config['postgres_user'],
+        'password': config['postgres_password'],
+        'host': config['postgres_host'],
+        'port': str(config['postgres_port']),
+    }
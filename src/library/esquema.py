@@ -0,0 +1,299 @@
+from contextlib import contextmanager
+
+# Versão atual do esquema da tabela de pacotes:
+#   1 - quatro colunas VARCHAR(50), sem chave primária e sem índices
+#   2 - chave substituta `id`, Peso e Tamanho numéricos e índice B-tree em (Destino, id)
+#   3 - coluna Chave com a chave de origem no Redis e índice único, usados pela sincronização incremental
+VERSAO = 3
+
+# Valores de texto aceitos como números na migração; vírgulas decimais são trocadas por pontos antes
+_PADRAO_NUMERO = r'^[-+]?([0-9]+\.?[0-9]*|\.[0-9]+)$'
+# Valores de NUMERIC(12, 3), já arredondados para três casas, ficam abaixo deste limite em módulo
+_LIMITE_NUMERO = 10 ** 9
+
+class EsquemaPacotes:
+    """
+    summary
+        Define, cria e migra o esquema da tabela de pacotes. O índice em (Destino, id) atende às buscas
+        por Destino e à paginação por chave (keyset) ordenada por Destino. Ele é separado da criação
+        da tabela para que uma carga em massa possa criá-lo só depois de gravar os dados, quando
+        construí-lo de uma vez custa bem menos do que mantê-lo linha a linha.
+
+    parameters
+        tabela : str
+            Nome da tabela de pacotes.
+    """
+    def __init__(self, tabela='pacotes'):
+        self.tabela = tabela
+
+    def sql_criar_tabela(self):
+        """
+        summary
+            Comandos que criam a tabela na versão atual, caso ela ainda não exista, sem o índice em Destino.
+
+        return
+            list : Comandos SQL.
+        """
+        return [f"""
+            CREATE TABLE IF NOT EXISTS {self.tabela} (
+                id BIGSERIAL PRIMARY KEY,
+                Chave VARCHAR(100),
+                Destino VARCHAR(50),
+                Origem VARCHAR(50),
+                Peso NUMERIC(12, 3),
+                Tamanho NUMERIC(12, 3)
+            )
+        """]
+
+    def sql_criar_indices(self):
+        """
+        summary
+            Comandos que criam os índices secundários da tabela, caso ainda não existam.
+
+        return
+            list : Comandos SQL.
+        """
+        return [
+            f"CREATE INDEX IF NOT EXISTS {self.tabela}_destino_id_idx ON {self.tabela} (Destino, id)",
+            # Pacotes inseridos fora da transferência não têm Chave; o índice único aceita vários NULL
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {self.tabela}_chave_idx ON {self.tabela} (Chave)",
+            # Substituído pelo índice acima, que também atende às buscas apenas por Destino
+            f"DROP INDEX IF EXISTS {self.tabela}_destino_idx",
+            f"ANALYZE {self.tabela}",
+        ]
+
+    def criar(self, conn, recriar=False, indices=True):
+        """
+        summary
+            Cria a tabela na versão atual e faz commit.
+
+        parameters
+            conn : psycopg2.connection
+                Conexão com o PostgreSQL.
+            recriar : bool
+                Se True, apaga a tabela antes de criá-la.
+            indices : bool
+                Se False, o índice em Destino não é criado; use `criar_indices` depois da carga.
+
+        return
+            None
+        """
+        cursor = conn.cursor()
+        if recriar:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.tabela}")
+        for comando in self.sql_criar_tabela():
+            cursor.execute(comando)
+        conn.commit()
+        cursor.close()
+        if indices:
+            self.criar_indices(conn)
+
+    def criar_indices(self, conn):
+        """
+        summary
+            Cria os índices da versão atual que estiverem faltando, incluindo a chave primária, caso
+            tenha sido removida por uma carga interrompida, atualiza as estatísticas e faz commit.
+
+        parameters
+            conn : psycopg2.connection
+                Conexão com o PostgreSQL.
+
+        return
+            None
+        """
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT 1 FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'
+        """, (self.tabela,))
+        if cursor.fetchone() is None:
+            cursor.execute(f"ALTER TABLE {self.tabela} ADD PRIMARY KEY (id)")
+        for comando in self.sql_criar_indices():
+            cursor.execute(comando)
+        conn.commit()
+        cursor.close()
+
+    def versao(self, conn):
+        """
+        summary
+            Identifica a versão do esquema da tabela existente pelas suas colunas.
+
+        parameters
+            conn : psycopg2.connection
+                Conexão com o PostgreSQL.
+
+        return
+            int : 0 se a tabela não existe, 1 para o esquema original, 2 ou `VERSAO`.
+        """
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT column_name, data_type FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = %s
+        """, (self.tabela,))
+        colunas = dict(cursor.fetchall())
+        conn.commit()
+        cursor.close()
+
+        if not colunas:
+            return 0
+        if 'id' not in colunas or colunas.get('peso') != 'numeric' or colunas.get('tamanho') != 'numeric':
+            return 1
+        return VERSAO if 'chave' in colunas else 2
+
+    def migrar(self, conn):
+        """
+        summary
+            Leva a tabela à versão atual, no lugar e em uma única transação: acrescenta a chave `id` e a
+            coluna Chave, converte Peso e Tamanho para NUMERIC (valores que não são números viram NULL)
+            e cria os índices. Cria a tabela se ela não existir; na versão atual, apenas garante os índices.
+
+        parameters
+            conn : psycopg2.connection
+                Conexão com o PostgreSQL.
+
+        return
+            int : Versão encontrada antes da migração.
+        """
+        versao = self.versao(conn)
+        if versao == 0:
+            self.criar(conn)
+            return versao
+        if versao == VERSAO:
+            self.criar_indices(conn)
+            return versao
+
+        cursor = conn.cursor()
+        try:
+            if versao == 2:
+                # Coluna nula sem valor padrão: não reescreve a tabela
+                cursor.execute(f"ALTER TABLE {self.tabela} ADD COLUMN IF NOT EXISTS Chave VARCHAR(100)")
+            else:
+                parametros = {'padrao': _PADRAO_NUMERO, 'limite': _LIMITE_NUMERO}
+                cursor.execute(f"""
+                    SELECT count(*) FROM {self.tabela}
+                    WHERE (Peso IS NOT NULL AND {self._converter('Peso')} IS NULL)
+                       OR (Tamanho IS NOT NULL AND {self._converter('Tamanho')} IS NULL)
+                """, parametros)
+                invalidas = cursor.fetchone()[0]
+                if invalidas:
+                    print(f"Migração de {self.tabela}: {invalidas} linhas com Peso ou Tamanho não numérico "
+                          f"ou fora do intervalo de NUMERIC(12, 3) ficarão com NULL.")
+
+                # Um único ALTER TABLE reescreve a tabela uma só vez
+                cursor.execute(f"""
+                    ALTER TABLE {self.tabela}
+                        ADD COLUMN IF NOT EXISTS id BIGSERIAL,
+                        ADD COLUMN IF NOT EXISTS Chave VARCHAR(100),
+                        ALTER COLUMN Peso TYPE NUMERIC(12, 3) USING {self._converter('Peso')},
+                        ALTER COLUMN Tamanho TYPE NUMERIC(12, 3) USING {self._converter('Tamanho')}
+                """, parametros)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+        self.criar_indices(conn)
+        return versao
+
+    @staticmethod
+    def _converter(coluna):
+        """
+        summary
+            Expressão SQL que converte uma coluna de texto para NUMERIC, ou NULL se não for um número
+            ou se não couber em NUMERIC(12, 3), o que abortaria o ALTER TABLE inteiro. Usa os parâmetros
+            nomeados `padrao` e `limite`. O CASE aninhado garante que o valor só seja convertido depois
+            de validado pelo padrão.
+
+        parameters
+            coluna : str
+                Nome da coluna.
+
+        return
+            str : Expressão SQL.
+        """
+        valor = f"replace(trim({coluna}), ',', '.')"
+        return (
+            f"CASE WHEN {valor} ~ %(padrao)s THEN "
+            f"CASE WHEN abs(round({valor}::NUMERIC, 3)) < %(limite)s THEN {valor}::NUMERIC END END"
+        )
+
+    def remover_indices(self, conn):
+        """
+        summary
+            Remove as restrições (chave primária, únicas e estrangeiras) e os índices da tabela e faz
+            commit, guardando as suas definições para `restaurar_indices`.
+
+        parameters
+            conn : psycopg2.connection
+                Conexão com o PostgreSQL.
+
+        return
+            list : Tuplas (tipo, nome, definição), com tipo 'restricao' ou 'indice'.
+        """
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+            WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'f')
+        """, (self.tabela,))
+        definicoes = [('restricao', nome, definicao) for nome, definicao in cursor.fetchall()]
+        # Índices que não pertencem a uma restrição; os demais são removidos junto com ela
+        cursor.execute("""
+            SELECT indice.relname, pg_get_indexdef(indice.oid)
+            FROM pg_index JOIN pg_class indice ON indice.oid = pg_index.indexrelid
+            WHERE pg_index.indrelid = %s::regclass
+              AND NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conindid = pg_index.indexrelid)
+        """, (self.tabela,))
+        definicoes += [('indice', nome, definicao) for nome, definicao in cursor.fetchall()]
+
+        for tipo, nome, _ in definicoes:
+            if tipo == 'restricao':
+                cursor.execute(f'ALTER TABLE {self.tabela} DROP CONSTRAINT "{nome}"')
+            else:
+                cursor.execute(f'DROP INDEX "{nome}"')
+        conn.commit()
+        cursor.close()
+        return definicoes
+
+    def restaurar_indices(self, conn, definicoes):
+        """
+        summary
+            Recria as restrições e os índices removidos por `remover_indices`, atualiza as estatísticas
+            e faz commit.
+
+        parameters
+            conn : psycopg2.connection
+                Conexão com o PostgreSQL.
+            definicoes : list
+                Tuplas (tipo, nome, definição) devolvidas por `remover_indices`.
+
+        return
+            None
+        """
+        cursor = conn.cursor()
+        for tipo, nome, definicao in definicoes:
+            if tipo == 'restricao':
+                cursor.execute(f'ALTER TABLE {self.tabela} ADD CONSTRAINT "{nome}" {definicao}')
+            else:
+                cursor.execute(definicao)
+        cursor.execute(f"ANALYZE {self.tabela}")
+        conn.commit()
+        cursor.close()
+
+    @contextmanager
+    def indices_suspensos(self, conn):
+        """
+        summary
+            Remove restrições e índices ao entrar no bloco `with` e os recria ao sair, para cargas em
+            massa em uma tabela que já tem dados. Se o processo for interrompido no meio, `criar_indices`
+            recria a chave primária e o índice em Destino.
+
+        parameters
+            conn : psycopg2.connection
+                Conexão usada apenas para remover e recriar os índices.
+        """
+        definicoes = self.remover_indices(conn)
+        try:
+            yield definicoes
+        finally:
+            self.restaurar_indices(conn, definicoes)
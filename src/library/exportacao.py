@@ -0,0 +1,295 @@
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+from queue import Queue
+from library.transfer_info import ResultadoLote, SENTINELA
+from library.transferencia import CAMPOS, Connections, conexao_do_pool
+
+class DataExport:
+    """
+    A classe DataExport faz o caminho inverso de DataTransfer: lê os pacotes do PostgreSQL e os grava
+    no Redis, para reaquecer um Redis esvaziado ou um novo nó de cache. A tabela é dividida em
+    partições por intervalo de `id` (usando a chave primária) ou por intervalo de páginas (`ctid`,
+    uma varredura por TID que não depende de índice). Cada partição é um lote lido com um cursor no
+    servidor e gravado no Redis em pipelines, de modo que a memória usada não depende do tamanho da
+    partição. Os lotes são distribuídos por `library.transfer_info.transteferir_infos`, com as mesmas
+    threads, processos e controle adaptativo da transferência.
+
+    Attributes:
+        redis_conn (redis.Redis): Conexão com o Redis.
+        postgres_conn (psycopg2.connection): Conexão com o PostgreSQL.
+        num_threads (int): Número de threads a serem usadas para a exportação.
+        batch_size (int): Ids por lote ou, com particionamento 'ctid', páginas da tabela por lote.
+        task_queue (Queue): Fila limitada de tarefas para os trabalhadores (threads).
+        resultados (list): ResultadoLote de cada lote processado pelas threads.
+        pipeline_depth (int): Linhas lidas do cursor e comandos enviados ao Redis em cada pipeline.
+        ttl (int): Tempo de vida, em segundos, das chaves gravadas, ou None para chaves permanentes.
+        particionamento (str): 'id' ou 'ctid'.
+        tabela (str): Tabela de pacotes.
+        postgres_pool (ThreadedConnectionPool): Pool de onde cada lote retira a sua conexão, se fornecido.
+        metricas (Metricas): Coletor de métricas da exportação, se fornecido.
+        controlador (ControladorAdaptativo): Controlador que ajusta lotes e trabalhadores, se fornecido.
+        codec (CodecCompacto): Grava os pacotes no formato compacto, ou None para hashes de quatro campos.
+    """
+
+    def __init__(self, redis_conn, postgres_conn, num_threads=2, batch_size=10000, pipeline_depth=1000, ttl=None,
+                 particionamento='id', tabela='pacotes', postgres_pool=None, metricas=None, controlador=None,
+                 codec=None):
+        """
+        Inicializa a exportação com as conexões e configurações fornecidas.
+
+        Parameters:
+            redis_conn (redis.Redis): Conexão com o Redis.
+            postgres_conn (psycopg2.connection): Conexão com o PostgreSQL.
+            num_threads (int): Número de threads a serem usadas (padrão: 2).
+            batch_size (int): Ids por lote ou, com particionamento 'ctid', páginas por lote (padrão: 10000).
+            pipeline_depth (int): Linhas por leitura do cursor e por pipeline do Redis (padrão: 1000).
+            ttl (int): Tempo de vida das chaves gravadas, em segundos (padrão: None, sem expiração).
+            particionamento (str): 'id' divide a tabela por intervalos da chave primária; 'ctid' por
+                intervalos de páginas, útil quando os ids têm grandes lacunas (padrão: 'id').
+            tabela (str): Tabela de pacotes (padrão: 'pacotes').
+            postgres_pool (ThreadedConnectionPool): Pool de conexões para os lotes. Se omitido,
+                todos os lotes usam `postgres_conn` (padrão: None).
+            metricas (Metricas): Coletor de `library.metricas` (padrão: None).
+            controlador (ControladorAdaptativo): Controlador de `library.adaptativo` (padrão: None).
+            codec (CodecCompacto): Grava no formato de `library.compacto`. As chaves dos pacotes
+                devem ser números inteiros (padrão: None).
+        """
+        if particionamento not in ('id', 'ctid'):
+            raise ValueError(f"Particionamento desconhecido: {particionamento}. Opções: id, ctid")
+
+        self.redis_conn = redis_conn
+        self.postgres_conn = postgres_conn
+        self.num_threads = num_threads
+        self.batch_size = batch_size
+        self.pipeline_depth = pipeline_depth
+        self.ttl = ttl
+        self.particionamento = particionamento
+        self.tabela = tabela
+        self.postgres_pool = postgres_pool
+        self.metricas = metricas
+        self.controlador = controlador
+        self.codec = codec
+        self.task_queue = Queue(maxsize=num_threads * 2)
+        self.resultados = []
+        self._cursores = threading.local()  # Contador usado para nomear os cursores de cada thread
+
+    def conexao_postgre(self):
+        """
+        Fornece a conexão com o PostgreSQL usada durante um lote (ver `library.transferencia.conexao_do_pool`).
+        """
+        return conexao_do_pool(self.postgres_pool, self.postgres_conn)
+
+    def intervalo(self):
+        """
+        Calcula o intervalo a ser exportado: de menor a maior `id`, ou de zero ao número de páginas da tabela.
+
+        Returns:
+            tuple: (start, end), com `end` exclusivo; (0, 0) se a tabela estiver vazia.
+        """
+        cursor = self.postgres_conn.cursor()
+        if self.particionamento == 'id':
+            cursor.execute(f"SELECT min(id), max(id) FROM {self.tabela}")
+            menor, maior = cursor.fetchone()
+            intervalo = (0, 0) if menor is None else (menor, maior + 1)
+        else:
+            cursor.execute(
+                "SELECT pg_relation_size(%s::regclass) / current_setting('block_size')::INT", (self.tabela,)
+            )
+            intervalo = (0, cursor.fetchone()[0])
+        self.postgres_conn.commit()
+        cursor.close()
+        return intervalo
+
+    def lotes_concluidos(self):
+        """
+        A exportação não mantém diário: gravar a mesma chave duas vezes no Redis não tem efeito colateral.
+
+        Returns:
+            list: Sempre vazia.
+        """
+        return []
+
+    def informar(self, mensagem):
+        """
+        Imprime uma mensagem de progresso, a menos que o progresso esteja sendo reportado pelas métricas.
+
+        Parameters:
+            mensagem (str): Mensagem a ser impressa.
+        """
+        if self.metricas is None:
+            print(mensagem)
+
+    @contextmanager
+    def cronometro(self, estagio):
+        """
+        Cronometra um estágio do lote nas métricas, se houver.
+
+        Parameters:
+            estagio (str): Nome do estágio (ver `library.metricas.ESTAGIOS_EXPORTACAO`).
+        """
+        if self.metricas is None:
+            yield
+        else:
+            with self.metricas.cronometro(estagio):
+                yield
+
+    def consulta_lote(self, batch_start, batch_end):
+        """
+        Monta a consulta de um lote. Pacotes sem Chave, inseridos fora da transferência, são exportados
+        com o `id` como chave.
+
+        Parameters:
+            batch_start (int): Primeiro id (ou página) do lote.
+            batch_end (int): Fim do lote (exclusivo).
+
+        Returns:
+            tuple: (comando SQL, parâmetros).
+        """
+        if self.particionamento == 'id':
+            filtro, parametros = "id >= %s AND id < %s", (batch_start, batch_end)
+        else:
+            # Varredura por intervalo de TID, sem índice (PostgreSQL 14 ou superior)
+            filtro, parametros = "ctid >= %s::tid AND ctid < %s::tid", (f"({batch_start},0)", f"({batch_end},0)")
+        return f"""
+            SELECT COALESCE(Chave, id::TEXT), Destino, Origem, Peso, Tamanho FROM {self.tabela}
+            WHERE {filtro}
+        """, parametros
+
+    def gravar_linhas(self, pipe, linhas):
+        """
+        Enfileira no pipeline a gravação de um trecho de linhas lidas do PostgreSQL.
+
+        Parameters:
+            pipe (redis.client.Pipeline): Pipeline do Redis.
+            linhas (list): Tuplas (Chave, Destino, Origem, Peso, Tamanho).
+
+        Returns:
+            int: Linhas ignoradas por terem algum campo nulo.
+        """
+        completas = [linha for linha in linhas if None not in linha]
+
+        if self.codec is None:
+            for chave, *valores in completas:
+                pipe.hset(chave, mapping=dict(zip(CAMPOS, map(str, valores))))
+                if self.ttl:
+                    pipe.expire(chave, self.ttl)
+        else:
+            pacotes = {int(chave): valores for chave, *valores in completas}
+            for bucket, chaves, campos in self.codec.agrupar(sorted(pacotes)):
+                pipe.hset(bucket, mapping={
+                    campo: self.codec.codificar(*pacotes[chave]) for chave, campo in zip(chaves, campos)
+                })
+                if self.ttl:
+                    pipe.expire(bucket, self.ttl)
+        return len(linhas) - len(completas)
+
+    def exportar_lote(self, batch_start, batch_end):
+        """
+        Exporta um lote do PostgreSQL para o Redis: as linhas são lidas por um cursor no servidor, em
+        trechos de `pipeline_depth`, e cada trecho é gravado com um pipeline antes da leitura do próximo.
+
+        Parameters:
+            batch_start (int): Primeiro id (ou página) do lote.
+            batch_end (int): Fim do lote (exclusivo).
+
+        Returns:
+            ResultadoLote: Linhas gravadas no Redis, linhas ignoradas e a mensagem de erro, se o lote falhou.
+        """
+        inicio = perf_counter()
+        linhas_gravadas = ignoradas = 0
+        numero = getattr(self._cursores, 'numero', 0) + 1
+        self._cursores.numero = numero
+        # Qualquer falha, inclusive ao retirar a conexão do pool, vira um resultado com erro: um
+        # trabalhador que morresse sem devolver o resultado deixaria a distribuição dos lotes esperando
+        try:
+            with self.conexao_postgre() as conn:
+                # Cursor nomeado: cada `fetchmany` traz do servidor apenas o próximo trecho, não o lote inteiro
+                cursor = conn.cursor(name=f"exportar_{threading.get_ident()}_{numero}")
+                try:
+                    with self.cronometro('leitura_postgres'):
+                        cursor.execute(*self.consulta_lote(batch_start, batch_end))
+                    while True:
+                        with self.cronometro('leitura_postgres'):
+                            linhas = cursor.fetchmany(self.pipeline_depth)
+                        if not linhas:
+                            break
+                        with self.cronometro('escrita_redis'):
+                            with self.redis_conn.pipeline(transaction=False) as pipe:
+                                ignoradas_trecho = self.gravar_linhas(pipe, linhas)
+                                pipe.execute()
+                        linhas_gravadas += len(linhas) - ignoradas_trecho
+                        ignoradas += ignoradas_trecho
+                    cursor.close()
+                    conn.commit()  # Encerra a transação de leitura
+                except Exception:
+                    # O cursor nomeado é fechado antes do rollback, que o invalidaria; erros ao fechar
+                    # ou ao desfazer (conexão perdida) não podem esconder o erro original
+                    for desfazer in (cursor.close, conn.rollback):
+                        try:
+                            desfazer()
+                        except Exception:
+                            pass
+                    raise
+            resultado = ResultadoLote(batch_start, batch_end, linhas_gravadas, ignoradas, None, perf_counter() - inicio)
+            if ignoradas:
+                print(f"Lote {batch_start}-{batch_end}: {ignoradas} linhas com campos nulos ignoradas.")
+            self.informar(f"Lote {batch_start}-{batch_end} exportado com sucesso.")
+        except Exception as e:
+            print(f"Erro ao exportar lote {batch_start}-{batch_end}: {e}")
+            resultado = ResultadoLote(batch_start, batch_end, 0, 0, str(e), perf_counter() - inicio)
+
+        if self.metricas is not None:
+            self.metricas.registrar_lote(resultado.linhas, resultado.duracao, resultado.erro)
+        if self.controlador is not None:
+            self.controlador.registrar(resultado)
+        return resultado
+
+    # Nome usado por `library.transfer_info` nos modos 'threads' e 'processos'
+    transferir_lote = exportar_lote
+
+    def worker(self):
+        """
+        Função de trabalho executada pelas threads: exporta os lotes da fila até receber `SENTINELA`.
+        """
+        while True:
+            lote = self.task_queue.get()
+            if lote is SENTINELA:
+                self.task_queue.task_done()
+                break
+
+            batch_start, batch_end = lote
+            self.informar(f"Thread {threading.current_thread().name} exportando lote {batch_start}-{batch_end}")
+            self.resultados.append(self.exportar_lote(batch_start, batch_end))
+            self.task_queue.task_done()
+
+def criar_exportacao(num_threads=1, batch_size=10000, ttl=None, particionamento='id', metricas=None, codec=None,
+                     config=None):
+    """
+    Cria um DataExport com as suas próprias conexões. Usada como fábrica no modo 'processos',
+    em que cada processo trabalhador precisa de conexões próprias.
+
+    Parameters:
+        num_threads (int): Número de threads do objeto criado (padrão: 1).
+        batch_size (int): Ids ou páginas por lote (padrão: 10000).
+        ttl (int): Tempo de vida das chaves gravadas, em segundos (padrão: None).
+        particionamento (str): 'id' ou 'ctid' (padrão: 'id').
+        metricas (Metricas): Coletor de métricas do processo (padrão: None).
+        codec (CodecCompacto): Formato compacto dos pacotes no Redis (padrão: None).
+        config (dict): Configuração das conexões (padrão: lida das variáveis de ambiente).
+
+    Returns:
+        DataExport: Objeto de exportação com pools de conexões próprios.
+    """
+    conexoes = Connections(num_threads=num_threads, decode_responses=codec is None, config=config)
+    return DataExport(
+        conexoes.db_redis,
+        conexoes.db_postgre,
+        num_threads=num_threads,
+        batch_size=batch_size,
+        ttl=ttl,
+        particionamento=particionamento,
+        postgres_pool=conexoes.postgre_pool,
+        metricas=metricas,
+        codec=codec
+    )
@@ -0,0 +1,188 @@
+import json
+import random
+from functools import lru_cache
+from itertools import accumulate, islice
+
+# Esquema padrão dos pacotes gerados. Cada campo define a sua distribuição:
+#   'categoria': valores de um pool gerado pelo Faker (`pool` é o nome do provedor), sorteados com
+#                peso proporcional a 1 / posição ** zipf, de modo que poucos valores concentram a maioria
+#   'lognormal': números com distribuição log-normal (mu, sigma), limitados a [minimo, maximo]
+#   'uniforme':  números uniformes entre minimo e maximo
+#   'pesos':     um dos `valores`, com probabilidade proporcional a `pesos`
+ESQUEMA_PADRAO = {
+    'Destino': {'tipo': 'categoria', 'pool': 'city', 'zipf': 1.1},
+    'Origem': {'tipo': 'categoria', 'pool': 'city', 'zipf': 0.8},
+    'Peso': {'tipo': 'lognormal', 'mu': 0.7, 'sigma': 0.9, 'minimo': 0.05, 'maximo': 1000},
+    'Tamanho': {'tipo': 'pesos', 'valores': [1, 2, 3, 5, 8, 13], 'pesos': [35, 25, 18, 12, 7, 3]},
+}
+
+@lru_cache(maxsize=None)
+def gerar_pool(provedor, tamanho, semente, locale):
+    """
+    Gera, uma única vez por processo, um pool de valores distintos com o Faker. Os sorteios usam
+    apenas o pool, de modo que o custo do Faker não depende do número de pacotes gerados.
+
+    Parameters:
+        provedor (str): Nome do provedor do Faker, como 'city'.
+        tamanho (int): Número de valores desejados.
+        semente (int): Semente do Faker, para que todos os processos gerem o mesmo pool.
+        locale (str): Localidade do Faker.
+
+    Returns:
+        tuple: Valores distintos, na ordem em que foram gerados (até `tamanho`).
+    """
+    from faker import Faker
+
+    faker = Faker(locale)
+    faker.seed_instance(semente)
+    gerar = getattr(faker, provedor)
+    valores = {}
+    # Provedores com poucos valores possíveis esgotam antes de `tamanho`; o limite evita laço infinito
+    for _ in range(tamanho * 20):
+        valores.setdefault(str(gerar())[:50], None)
+        if len(valores) >= tamanho:
+            break
+    return tuple(valores)
+
+class GeradorPacotes:
+    """
+    A classe GeradorPacotes gera pacotes realistas de forma determinística e particionada. O intervalo
+    de chaves é dividido em partições fixas de `tamanho_particao` chaves e cada partição usa o seu
+    próprio gerador aleatório, semeado por (semente, partição). Assim, o pacote de uma chave não
+    depende de como os lotes foram divididos nem de qual processo os gerou: populações paralelas com
+    a mesma semente produzem exatamente os mesmos dados.
+
+    Attributes:
+        esquema (dict): Distribuição de cada campo (ver `ESQUEMA_PADRAO`).
+        semente (int): Semente global.
+        tamanho_particao (int): Número de chaves por partição.
+        tamanho_pool (int): Número de valores distintos gerados pelo Faker para cada pool.
+        locale (str): Localidade do Faker.
+    """
+
+    def __init__(self, esquema=None, semente=42, tamanho_particao=10000, tamanho_pool=2000, locale='pt_BR'):
+        """
+        Inicializa o gerador. Os pools do Faker são gerados apenas no primeiro uso, em cada processo.
+
+        Parameters:
+            esquema (dict): Distribuição de cada campo (padrão: ESQUEMA_PADRAO).
+            semente (int): Semente global (padrão: 42).
+            tamanho_particao (int): Chaves por partição (padrão: 10000).
+            tamanho_pool (int): Valores distintos por pool do Faker (padrão: 2000).
+            locale (str): Localidade do Faker (padrão: 'pt_BR').
+        """
+        self.esquema = esquema or ESQUEMA_PADRAO
+        self.semente = semente
+        self.tamanho_particao = tamanho_particao
+        self.tamanho_pool = tamanho_pool
+        self.locale = locale
+        self._amostradores = None  # Criados sob demanda; não são enviados aos processos
+        self._ultima_particao = None  # (particao, colunas), reaproveitada por lotes vizinhos
+
+    def __getstate__(self):
+        estado = self.__dict__.copy()
+        estado['_amostradores'] = None
+        estado['_ultima_particao'] = None
+        return estado
+
+    @classmethod
+    def de_arquivo(cls, caminho, **kwargs):
+        """
+        Cria um gerador com o esquema lido de um arquivo JSON no formato de `ESQUEMA_PADRAO`.
+
+        Parameters:
+            caminho (str): Caminho do arquivo JSON.
+            **kwargs: Demais parâmetros de `GeradorPacotes`.
+
+        Returns:
+            GeradorPacotes: Gerador configurado.
+        """
+        with open(caminho) as arquivo:
+            return cls(esquema=json.load(arquivo), **kwargs)
+
+    def _criar_amostrador(self, campo, definicao):
+        """
+        Cria a função que sorteia `k` valores de um campo com um gerador aleatório.
+
+        Parameters:
+            campo (str): Nome do campo, usado nas mensagens de erro.
+            definicao (dict): Distribuição do campo.
+
+        Returns:
+            callable: Função (rng, k) -> lista de valores.
+        """
+        tipo = definicao['tipo']
+        if tipo == 'categoria':
+            pool = gerar_pool(definicao['pool'], self.tamanho_pool, self.semente, self.locale)
+            acumulados = list(accumulate(1 / (i + 1) ** definicao.get('zipf', 1.0) for i in range(len(pool))))
+            return lambda rng, k: rng.choices(pool, cum_weights=acumulados, k=k)
+        if tipo == 'pesos':
+            valores = definicao['valores']
+            acumulados = list(accumulate(definicao['pesos']))
+            return lambda rng, k: rng.choices(valores, cum_weights=acumulados, k=k)
+        if tipo == 'lognormal':
+            mu, sigma = definicao['mu'], definicao['sigma']
+            minimo, maximo = definicao.get('minimo', 0), definicao.get('maximo', float('inf'))
+            return lambda rng, k: [
+                round(min(max(rng.lognormvariate(mu, sigma), minimo), maximo), 3) for _ in range(k)
+            ]
+        if tipo == 'uniforme':
+            minimo, maximo = definicao['minimo'], definicao['maximo']
+            return lambda rng, k: [round(rng.uniform(minimo, maximo), 3) for _ in range(k)]
+        raise ValueError(f"Distribuição desconhecida para {campo}: {tipo}")
+
+    def amostradores(self):
+        """
+        Retorna os amostradores de cada campo, criando-os (e os pools do Faker) no primeiro uso.
+
+        Returns:
+            list: Tuplas (campo, amostrador), na ordem do esquema.
+        """
+        if self._amostradores is None:
+            self._amostradores = [
+                (campo, self._criar_amostrador(campo, definicao)) for campo, definicao in self.esquema.items()
+            ]
+        return self._amostradores
+
+    def gerar_particao(self, particao):
+        """
+        Gera todos os pacotes de uma partição, coluna por coluna. A última partição gerada é
+        guardada, pois lotes não alinhados às partições costumam dividir uma partição com o lote seguinte.
+
+        Parameters:
+            particao (int): Número da partição.
+
+        Returns:
+            dict: Lista de valores de cada campo, com `tamanho_particao` valores.
+        """
+        ultima = self._ultima_particao
+        if ultima is not None and ultima[0] == particao:
+            return ultima[1]
+        rng = random.Random(self.semente * 1000003 + particao)
+        colunas = {campo: amostrar(rng, self.tamanho_particao) for campo, amostrar in self.amostradores()}
+        self._ultima_particao = (particao, colunas)  # Atribuição atômica; threads no pior caso recalculam
+        return colunas
+
+    def gerar(self, inicio, fim):
+        """
+        Gera os pacotes das chaves de `inicio` a `fim` (exclusivo). Partições cortadas pelo intervalo
+        são geradas inteiras e recortadas, mantendo o resultado independente da divisão em lotes.
+
+        Parameters:
+            inicio (int): Primeira chave.
+            fim (int): Fim do intervalo (exclusivo).
+
+        Returns:
+            generator: Tuplas (chave, {campo: valor}).
+        """
+        chave = inicio
+        while chave < fim:
+            particao, deslocamento = divmod(chave, self.tamanho_particao)
+            base = particao * self.tamanho_particao
+            ultimo = min(fim - base, self.tamanho_particao)
+            colunas = self.gerar_particao(particao)
+            campos = list(colunas)
+            linhas = islice(zip(*colunas.values()), deslocamento, ultimo)
+            for i, valores in enumerate(linhas, start=base + deslocamento):
+                yield i, dict(zip(campos, valores))
+            chave = base + ultimo
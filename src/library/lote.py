@@ -0,0 +1,182 @@
+import re
+import struct
+from decimal import Decimal
+
+# Texto aceito em Peso e Tamanho, compatível com NUMERIC
+_NUMERO = re.compile(r'[-+]?([0-9]+\.?[0-9]*|\.[0-9]+)').fullmatch
+# Números com até oito dígitos na parte inteira: cabem em NUMERIC(12, 3) sem precisar de Decimal
+_NUMERO_PEQUENO = re.compile(r'[-+]?0*([0-9]{1,8}(\.[0-9]*)?|\.[0-9]+)').fullmatch
+# Menor valor, em módulo, que o arredondamento para três casas leva para fora de NUMERIC(12, 3)
+_FORA_DO_INTERVALO = Decimal('999999999.9995')
+
+def _motivo_numero(campo, texto):
+    """
+    summary
+        Verifica se um texto pode ser gravado em uma coluna NUMERIC(12, 3).
+
+    parameters
+        campo : str
+            Nome do campo, usado no motivo.
+        texto : str
+            Valor lido do Redis.
+
+    return
+        str : Motivo da recusa, ou None se o valor é válido.
+    """
+    if _NUMERO_PEQUENO(texto):
+        return None
+    if not _NUMERO(texto):
+        return f"{campo} não numérico: {texto!r}"
+    if abs(Decimal(texto)) >= _FORA_DO_INTERVALO:
+        return f"{campo} fora do intervalo de NUMERIC(12, 3): {texto!r}"
+    return None
+
+class LoteColunar:
+    """
+    summary
+        Lote de pacotes guardado por colunas: uma lista por campo (Chave, Destino, Origem, Peso,
+        Tamanho) em vez de um dicionário ou uma tupla por linha. Os valores lidos do Redis vão direto
+        para as colunas, a validação percorre cada coluna de uma vez e, no caminho comum em que todas
+        as linhas são válidas, nenhuma estrutura por linha é criada até o sink percorrer o lote.
+
+        O lote se comporta como a lista de tuplas (Chave, Destino, Origem, Peso, Tamanho) esperada
+        pelos sinks (`len` e iteração), de modo que `CopySink` o serializa no buffer do COPY sem
+        cópia intermediária. Um mesmo objeto pode ser reutilizado a cada lote com `limpar`.
+    """
+    __slots__ = ('chaves', 'destinos', 'origens', 'pesos', 'tamanhos', 'falhas', 'tamanho_texto')
+
+    def __init__(self, tamanho_texto=50):
+        """
+        summary
+            Cria um lote vazio.
+
+        parameters
+            tamanho_texto : int
+                Tamanho máximo de Destino e Origem, o mesmo das colunas VARCHAR da tabela.
+        """
+        self.chaves = []
+        self.destinos = []
+        self.origens = []
+        self.pesos = []
+        self.tamanhos = []
+        self.falhas = []
+        self.tamanho_texto = tamanho_texto
+
+    def __len__(self):
+        return len(self.destinos)
+
+    def __iter__(self):
+        return zip(self.chaves, self.destinos, self.origens, self.pesos, self.tamanhos)
+
+    def limpar(self):
+        """
+        summary
+            Esvazia o lote para reutilizá-lo.
+
+        return
+            None
+        """
+        for coluna in (self.chaves, self.destinos, self.origens, self.pesos, self.tamanhos, self.falhas):
+            coluna.clear()
+
+    def carregar_respostas(self, chaves, respostas):
+        """
+        summary
+            Acrescenta as respostas de um pipeline de HMGET (Destino, Origem, Peso, Tamanho). Chaves
+            ausentes, com campos faltando ou com erro vão para `falhas`.
+
+        parameters
+            chaves : iterable
+                Chaves consultadas, na ordem dos comandos do pipeline.
+            respostas : list
+                Respostas do pipeline executado com `raise_on_error=False`.
+
+        return
+            None
+        """
+        for chave, valores in zip(chaves, respostas):
+            if isinstance(valores, Exception):
+                self.falhas.append((chave, str(valores)))
+                continue
+            destino, origem, peso, tamanho = valores
+            if destino is None or origem is None or peso is None or tamanho is None:
+                faltando = [campo for campo, valor in zip(('Destino', 'Origem', 'Peso', 'Tamanho'), valores) if valor is None]
+                motivo = "chave ausente" if len(faltando) == 4 else f"campos ausentes: {', '.join(faltando)}"
+                self.falhas.append((chave, motivo))
+                continue
+            self.chaves.append(chave)
+            self.destinos.append(destino)
+            self.origens.append(origem)
+            self.pesos.append(peso)
+            self.tamanhos.append(tamanho)
+
+    def carregar_registros(self, chaves, registros, codec):
+        """
+        summary
+            Acrescenta registros binários do formato compacto, decodificados com `codec`. Registros
+            ausentes ou inválidos vão para `falhas`.
+
+        parameters
+            chaves : iterable
+                Números dos pacotes, na ordem dos registros.
+            registros : list
+                Registros lidos de um bucket, ou uma exceção se a leitura do bucket falhou.
+            codec : CodecCompacto
+                Formato dos registros (ver `library.compacto`).
+
+        return
+            None
+        """
+        if isinstance(registros, Exception):
+            self.falhas.extend((chave, str(registros)) for chave in chaves)
+            return
+        for chave, registro in zip(chaves, registros):
+            if registro is None:
+                self.falhas.append((chave, "chave ausente"))
+                continue
+            try:
+                destino, origem, peso, tamanho = codec.decodificar(registro)
+            except (ValueError, UnicodeDecodeError, struct.error) as e:
+                self.falhas.append((chave, f"registro inválido: {e}"))
+                continue
+            self.chaves.append(chave)
+            self.destinos.append(destino)
+            self.origens.append(origem)
+            self.pesos.append(peso)
+            self.tamanhos.append(tamanho)
+
+    def validar(self):
+        """
+        summary
+            Valida o lote coluna a coluna: Peso e Tamanho devem ser números que caibam em
+            NUMERIC(12, 3) e Destino e Origem devem caber em `tamanho_texto` caracteres. As linhas
+            inválidas são retiradas das colunas e acrescentadas a `falhas`, em vez de fazerem o
+            PostgreSQL recusar o lote. Quando todas são válidas, as colunas não são copiadas.
+
+        return
+            int : Número de linhas retiradas.
+        """
+        limite = self.tamanho_texto
+        validas = (
+            all(map(_NUMERO_PEQUENO, self.pesos))
+            and all(map(_NUMERO_PEQUENO, self.tamanhos))
+            and max(map(len, self.destinos), default=0) <= limite
+            and max(map(len, self.origens), default=0) <= limite
+        )
+        if validas:
+            return 0
+
+        manter = []
+        for i, (_, destino, origem, peso, tamanho) in enumerate(self):
+            motivo = _motivo_numero('Peso', peso) or _motivo_numero('Tamanho', tamanho)
+            if motivo is not None:
+                self.falhas.append((self.chaves[i], motivo))
+            elif len(destino) > limite or len(origem) > limite:
+                self.falhas.append((self.chaves[i], f"Destino ou Origem com mais de {limite} caracteres"))
+            else:
+                manter.append(i)
+
+        retiradas = len(self) - len(manter)
+        for coluna in (self.chaves, self.destinos, self.origens, self.pesos, self.tamanhos):
+            coluna[:] = [coluna[i] for i in manter]
+        return retiradas
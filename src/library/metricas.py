@@ -0,0 +1,352 @@
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Estágios cronometrados em cada lote de transferência
+ESTAGIOS = ('leitura_redis', 'codificacao', 'escrita_postgres', 'commit')
+# Estágios da exportação do PostgreSQL para o Redis (library.exportacao)
+ESTAGIOS_EXPORTACAO = ('leitura_postgres', 'escrita_redis')
+
+class Histograma:
+    """
+    summary
+        Histograma de latências com faixas exponenciais fixas. Registrar um valor custa uma busca
+        binária e um incremento, independentemente de quantos valores já foram registrados.
+
+    parameters
+        limites : list
+            Limites superiores das faixas, em segundos e em ordem crescente. O padrão cobre de 1 ms
+            a cerca de 12 minutos, com faixas que crescem por um fator de √2.
+    """
+    def __init__(self, limites=None):
+        self.limites = limites or [0.001 * 2 ** (i / 2) for i in range(40)]
+        self.contagens = [0] * (len(self.limites) + 1)  # A última faixa recebe valores acima do maior limite
+        self.total = 0
+        self.soma = 0.0
+        self.maximo = 0.0
+
+    def registrar(self, valor):
+        """
+        summary
+            Registra um valor no histograma.
+
+        parameters
+            valor : float
+                Latência em segundos.
+
+        return
+            None
+        """
+        self.contagens[bisect_left(self.limites, valor)] += 1
+        self.total += 1
+        self.soma += valor
+        self.maximo = max(self.maximo, valor)
+
+    def percentil(self, p):
+        """
+        summary
+            Estima um percentil pelo limite superior da faixa que o contém.
+
+        parameters
+            p : float
+                Percentil desejado, entre 0 e 100.
+
+        return
+            float : Latência estimada em segundos (0.0 se não houver registros).
+        """
+        if self.total == 0:
+            return 0.0
+        alvo = p / 100 * self.total
+        acumulado = 0
+        for limite, contagem in zip(self.limites, self.contagens):
+            acumulado += contagem
+            if acumulado >= alvo:
+                return min(limite, self.maximo)
+        return self.maximo
+
+class Metricas:
+    """
+    summary
+        Coleta métricas de vazão e latência de uma transferência: tempo por estágio, linhas e lotes
+        por segundo, utilização de cada trabalhador, histograma de latência dos lotes e profundidade
+        da fila de tarefas. Os trabalhadores apenas atualizam contadores; a saída é feita por ganchos,
+        por uma única thread de relatório em JSON e, opcionalmente, por um endpoint no formato texto
+        do Prometheus.
+    """
+    def __init__(self):
+        self._trava = threading.Lock()
+        self.inicio = time.perf_counter()
+        self.tempo_estagios = defaultdict(float)
+        self.contagem_estagios = defaultdict(int)
+        self.linhas = 0
+        self.lotes = 0
+        self.lotes_com_erro = 0
+        self.latencia_lotes = Histograma()
+        self.ocupacao = defaultdict(float)  # Segundos ocupados por trabalhador
+        self._fila = None
+        self.atraso_sincronizacao = None  # Segundos, na última aplicação da sincronização incremental
+        self._ganchos = []
+        self._relatorio = None
+        self._parar_relatorio = threading.Event()
+
+    def registrar_gancho(self, gancho):
+        """
+        summary
+            Registra uma função chamada ao final de cada lote, na thread do trabalhador.
+
+        parameters
+            gancho : callable
+                Função que recebe um dicionário com `trabalhador`, `linhas`, `duracao` e `erro`.
+
+        return
+            None
+        """
+        self._ganchos.append(gancho)
+
+    def observar_fila(self, fila):
+        """
+        summary
+            Define a fila de tarefas cuja profundidade é reportada.
+
+        parameters
+            fila : queue.Queue
+                Fila de tarefas dos trabalhadores.
+
+        return
+            None
+        """
+        self._fila = fila
+
+    def registrar_estagio(self, estagio, duracao):
+        """
+        summary
+            Acumula o tempo gasto em um estágio do lote.
+
+        parameters
+            estagio : str
+                Nome do estágio (ver `ESTAGIOS` e `ESTAGIOS_EXPORTACAO`).
+            duracao : float
+                Duração em segundos.
+
+        return
+            None
+        """
+        with self._trava:
+            self.tempo_estagios[estagio] += duracao
+            self.contagem_estagios[estagio] += 1
+
+    @contextmanager
+    def cronometro(self, estagio):
+        """
+        summary
+            Mede a duração do bloco `with` e a acumula no estágio informado.
+
+        parameters
+            estagio : str
+                Nome do estágio (ver `ESTAGIOS` e `ESTAGIOS_EXPORTACAO`).
+        """
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar_estagio(estagio, time.perf_counter() - inicio)
+
+    def registrar_lote(self, linhas, duracao, erro=None, trabalhador=None):
+        """
+        summary
+            Registra a conclusão de um lote e chama os ganchos registrados.
+
+        parameters
+            linhas : int
+                Linhas gravadas pelo lote.
+            duracao : float
+                Duração total do lote em segundos.
+            erro : str
+                Mensagem de erro, se o lote falhou.
+            trabalhador : str
+                Nome do trabalhador; o padrão é o nome da thread atual.
+
+        return
+            None
+        """
+        trabalhador = trabalhador or threading.current_thread().name
+        with self._trava:
+            self.linhas += linhas
+            self.lotes += 1
+            if erro:
+                self.lotes_com_erro += 1
+            self.latencia_lotes.registrar(duracao)
+            self.ocupacao[trabalhador] += duracao
+
+        evento = {'trabalhador': trabalhador, 'linhas': linhas, 'duracao': duracao, 'erro': erro}
+        for gancho in self._ganchos:
+            gancho(evento)
+
+    def registrar_atraso(self, atraso):
+        """
+        summary
+            Registra o atraso da sincronização incremental: o tempo entre a alteração mais antiga de um
+            lote no Redis e o commit do lote no PostgreSQL.
+
+        parameters
+            atraso : float
+                Atraso em segundos.
+
+        return
+            None
+        """
+        with self._trava:
+            self.atraso_sincronizacao = atraso
+
+    def snapshot(self):
+        """
+        summary
+            Retorna o estado atual das métricas.
+
+        return
+            dict : Métricas agregadas desde a criação do objeto.
+        """
+        with self._trava:
+            decorrido = max(time.perf_counter() - self.inicio, 1e-9)
+            return {
+                'decorrido_s': round(decorrido, 3),
+                'linhas': self.linhas,
+                'lotes': self.lotes,
+                'lotes_com_erro': self.lotes_com_erro,
+                'linhas_por_s': round(self.linhas / decorrido, 1),
+                'lotes_por_s': round(self.lotes / decorrido, 3),
+                'estagios_s': {estagio: round(tempo, 3) for estagio, tempo in self.tempo_estagios.items()},
+                'latencia_lote_ms': {
+                    'p50': round(self.latencia_lotes.percentil(50) * 1000, 1),
+                    'p99': round(self.latencia_lotes.percentil(99) * 1000, 1),
+                    'max': round(self.latencia_lotes.maximo * 1000, 1),
+                },
+                'utilizacao': {
+                    trabalhador: round(ocupado / decorrido, 3) for trabalhador, ocupado in self.ocupacao.items()
+                },
+                'profundidade_fila': self._fila.qsize() if self._fila is not None else None,
+                'atraso_sincronizacao_s': (
+                    round(self.atraso_sincronizacao, 3) if self.atraso_sincronizacao is not None else None
+                ),
+            }
+
+    def iniciar_relatorio(self, intervalo=10.0, saida=print):
+        """
+        summary
+            Inicia uma thread que emite uma linha JSON com o `snapshot` a cada `intervalo` segundos.
+
+        parameters
+            intervalo : float
+                Segundos entre as linhas de relatório.
+            saida : callable
+                Função que recebe cada linha (padrão: print).
+
+        return
+            None
+        """
+        def relatar():
+            while not self._parar_relatorio.wait(intervalo):
+                saida(json.dumps(self.snapshot()))
+
+        self._parar_relatorio.clear()
+        self._relatorio = threading.Thread(target=relatar, name='metricas-relatorio', daemon=True)
+        self._relatorio.start()
+
+    def parar_relatorio(self, saida=print):
+        """
+        summary
+            Interrompe a thread de relatório e emite uma última linha com as métricas finais.
+
+        parameters
+            saida : callable
+                Função que recebe a linha final (padrão: print).
+
+        return
+            None
+        """
+        if self._relatorio is None:
+            return
+        self._parar_relatorio.set()
+        self._relatorio.join()
+        self._relatorio = None
+        saida(json.dumps(self.snapshot()))
+
+    def texto_prometheus(self):
+        """
+        summary
+            Formata as métricas no formato texto de exposição do Prometheus.
+
+        return
+            str : Métricas no formato texto do Prometheus.
+        """
+        dados = self.snapshot()
+        linhas = [
+            '# TYPE transfer_info_linhas_total counter',
+            f"transfer_info_linhas_total {dados['linhas']}",
+            '# TYPE transfer_info_lotes_total counter',
+            f"transfer_info_lotes_total {dados['lotes']}",
+            '# TYPE transfer_info_lotes_com_erro_total counter',
+            f"transfer_info_lotes_com_erro_total {dados['lotes_com_erro']}",
+            '# TYPE transfer_info_estagio_segundos_total counter',
+        ]
+        for estagio, tempo in dados['estagios_s'].items():
+            linhas.append(f'transfer_info_estagio_segundos_total{{estagio="{estagio}"}} {tempo}')
+        linhas.append('# TYPE transfer_info_utilizacao gauge')
+        for trabalhador, fracao in dados['utilizacao'].items():
+            linhas.append(f'transfer_info_utilizacao{{trabalhador="{trabalhador}"}} {fracao}')
+        if dados['profundidade_fila'] is not None:
+            linhas.append('# TYPE transfer_info_profundidade_fila gauge')
+            linhas.append(f"transfer_info_profundidade_fila {dados['profundidade_fila']}")
+        if dados['atraso_sincronizacao_s'] is not None:
+            linhas.append('# TYPE transfer_info_atraso_sincronizacao_segundos gauge')
+            linhas.append(f"transfer_info_atraso_sincronizacao_segundos {dados['atraso_sincronizacao_s']}")
+
+        with self._trava:
+            histograma = self.latencia_lotes
+            linhas.append('# TYPE transfer_info_latencia_lote_segundos histogram')
+            acumulado = 0
+            for limite, contagem in zip(histograma.limites, histograma.contagens):
+                acumulado += contagem
+                linhas.append(f'transfer_info_latencia_lote_segundos_bucket{{le="{limite:.6g}"}} {acumulado}')
+            linhas.append(f'transfer_info_latencia_lote_segundos_bucket{{le="+Inf"}} {histograma.total}')
+            linhas.append(f'transfer_info_latencia_lote_segundos_sum {histograma.soma}')
+            linhas.append(f'transfer_info_latencia_lote_segundos_count {histograma.total}')
+        return '\n'.join(linhas) + '\n'
+
+    def iniciar_servidor_prometheus(self, porta=9100, host='0.0.0.0'):
+        """
+        summary
+            Inicia, em uma thread separada, um servidor HTTP que responde com `texto_prometheus`.
+
+        parameters
+            porta : int
+                Porta do servidor.
+            host : str
+                Endereço em que o servidor escuta.
+
+        return
+            ThreadingHTTPServer : Servidor iniciado; use `shutdown()` para encerrá-lo.
+        """
+        # Importado só aqui: a maioria das execuções não expõe o endpoint
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metricas = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                corpo = metricas.texto_prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, *args):
+                pass  # Sem uma linha de log por coleta
+
+        servidor = ThreadingHTTPServer((host, porta), Handler)
+        threading.Thread(target=servidor.serve_forever, name='metricas-prometheus', daemon=True).start()
+        return servidor
@@ -0,0 +1,385 @@
+import random
+from time import sleep  
+import os  
+import threading  
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from queue import Queue  
+from library.compacto import CodecCompacto
+from library.config import carregar_configuracao
+
+# Script Lua que gera um intervalo inteiro de pacotes no próprio servidor, em uma única chamada
+POPULATE_LUA = """
+local inicio = tonumber(ARGV[1])
+local fim = tonumber(ARGV[2])
+for i = inicio, fim - 1 do
+    redis.call('HSET', string.format('%d', i),
+        'Destino', string.format('%d', i + 1),
+        'Origem', string.format('%d', i),
+        'Peso', '1',
+        'Tamanho', '1')
+end
+return fim - inicio
+"""
+
+class RedisConnector:
+    """
+    A classe RedisConnector é responsável por estabelecer a conexão com o Redis. Se a conexão falhar,
+    ela tenta reconectar até que uma conexão seja estabelecida com sucesso, com esperas que dobram
+    a cada falha (até `ESPERA_MAXIMA`) e são sorteadas entre zero e esse limite, para que vários
+    processos não reconectem todos no mesmo instante.
+
+    Attributes:
+        redis_host (str): O endereço do host Redis.
+        redis_port (int): A porta do Redis.
+        max_connections (int): Tamanho máximo do pool de conexões com o Redis.
+        db_redis (redis.Redis): Instância de conexão com o banco de dados Redis.
+    """
+
+    # Espera inicial e máxima entre as tentativas de conexão, em segundos
+    ESPERA_INICIAL = 0.5
+    ESPERA_MAXIMA = 10.0
+
+    def __init__(self, max_connections=2, config=None):
+        """
+        Inicializa a conexão com o Redis no host e na porta da configuração.
+
+        Parameters:
+            max_connections (int): Tamanho máximo do pool de conexões, normalmente o número de threads (padrão: 2).
+            config (dict): Configuração de `library.config.carregar_configuracao` (padrão: lida das
+                variáveis de ambiente, com 'HOST_TO_REDIS' ou 'localhost').
+        """
+        config = config or carregar_configuracao()
+        self.redis_host = config['redis_host']
+        self.redis_port = config['redis_port']
+        self.max_connections = max_connections
+        self.db_redis = self.connect_to_redis()
+
+    def connect_to_redis(self):
+        """
+        Tenta estabelecer uma conexão com o Redis, tentando novamente caso ocorra algum erro de conexão.
+
+        Parameters:
+            None
+        
+        Returns:
+            redis.Redis: Instância da conexão Redis.
+        """
+        # Importado só aqui para que o `transfer-info` inicie sem carregar o driver
+        import redis
+
+        tentativa = 0
+        while True:
+            try:
+                # Pool explícito: cada thread usa a sua conexão e as demais aguardam quando todas estão em uso
+                pool = redis.BlockingConnectionPool(
+                    host=self.redis_host, port=self.redis_port, decode_responses=True,
+                    max_connections=self.max_connections
+                )
+                db_redis = redis.Redis(connection_pool=pool)
+                db_redis.ping()  # O pool só conecta no primeiro comando
+                print("Conexão estabelecida com Redis")
+                return db_redis
+            except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError):
+                espera = random.uniform(0, min(self.ESPERA_MAXIMA, self.ESPERA_INICIAL * 2 ** min(tentativa, 16)))
+                tentativa += 1
+                print(f"Erro ao conectar ao Redis, nova tentativa em {espera:.1f}s...")
+                sleep(espera)
+
+
+class RedisPopulator:
+    """
+    A classe RedisPopulator é responsável por popular o Redis com dados em lotes, utilizando múltiplas threads para processar os dados em paralelo.
+
+    Attributes:
+        redis_conn (redis.Redis): Instância da conexão com o Redis.
+        num_threads (int): Número de threads a serem utilizadas para processar os lotes.
+        batch_size (int): Tamanho do lote de dados a ser processado por thread.
+        task_queue (Queue): Fila limitada de tarefas que armazena os intervalos dos lotes a serem processados.
+        resultados (list): Tuplas (batch_start, batch_end, chaves) de cada lote processado.
+        pipeline_size (int): Número de comandos acumulados no pipeline antes de cada envio ao Redis.
+        write_mode (str): 'pipeline' para enviar HSETs em pipelines, 'lua' para gerar os lotes no servidor
+            ou 'compacto' para gravar registros binários agrupados em buckets (ver `library.compacto`).
+        codec (CodecCompacto): Formato dos registros no modo 'compacto'; None nos demais modos.
+        gerador (GeradorPacotes): Gerador de pacotes realistas; None para os pacotes sintéticos simples.
+    """
+
+    def __init__(self, redis_conn, num_threads=2, batch_size=10000, pipeline_size=1000, write_mode='pipeline',
+                 gerador=None, config=None):
+        """
+        Inicializa a configuração para o processo de popular o Redis com dados em lotes.
+
+        Parameters:
+            redis_conn (redis.Redis): Instância da conexão com o Redis.
+            num_threads (int): Número de threads a serem usadas (padrão: 2).
+            batch_size (int): Tamanho dos lotes a serem processados (padrão: 10000).
+            pipeline_size (int): Comandos por envio do pipeline no modo 'pipeline' (padrão: 1000).
+            write_mode (str): 'pipeline' (padrão), 'lua', que gera cada lote com um único EVALSHA, ou
+                'compacto', que grava os registros binários de `library.compacto`. No modo 'lua' o Redis
+                fica bloqueado durante cada lote; prefira lotes menores.
+            gerador (GeradorPacotes): Gera pacotes realistas e reprodutíveis nos modos 'pipeline' e
+                'compacto'. Se omitido, cada chave i recebe Destino=i+1, Origem=i, Peso=1, Tamanho=1 (padrão: None).
+            config (dict): Configuração usada pelos processos trabalhadores para abrir as suas conexões
+                no modo 'processos' (padrão: lida das variáveis de ambiente).
+        """
+        if write_mode not in ('pipeline', 'lua', 'compacto'):
+            raise ValueError(f"Modo de escrita desconhecido: {write_mode}. Opções: pipeline, lua, compacto")
+        if gerador is not None and write_mode == 'lua':
+            raise ValueError("O modo 'lua' gera os pacotes no servidor e não aceita um gerador.")
+
+        self.redis_conn = redis_conn
+        self.num_threads = num_threads
+        self.batch_size = batch_size
+        self.pipeline_size = pipeline_size
+        self.write_mode = write_mode
+        self.task_queue = Queue(maxsize=num_threads * 2)
+        self.resultados = []
+        self.populate_script = redis_conn.register_script(POPULATE_LUA) if write_mode == 'lua' else None
+        self.gerador = gerador
+        self.config = config
+        self.codec = CodecCompacto() if write_mode == 'compacto' else None
+
+    def generate_batches(self, start, end):
+        """
+        Gera os intervalos dos lotes, dividindo o intervalo de dados de acordo com o tamanho do lote.
+
+        Parameters:
+            start (int): O índice inicial dos dados.
+            end (int): O índice final dos dados.
+
+        Returns:
+            generator: Tuplas (batch_start, batch_end).
+        """
+        for i in range(start, end, self.batch_size):
+            yield i, min(i + self.batch_size, end)
+
+    def create_batches(self, start, end):
+        """
+        Cria os lotes de dados a serem processados, dividindo o intervalo de dados de acordo com o tamanho do lote.
+        Os lotes entram na fila à medida que as threads os consomem, seguidos de uma sentinela (None) por thread.
+
+        Parameters:
+            start (int): O índice inicial dos dados.
+            end (int): O índice final dos dados.
+
+        Returns:
+            None
+        """
+        try:
+            for batch in self.generate_batches(start, end):
+                self.task_queue.put(batch)  # Espera se a fila estiver cheia
+        finally:
+            for _ in range(self.num_threads):
+                self.task_queue.put(None)
+
+    def populate_batch(self, batch_start, batch_end):
+        """
+        Popula o Redis com dados para um determinado intervalo de lote. No modo 'pipeline' os comandos
+        são enviados em pipelines não transacionais a cada `pipeline_size` comandos; no modo 'lua' o
+        lote inteiro é gerado no servidor.
+
+        Parameters:
+            batch_start (int): O índice inicial do lote.
+            batch_end (int): O índice final do lote.
+
+        Returns:
+            int: Número de chaves gravadas.
+        """
+        if self.write_mode == 'lua':
+            return self.populate_script(args=[batch_start, batch_end])
+        if self.write_mode == 'compacto':
+            return self.populate_batch_compact(batch_start, batch_end)
+
+        with self.redis_conn.pipeline(transaction=False) as pipe:
+            for i, pacote in self.generate_packages(batch_start, batch_end):
+                pipe.hset(i, mapping=pacote)
+                if len(pipe) >= self.pipeline_size:
+                    pipe.execute()
+            pipe.execute()
+        return batch_end - batch_start
+
+    def generate_packages(self, batch_start, batch_end):
+        """
+        Gera os pacotes de um lote com o gerador configurado ou, sem gerador, os pacotes sintéticos simples.
+
+        Parameters:
+            batch_start (int): O índice inicial do lote.
+            batch_end (int): O índice final do lote.
+
+        Returns:
+            generator: Tuplas (chave, {campo: valor}).
+        """
+        if self.gerador is not None:
+            return self.gerador.gerar(batch_start, batch_end)
+        return (
+            (i, {'Destino': i + 1, 'Origem': i, 'Peso': 1, 'Tamanho': 1}) for i in range(batch_start, batch_end)
+        )
+
+    def populate_batch_compact(self, batch_start, batch_end):
+        """
+        Popula um lote no formato compacto: um único HSET por bucket com os registros binários dos
+        seus pacotes. O pipeline é enviado a cada `pipeline_size` registros.
+
+        Parameters:
+            batch_start (int): O índice inicial do lote.
+            batch_end (int): O índice final do lote.
+
+        Returns:
+            int: Número de pacotes gravados.
+        """
+        comandos_por_envio = max(1, self.pipeline_size // self.codec.tamanho_bucket)
+
+        pacotes = self.generate_packages(batch_start, batch_end)
+
+        with self.redis_conn.pipeline(transaction=False) as pipe:
+            for bucket, chaves, campos in self.codec.agrupar(range(batch_start, batch_end)):
+                registros = {}
+                for campo, (_, pacote) in zip(campos, pacotes):
+                    registros[campo] = self.codec.codificar(
+                        pacote['Destino'], pacote['Origem'], pacote['Peso'], pacote['Tamanho']
+                    )
+                pipe.hset(bucket, mapping=registros)
+                if len(pipe) >= comandos_por_envio:
+                    pipe.execute()
+            pipe.execute()
+        return batch_end - batch_start
+
+    def worker(self):
+        """
+        Função do trabalhador que processa os lotes de dados em paralelo. Cada thread retira um lote da fila e processa os dados,
+        até encontrar a sentinela (None).
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+        while True:
+            batch = self.task_queue.get()
+            if batch is None:
+                self.task_queue.task_done()
+                break
+
+            batch_start, batch_end = batch
+            print(f"Thread {threading.current_thread().name} processando lote {batch_start}-{batch_end}")
+            try:
+                chaves = self.populate_batch(batch_start, batch_end)
+            except Exception as e:
+                # A thread continua consumindo a fila: se morresse, `create_batches` ficaria bloqueado no put
+                print(f"Erro ao popular lote {batch_start}-{batch_end}: {e}")
+                chaves = 0
+            self.resultados.append((batch_start, batch_end, chaves))
+            self.task_queue.task_done()
+
+    def run_processes(self, start, end):
+        """
+        Popula o Redis utilizando `num_threads` processos em vez de threads, para usar todos os núcleos
+        disponíveis. Cada processo abre a sua própria conexão com o Redis e recebe intervalos de lote.
+
+        Parameters:
+            start (int): O índice inicial dos dados.
+            end (int): O índice final dos dados.
+
+        Returns:
+            list: Tuplas (batch_start, batch_end, chaves) de cada lote, na ordem em que foram concluídos;
+            um lote que falhou tem 0 chaves.
+        """
+        pending = {}  # Futuro -> (batch_start, batch_end)
+        max_pending = self.num_threads * 2  # Limita os lotes submetidos e ainda não concluídos
+
+        def coletar(futures):
+            for future in futures:
+                batch_start, batch_end = pending.pop(future)
+                try:
+                    self.resultados.append(future.result())
+                except Exception as e:
+                    # Inclui o BrokenProcessPool de um processo que não conseguiu se conectar ao Redis
+                    print(f"Erro ao popular lote {batch_start}-{batch_end}: {e}")
+                    self.resultados.append((batch_start, batch_end, 0))
+
+        with ProcessPoolExecutor(
+            max_workers=self.num_threads,
+            initializer=_iniciar_processo,
+            initargs=(self.batch_size, self.pipeline_size, self.write_mode, self.gerador, self.config)
+        ) as executor:
+            for batch_start, batch_end in self.generate_batches(start, end):
+                if len(pending) >= max_pending:
+                    coletar(wait(pending, return_when=FIRST_COMPLETED).done)
+                pending[executor.submit(_popular_lote_processo, batch_start, batch_end)] = (batch_start, batch_end)
+
+            coletar(wait(pending).done)
+
+        return self.resultados
+
+    def run(self, start, end, mode='threads'):
+        """
+        Inicia o processo de popular o Redis com dados utilizando múltiplas threads. Divida os dados em lotes e distribua
+        entre as threads para processamento paralelo.
+
+        Parameters:
+            start (int): O índice inicial dos dados.
+            end (int): O índice final dos dados.
+            mode (str): 'threads' (padrão) ou 'processos', que delega para `run_processes`.
+
+        Returns:
+            list: Tuplas (batch_start, batch_end, chaves) de cada lote processado.
+        """
+        if mode == 'processos':
+            return self.run_processes(start, end)
+        if mode != 'threads':
+            raise ValueError(f"Modo de execução desconhecido: {mode}. Opções: threads, processos")
+
+        threads = []
+
+        for _ in range(self.num_threads):
+            thread = threading.Thread(target=self.worker)
+            threads.append(thread)
+            thread.start()
+
+        # Produz os lotes enquanto as threads já processam os primeiros
+        self.create_batches(start, end)
+
+        for thread in threads:
+            thread.join()
+
+        return self.resultados
+
+
+# Populador do processo atual, criado por `_iniciar_processo` no modo 'processos'
+_populator_processo = None
+
+def _iniciar_processo(batch_size, pipeline_size, write_mode, gerador=None, config=None):
+    """
+    Inicializa um processo trabalhador com a sua própria conexão com o Redis.
+
+    Parameters:
+        batch_size (int): Tamanho dos lotes a serem processados.
+        pipeline_size (int): Comandos por envio do pipeline.
+        write_mode (str): Modo de escrita ('pipeline', 'lua' ou 'compacto').
+        gerador (GeradorPacotes): Gerador de pacotes, copiado para o processo sem os seus pools.
+        config (dict): Configuração da conexão com o Redis.
+
+    Returns:
+        None
+    """
+    global _populator_processo
+    redis_connector = RedisConnector(max_connections=1, config=config)
+    _populator_processo = RedisPopulator(
+        redis_connector.db_redis, num_threads=1, batch_size=batch_size,
+        pipeline_size=pipeline_size, write_mode=write_mode, gerador=gerador
+    )
+
+def _popular_lote_processo(batch_start, batch_end):
+    """
+    Popula um lote dentro de um processo trabalhador.
+
+    Parameters:
+        batch_start (int): O índice inicial do lote.
+        batch_end (int): O índice final do lote.
+
+    Returns:
+        tuple: (batch_start, batch_end, chaves) para o processo principal.
+    """
+    print(f"Processo {os.getpid()} processando lote {batch_start}-{batch_end}")
+    chaves = _populator_processo.populate_batch(batch_start, batch_end)
+    return batch_start, batch_end, chaves
@@ -0,0 +1,384 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+# Classes de SQLSTATE do PostgreSQL tratadas como transitórias: falha de conexão (08), conflito de
+# serialização e deadlock (40001, 40P01), recursos insuficientes (53) e desligamento do servidor (57P0x)
+_SQLSTATES_TRANSITORIOS = ('08', '40001', '40P01', '53', '57P01', '57P02', '57P03')
+
+# Classes de SQLSTATE causadas pelos valores de uma linha: dados inválidos (22) e violação de
+# restrição (23). Só elas podem ser isoladas dividindo o lote
+_SQLSTATES_DADOS = ('22', '23')
+
+class CircuitoAberto(Exception):
+    """
+    summary
+        Levantada quando uma chamada é recusada porque o disjuntor de um serviço está aberto.
+
+    parameters
+        servico : str
+            Nome do serviço protegido.
+        restante : float
+            Segundos até o disjuntor permitir uma nova tentativa.
+    """
+    def __init__(self, servico, restante):
+        super().__init__(f"circuito de {servico} aberto; nova tentativa em {restante:.1f}s")
+        self.servico = servico
+        self.restante = restante
+
+def erro_transitorio(erro):
+    """
+    summary
+        Indica se um erro tende a desaparecer sozinho (conexão perdida, tempo esgotado, deadlock,
+        servidor reiniciando), valendo repetir a operação. Erros de dados, como um valor inválido em
+        uma linha, não são transitórios: repetir produziria o mesmo erro.
+
+    parameters
+        erro : Exception
+            Erro a classificar.
+
+    return
+        bool : True se a operação deve ser repetida.
+    """
+    if isinstance(erro, CircuitoAberto):
+        return True
+
+    if isinstance(erro, (ConnectionError, TimeoutError)):
+        return True
+    try:
+        from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+    except ImportError:  # Sem o redis, nenhum erro pode ser dele
+        pass
+    else:
+        if isinstance(erro, (RedisConnectionError, RedisTimeoutError)):
+            return True
+
+    pgcode = getattr(erro, 'pgcode', None)
+    if pgcode:
+        return pgcode.startswith(_SQLSTATES_TRANSITORIOS)
+    try:
+        import psycopg2
+    except ImportError:  # A biblioteca não exige o psycopg2
+        return False
+    # Conexão perdida antes de o servidor responder: não há SQLSTATE
+    return isinstance(erro, (psycopg2.OperationalError, psycopg2.InterfaceError))
+
+def erro_de_dados(erro):
+    """
+    summary
+        Indica se um erro do PostgreSQL foi causado pelos valores de alguma linha (SQLSTATE das classes
+        22 e 23, `psycopg2.DataError` e `psycopg2.IntegrityError`). Erros de esquema, de permissão ou
+        de SQL, como tabela ausente ou falta do índice único do `ON CONFLICT`, afetam todas as linhas
+        e não são de dados.
+
+    parameters
+        erro : Exception
+            Erro a classificar.
+
+    return
+        bool : True se o erro pode ser isolado em linhas específicas.
+    """
+    pgcode = getattr(erro, 'pgcode', None)
+    return bool(pgcode) and pgcode.startswith(_SQLSTATES_DADOS)
+
+class PoliticaRetentativa:
+    """
+    summary
+        Repete operações que falham com erros transitórios, esperando entre as tentativas um tempo
+        que cresce exponencialmente (`base * 2 ** tentativa`, limitado a `maximo`). O jitter completo
+        sorteia a espera entre zero e esse limite, de modo que trabalhadores que falharam juntos não
+        voltam todos no mesmo instante e derrubam o serviço que acabou de voltar.
+
+    parameters
+        tentativas : int | None
+            Número máximo de tentativas, incluindo a primeira; None repete indefinidamente.
+        base : float
+            Espera, em segundos, antes da segunda tentativa (sem jitter).
+        maximo : float
+            Espera máxima entre duas tentativas, em segundos.
+        transitorio : callable
+            Função que recebe o erro e indica se ele deve ser repetido (padrão: `erro_transitorio`).
+        dormir : callable
+            Função usada para esperar; substituível em testes.
+    """
+    def __init__(self, tentativas=5, base=0.2, maximo=30.0, transitorio=erro_transitorio, dormir=time.sleep):
+        self.tentativas = tentativas
+        self.base = base
+        self.maximo = maximo
+        self.transitorio = transitorio
+        self.dormir = dormir
+
+    def espera(self, tentativa, minimo=0.0):
+        """
+        summary
+            Calcula a espera após a falha de número `tentativa` (a partir de zero), com jitter completo.
+
+        parameters
+            tentativa : int
+                Número da tentativa que falhou.
+            minimo : float
+                Espera mínima, como o tempo restante de um disjuntor aberto.
+
+        return
+            float : Segundos a esperar.
+        """
+        limite = min(self.maximo, self.base * 2 ** min(tentativa, 32))
+        return max(random.uniform(0, limite), minimo)
+
+    def executar(self, funcao, *args, ao_repetir=None, **kwargs):
+        """
+        summary
+            Chama `funcao(*args, **kwargs)`, repetindo-a após erros transitórios até esgotar as
+            tentativas. Erros não transitórios e o erro da última tentativa são propagados.
+
+        parameters
+            funcao : callable
+                Operação a executar.
+            ao_repetir : callable
+                Chamada com (tentativa, erro, espera) antes de cada espera, para desfazer estado
+                parcial ou registrar a falha (padrão: None).
+
+        return
+            object : Retorno de `funcao`.
+        """
+        tentativa = 0
+        while True:
+            try:
+                return funcao(*args, **kwargs)
+            except Exception as e:
+                tentativa += 1
+                if not self.transitorio(e) or (self.tentativas is not None and tentativa >= self.tentativas):
+                    raise
+                espera = self.espera(tentativa - 1, getattr(e, 'restante', 0.0))
+                if ao_repetir is not None:
+                    ao_repetir(tentativa, e, espera)
+                self.dormir(espera)
+
+class Disjuntor:
+    """
+    summary
+        Disjuntor (circuit breaker) de um serviço. Depois de `limite_falhas` falhas transitórias
+        seguidas, o circuito abre e as chamadas são recusadas com `CircuitoAberto` por `tempo_aberto`
+        segundos, sem chegar ao serviço. Passado esse tempo, uma única chamada de teste é liberada
+        (meio aberto): se ela funcionar, o circuito fecha; se falhar, abre de novo. Assim, quando um
+        serviço cai, os trabalhadores param de insistir nele e esperam juntos pela sua volta.
+
+    parameters
+        servico : str
+            Nome do serviço, usado nas mensagens.
+        limite_falhas : int
+            Falhas transitórias seguidas que abrem o circuito.
+        tempo_aberto : float
+            Segundos em que o circuito fica aberto antes da chamada de teste.
+        relogio : callable
+            Função que retorna o instante atual em segundos.
+    """
+    def __init__(self, servico, limite_falhas=5, tempo_aberto=10.0, relogio=time.monotonic):
+        self.servico = servico
+        self.limite_falhas = limite_falhas
+        self.tempo_aberto = tempo_aberto
+        self.relogio = relogio
+        self.falhas = 0
+        self.aberto_ate = None  # Instante em que o circuito passa a meio aberto; None se fechado
+        self._testando = False  # Se a chamada de teste do estado meio aberto está em andamento
+        self._trava = threading.Lock()
+
+    @property
+    def estado(self):
+        """
+        summary
+            Estado atual do circuito.
+
+        return
+            str : 'fechado', 'aberto' ou 'meio_aberto'.
+        """
+        if self.aberto_ate is None:
+            return 'fechado'
+        return 'aberto' if self.relogio() < self.aberto_ate else 'meio_aberto'
+
+    def permitir(self):
+        """
+        summary
+            Libera uma chamada ou levanta `CircuitoAberto`. No estado meio aberto, só a primeira
+            chamada é liberada até o seu resultado ser registrado.
+
+        return
+            None
+        """
+        with self._trava:
+            if self.aberto_ate is None:
+                return
+            restante = self.aberto_ate - self.relogio()
+            if restante > 0:
+                raise CircuitoAberto(self.servico, restante)
+            if self._testando:
+                raise CircuitoAberto(self.servico, self.tempo_aberto / 10)
+            self._testando = True
+
+    def registrar_sucesso(self):
+        """
+        summary
+            Fecha o circuito e zera as falhas.
+
+        return
+            None
+        """
+        with self._trava:
+            if self.aberto_ate is not None:
+                print(f"Circuito de {self.servico} fechado: serviço respondendo.")
+            self.falhas = 0
+            self.aberto_ate = None
+            self._testando = False
+
+    def registrar_falha(self):
+        """
+        summary
+            Conta uma falha transitória e abre o circuito ao atingir o limite ou se a chamada de teste falhou.
+
+        return
+            None
+        """
+        with self._trava:
+            self.falhas += 1
+            if self._testando or self.falhas >= self.limite_falhas:
+                if self.aberto_ate is None or self._testando:
+                    print(f"Circuito de {self.servico} aberto após {self.falhas} falhas seguidas.")
+                self.aberto_ate = self.relogio() + self.tempo_aberto
+                self._testando = False
+
+    @contextmanager
+    def protegido(self):
+        """
+        summary
+            Executa o bloco `with` sob o disjuntor: recusa-o se o circuito estiver aberto, conta os
+            erros transitórios como falhas e a conclusão sem erro como sucesso. Erros não transitórios
+            (de dados) não dizem nada sobre a saúde do serviço e liberam a chamada de teste sem mudar o estado.
+        """
+        self.permitir()
+        try:
+            yield
+        except Exception as e:
+            if erro_transitorio(e):
+                self.registrar_falha()
+            else:
+                with self._trava:
+                    self._testando = False
+            raise
+        self.registrar_sucesso()
+
+class FilaRejeitados:
+    """
+    summary
+        Tabela de rejeitados (dead-letter) do PostgreSQL: guarda as linhas que não puderam ser
+        gravadas, com o motivo e o lote de origem, em vez de perdê-las junto com o lote. Os valores
+        são guardados como texto, pois foi justamente a conversão deles que pode ter falhado.
+
+    parameters
+        tabela : str
+            Nome da tabela de rejeitados.
+        colunas : tuple
+            Colunas das linhas rejeitadas, na ordem das tuplas recebidas.
+    """
+    def __init__(self, tabela='pacotes_rejeitados', colunas=('Chave', 'Destino', 'Origem', 'Peso', 'Tamanho')):
+        self.tabela = tabela
+        self.colunas = colunas
+
+    def criar(self, conn):
+        """
+        summary
+            Cria a tabela de rejeitados, caso ainda não exista, e faz commit.
+
+        parameters
+            conn : psycopg2.connection
+                Conexão com o PostgreSQL.
+
+        return
+            None
+        """
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.tabela} (
+                id BIGSERIAL PRIMARY KEY,
+                {', '.join(f'{coluna} TEXT' for coluna in self.colunas)},
+                motivo TEXT,
+                lote TEXT,
+                rejeitado_em TIMESTAMP DEFAULT now()
+            )
+        """)
+        conn.commit()
+        cursor.close()
+
+    def registrar(self, cursor, rejeitadas, lote):
+        """
+        summary
+            Grava as linhas rejeitadas. Deve ser chamado na transação do lote, antes do commit, para
+            que as linhas boas e as rejeitadas sejam confirmadas juntas.
+
+        parameters
+            cursor : psycopg2.cursor
+                Cursor da transação do lote.
+            rejeitadas : list
+                Tuplas (linha, motivo); `linha` é uma tupla nas `colunas` ou apenas a chave.
+            lote : str
+                Identificação do lote de origem.
+
+        return
+            int : Número de linhas registradas.
+        """
+        from psycopg2.extras import execute_values
+
+        valores = []
+        for linha, motivo in rejeitadas:
+            linha = linha if isinstance(linha, tuple) else (linha,)
+            linha = tuple(None if valor is None else str(valor) for valor in linha)
+            valores.append(linha + (None,) * (len(self.colunas) - len(linha)) + (motivo, lote))
+        execute_values(
+            cursor,
+            f"INSERT INTO {self.tabela} ({', '.join(self.colunas)}, motivo, lote) VALUES %s",
+            valores
+        )
+        return len(valores)
+
+def enviar_com_bisseccao(cursor, sink, linhas, dados=None):
+    """
+    summary
+        Envia as linhas com o sink dentro de um savepoint. Se o envio falhar por um erro de dados, o
+        savepoint é desfeito e as linhas são divididas ao meio e reenviadas, recursivamente, até isolar
+        as linhas ruins. As partes boas continuam sendo enviadas em bloco, e a transação do lote
+        segue aberta para um único commit. Com k linhas ruins em n, são cerca de 2·k·log2(n) envios extras.
+        Só erros de dados (`erro_de_dados`) são divididos. Os demais são propagados: os transitórios
+        para que o lote inteiro seja repetido, e os de esquema, permissão ou SQL, que afetariam todas
+        as linhas, para que o lote falhe em vez de ir inteiro para a tabela de rejeitados.
+
+    parameters
+        cursor : psycopg2.cursor
+            Cursor da transação do lote.
+        sink : Sink
+            Sink de `library.sinks`.
+        linhas : list | LoteColunar
+            Linhas a enviar. Só são copiadas para uma lista se o envio falhar.
+        dados : object
+            Resultado de `sink.preparar(linhas)`, se já calculado.
+
+    return
+        tuple : (linhas gravadas, lista de tuplas (linha, motivo) das linhas isoladas).
+    """
+    cursor.execute("SAVEPOINT bisseccao")
+    try:
+        gravadas = sink.enviar(cursor, sink.preparar(linhas) if dados is None else dados)
+    except Exception as e:
+        if not erro_de_dados(e):
+            raise
+        # O savepoint continua existindo após o ROLLBACK TO; o RELEASE o descarta antes da divisão
+        cursor.execute("ROLLBACK TO SAVEPOINT bisseccao")
+        cursor.execute("RELEASE SAVEPOINT bisseccao")
+        linhas = list(linhas)
+        if len(linhas) == 1:
+            return 0, [(linhas[0], str(e).strip())]
+        meio = len(linhas) // 2
+        gravadas_inicio, ruins_inicio = enviar_com_bisseccao(cursor, sink, linhas[:meio])
+        gravadas_fim, ruins_fim = enviar_com_bisseccao(cursor, sink, linhas[meio:])
+        return gravadas_inicio + gravadas_fim, ruins_inicio + ruins_fim
+    cursor.execute("RELEASE SAVEPOINT bisseccao")
+    return gravadas, []
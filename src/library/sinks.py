@@ -0,0 +1,421 @@
+import csv
+import io
+
+# Colunas gravadas na tabela de destino, na ordem das tuplas recebidas pelos sinks. Chave é a
+# chave de origem do pacote no Redis.
+COLUNAS = ('Chave', 'Destino', 'Origem', 'Peso', 'Tamanho')
+
+class Sink:
+    """
+    summary
+        Base dos sinks. A gravação é dividida em `preparar` (codificação das linhas, sem acesso ao
+        banco) e `enviar` (envio ao PostgreSQL), para que as duas etapas possam ser medidas à parte.
+    """
+    def gravar(self, cursor, linhas):
+        """
+        summary
+            Prepara e envia as linhas usando o cursor informado. Não faz commit.
+
+        parameters
+            cursor : psycopg2.cursor
+                Cursor da conexão em que as linhas serão gravadas.
+            linhas : list
+                Lista de tuplas com os valores de cada linha.
+
+        return
+            int : Número de linhas gravadas.
+        """
+        return self.enviar(cursor, self.preparar(linhas))
+
+class InsertSink(Sink):
+    """
+    summary
+        Grava as linhas com um `INSERT` por linha. Mantido como referência e para depuração.
+
+    parameters
+        tabela : str
+            Nome da tabela de destino.
+        colunas : tuple
+            Colunas preenchidas, na ordem dos valores de cada linha.
+    """
+    def __init__(self, tabela='pacotes', colunas=COLUNAS):
+        self.tabela = tabela
+        self.colunas = colunas
+
+    def preparar(self, linhas):
+        """
+        summary
+            Não há codificação prévia: os valores são adaptados pelo psycopg2 a cada `INSERT`.
+
+        parameters
+            linhas : list
+                Lista de tuplas com os valores de cada linha.
+
+        return
+            list : As próprias linhas.
+        """
+        return linhas
+
+    def enviar(self, cursor, linhas):
+        """
+        summary
+            Insere as linhas uma a uma usando o cursor informado. Não faz commit.
+
+        parameters
+            cursor : psycopg2.cursor
+                Cursor da conexão em que as linhas serão gravadas.
+            linhas : list
+                Lista de tuplas com os valores de cada linha.
+
+        return
+            int : Número de linhas gravadas.
+        """
+        placeholders = ", ".join(["%s"] * len(self.colunas))
+        comando = f"INSERT INTO {self.tabela} ({', '.join(self.colunas)}) VALUES ({placeholders})"
+        for linha in linhas:
+            cursor.execute(comando, linha)
+        return len(linhas)
+
+class ExecuteValuesSink(Sink):
+    """
+    summary
+        Grava as linhas com `INSERT ... VALUES` de múltiplas linhas via `psycopg2.extras.execute_values`.
+
+    parameters
+        tabela : str
+            Nome da tabela de destino.
+        colunas : tuple
+            Colunas preenchidas, na ordem dos valores de cada linha.
+        page_size : int
+            Número de linhas enviadas em cada comando `INSERT`.
+    """
+    def __init__(self, tabela='pacotes', colunas=COLUNAS, page_size=1000):
+        self.tabela = tabela
+        self.colunas = colunas
+        self.page_size = page_size
+
+    def preparar(self, linhas):
+        """
+        summary
+            Não há codificação prévia: os valores são adaptados pelo psycopg2 em cada página.
+
+        parameters
+            linhas : list
+                Lista de tuplas com os valores de cada linha.
+
+        return
+            list : As próprias linhas.
+        """
+        return linhas
+
+    def enviar(self, cursor, linhas):
+        """
+        summary
+            Insere as linhas em comandos de até `page_size` linhas. Não faz commit.
+
+        parameters
+            cursor : psycopg2.cursor
+                Cursor da conexão em que as linhas serão gravadas.
+            linhas : list
+                Lista de tuplas com os valores de cada linha.
+
+        return
+            int : Número de linhas gravadas.
+        """
+        from psycopg2.extras import execute_values
+
+        execute_values(
+            cursor,
+            f"INSERT INTO {self.tabela} ({', '.join(self.colunas)}) VALUES %s",
+            linhas,
+            page_size=self.page_size
+        )
+        return len(linhas)
+
+class CopySink(Sink):
+    """
+    summary
+        Grava as linhas com `COPY ... FROM STDIN`, enviando o lote inteiro como um buffer CSV em memória.
+
+    parameters
+        tabela : str
+            Nome da tabela de destino.
+        colunas : tuple
+            Colunas preenchidas, na ordem dos valores de cada linha.
+    """
+    def __init__(self, tabela='pacotes', colunas=COLUNAS):
+        self.tabela = tabela
+        self.colunas = colunas
+
+    def preparar(self, linhas):
+        """
+        summary
+            Serializa as linhas em um buffer CSV em memória. Valores `None` viram NULL. Um
+            `LoteColunar` é percorrido coluna a coluna, sem criar uma lista de tuplas.
+
+        parameters
+            linhas : list | LoteColunar
+                Lista de tuplas com os valores de cada linha, ou um lote colunar.
+
+        return
+            tuple : (buffer, número de linhas).
+        """
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(linhas)
+        buffer.seek(0)
+        return buffer, len(linhas)
+
+    def enviar(self, cursor, dados):
+        """
+        summary
+            Envia um buffer produzido por `preparar` com um único `COPY`. Não faz commit.
+
+        parameters
+            cursor : psycopg2.cursor
+                Cursor da conexão em que as linhas serão gravadas.
+            dados : tuple
+                (buffer, número de linhas), como devolvido por `preparar`.
+
+        return
+            int : Número de linhas gravadas.
+        """
+        buffer, quantidade = dados
+        cursor.copy_expert(
+            f"COPY {self.tabela} ({', '.join(self.colunas)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+        return quantidade
+
+class UpsertValuesSink(ExecuteValuesSink):
+    """
+    summary
+        Grava as linhas com `INSERT ... ON CONFLICT DO UPDATE` via `execute_values`, atualizando as
+        linhas cuja chave natural já existe e pulando as que não mudaram. Requer um índice único na
+        chave. Adequado a lotes pequenos, como os da sincronização incremental.
+
+    parameters
+        tabela : str
+            Nome da tabela de destino.
+        colunas : tuple
+            Colunas preenchidas, na ordem dos valores de cada linha.
+        chave : tuple
+            Colunas da chave natural, cobertas por um índice único.
+        page_size : int
+            Número de linhas enviadas em cada comando `INSERT`.
+    """
+    def __init__(self, tabela='pacotes', colunas=COLUNAS, chave=('Chave',), page_size=1000):
+        super().__init__(tabela, colunas, page_size)
+        self.chave = chave
+
+    def enviar(self, cursor, linhas):
+        """
+        summary
+            Insere ou atualiza as linhas em comandos de até `page_size` linhas. Não faz commit.
+            Se a mesma chave aparecer mais de uma vez, apenas a última ocorrência é gravada, pois o
+            PostgreSQL não permite atualizar a mesma linha duas vezes em um comando.
+
+        parameters
+            cursor : psycopg2.cursor
+                Cursor da conexão em que as linhas serão gravadas.
+            linhas : list
+                Lista de tuplas com os valores de cada linha.
+
+        return
+            int : Número de linhas enviadas.
+        """
+        from psycopg2.extras import execute_values
+
+        posicoes = [self.colunas.index(coluna) for coluna in self.chave]
+        linhas = list({tuple(linha[i] for i in posicoes): linha for linha in linhas}.values())
+        execute_values(
+            cursor,
+            f"""
+            INSERT INTO {self.tabela} AS atual ({', '.join(self.colunas)}) VALUES %s
+            {_clausula_conflito(self.colunas, self.chave)}
+            """,
+            linhas,
+            page_size=self.page_size
+        )
+        return len(linhas)
+
+    def remover(self, cursor, chaves):
+        """
+        summary
+            Remove as linhas cujas chaves foram apagadas na origem. Não faz commit. Suporta apenas
+            chaves de uma coluna.
+
+        parameters
+            cursor : psycopg2.cursor
+                Cursor da conexão em que as linhas serão removidas.
+            chaves : list
+                Valores da chave das linhas a remover.
+
+        return
+            int : Número de linhas removidas.
+        """
+        if not chaves:
+            return 0
+        coluna, = self.chave
+        cursor.execute(f"DELETE FROM {self.tabela} WHERE {coluna} = ANY(%s)", ([str(chave) for chave in chaves],))
+        return cursor.rowcount
+
+class UpsertCopySink(CopySink):
+    """
+    summary
+        Upsert idempotente para cargas em massa. Cada lote é carregado com `COPY` em uma tabela
+        temporária de preparação (tabelas temporárias não geram WAL) e então incorporado à tabela de
+        destino com um único `INSERT ... SELECT ... ON CONFLICT DO UPDATE` pela chave natural. Linhas
+        cujos valores não mudaram são puladas pela cláusula `WHERE ... IS DISTINCT FROM` e não geram
+        nova versão da linha nem WAL, de modo que reexecutar uma transferência interrompida não
+        duplica linhas e custa pouco nas linhas já gravadas. Requer um índice único na chave.
+
+        A tabela de preparação é criada uma vez por conexão, com `ON COMMIT DELETE ROWS`, e reutilizada
+        pelos lotes seguintes, evitando criar e apagar uma tabela no catálogo a cada lote.
+
+    parameters
+        tabela : str
+            Nome da tabela de destino.
+        colunas : tuple
+            Colunas preenchidas, na ordem dos valores de cada linha.
+        chave : tuple
+            Colunas da chave natural, cobertas por um índice único.
+    """
+    def __init__(self, tabela='pacotes', colunas=COLUNAS, chave=('Chave',)):
+        super().__init__(tabela, colunas)
+        self.chave = chave
+        self.preparacao = f"{tabela}_preparacao"
+
+    def enviar(self, cursor, dados):
+        """
+        summary
+            Esvazia a tabela de preparação, carrega nela o buffer e o incorpora à tabela de destino.
+            Não faz commit. Se a mesma chave aparecer mais de uma vez no lote, prevalece a última ocorrência.
+
+        parameters
+            cursor : psycopg2.cursor
+                Cursor da conexão em que as linhas serão gravadas.
+            dados : tuple
+                (buffer, número de linhas), como devolvido por `preparar`.
+
+        return
+            int : Número de linhas inseridas ou alteradas; linhas iguais às existentes não são contadas.
+        """
+        buffer, _ = dados
+        colunas = ', '.join(self.colunas)
+        chave = ', '.join(self.chave)
+        cursor.execute(f"""
+            CREATE TEMP TABLE IF NOT EXISTS {self.preparacao} ON COMMIT DELETE ROWS
+            AS SELECT {colunas} FROM {self.tabela} WITH NO DATA
+        """)
+        # Esvazia a preparação antes de cada envio, e não só no commit: a bissecção de
+        # `library.resiliencia` reenvia partes do lote na mesma transação, e linhas deixadas por um
+        # envio anterior seriam incorporadas de novo
+        cursor.execute(f"TRUNCATE {self.preparacao}")
+        cursor.copy_expert(f"COPY {self.preparacao} ({colunas}) FROM STDIN WITH (FORMAT csv)", buffer)
+        # A tabela de preparação acabou de ser esvaziada, então a ordem física (ctid) é a ordem do COPY
+        cursor.execute(f"""
+            INSERT INTO {self.tabela} AS atual ({colunas})
+            SELECT DISTINCT ON ({chave}) {colunas} FROM {self.preparacao}
+            ORDER BY {chave}, ctid DESC
+            {_clausula_conflito(self.colunas, self.chave)}
+        """)
+        return cursor.rowcount
+
+def _clausula_conflito(colunas, chave):
+    """
+    summary
+        Monta a cláusula `ON CONFLICT` dos sinks de upsert: atualiza as colunas fora da chave apenas
+        quando algum valor mudou. A tabela de destino deve ter o apelido `atual`.
+
+    parameters
+        colunas : tuple
+            Colunas gravadas.
+        chave : tuple
+            Colunas da chave natural.
+
+    return
+        str : Cláusula SQL.
+    """
+    atualizadas = [coluna for coluna in colunas if coluna not in chave]
+    return f"""
+        ON CONFLICT ({', '.join(chave)}) DO UPDATE
+        SET {', '.join(f'{coluna} = EXCLUDED.{coluna}' for coluna in atualizadas)}
+        WHERE ({', '.join(f'atual.{coluna}' for coluna in atualizadas)})
+            IS DISTINCT FROM ({', '.join(f'EXCLUDED.{coluna}' for coluna in atualizadas)})
+    """
+
+class SinkGravar(Sink):
+    """
+    summary
+        Adapta um objeto que só tem `gravar(cursor, linhas)` à interface de `Sink`. A codificação fica
+        toda em `enviar`, de modo que as métricas a contam como escrita no PostgreSQL.
+
+    parameters
+        destino : object
+            Objeto com o método `gravar(cursor, linhas)`.
+    """
+    def __init__(self, destino):
+        self.destino = destino
+
+    def preparar(self, linhas):
+        """
+        summary
+            Não há codificação separada: as linhas são repassadas a `gravar`.
+
+        parameters
+            linhas : list | LoteColunar
+                Linhas do lote.
+
+        return
+            list | LoteColunar : As próprias linhas.
+        """
+        return linhas
+
+    def enviar(self, cursor, linhas):
+        """
+        summary
+            Grava as linhas com `destino.gravar`. Não faz commit.
+
+        parameters
+            cursor : psycopg2.cursor
+                Cursor da conexão em que as linhas serão gravadas.
+            linhas : list | LoteColunar
+                Linhas do lote.
+
+        return
+            int : Número de linhas gravadas.
+        """
+        return self.destino.gravar(cursor, linhas)
+
+# Sinks disponíveis por nome
+SINKS = {
+    'copy': CopySink,
+    'execute_values': ExecuteValuesSink,
+    'insert': InsertSink,
+    'upsert_values': UpsertValuesSink,
+    'upsert_copy': UpsertCopySink,
+}
+
+def criar_sink(sink):
+    """
+    summary
+        Resolve o sink a ser usado por uma transferência.
+
+    parameters
+        sink : str | object
+            Nome de um sink registrado em `SINKS` ou uma instância já configurada. Uma instância sem
+            `preparar` e `enviar`, apenas com `gravar(cursor, linhas)`, é adaptada por `SinkGravar`.
+
+    return
+        Sink : Instância do sink, com os métodos `preparar(linhas)`, `enviar(cursor, dados)` e `gravar(cursor, linhas)`.
+    """
+    if not isinstance(sink, str):
+        if hasattr(sink, 'preparar') and hasattr(sink, 'enviar'):
+            return sink
+        if hasattr(sink, 'gravar'):
+            return SinkGravar(sink)
+        raise TypeError(f"Sink sem os métodos preparar/enviar ou gravar: {sink!r}")
+    try:
+        return SINKS[sink]()
+    except KeyError:
+        raise ValueError(f"Sink desconhecido: {sink}. Opções: {', '.join(SINKS)}")
@@ -1,14 +1,153 @@
 import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from queue import Queue
+from library.resiliencia import PoliticaRetentativa
+
+# Resultado da transferência de um lote, devolvido pelos trabalhadores (threads ou processos).
+# `duracao` é o tempo total do lote e `duracao_commit` o tempo do commit, ambos em segundos.
+ResultadoLote = namedtuple(
+    'ResultadoLote',
+    ['batch_start', 'batch_end', 'linhas', 'ignoradas', 'erro', 'duracao', 'duracao_commit'],
+    defaults=(0.0, 0.0)
+)
+
+# Valor colocado na fila de tarefas para avisar cada trabalhador de que não há mais lotes
+SENTINELA = None
+
+# Objeto de transferência do processo atual, criado pela fábrica no modo 'processos'
+_data_transfer_processo = None
+
+def gerar_lotes(batch_size, start, end):
+    """
+    summary
+        Gera os intervalos (batch_start, batch_end) de cada lote.
+
+    parameters
+        batch_size : int
+            Tamanho de cada lote.
+        start : int
+            Índice inicial dos dados.
+        end : int
+            Índice final dos dados (exclusivo).
+
+    return
+        generator : Tuplas (batch_start, batch_end).
+    """
+    for i in range(start, end, batch_size):
+        yield i, min(i + batch_size, end)  # Fim do lote, respeitando o limite 'end'
+
+def gerar_lotes_adaptativos(controlador, start, end):
+    """
+    summary
+        Gera os intervalos dos lotes consultando o tamanho atual do lote no controlador a cada lote,
+        de modo que os ajustes feitos durante a transferência valem para os lotes seguintes.
+
+    parameters
+        controlador : ControladorAdaptativo
+            Controlador que define `batch_size`.
+        start : int
+            Índice inicial dos dados.
+        end : int
+            Índice final dos dados (exclusivo).
+
+    return
+        generator : Tuplas (batch_start, batch_end).
+    """
+    i = start
+    while i < end:
+        fim = min(i + controlador.batch_size, end)
+        yield i, fim
+        i = fim
+
+def intervalos_pendentes(start, end, concluidos):
+    """
+    summary
+        Calcula os trechos de [start, end) ainda não cobertos pelos intervalos concluídos. Funciona
+        mesmo que os intervalos concluídos tenham sido gerados com outro tamanho de lote.
+
+    parameters
+        start : int
+            Índice inicial dos dados.
+        end : int
+            Índice final dos dados (exclusivo).
+        concluidos : iterable
+            Tuplas (batch_start, batch_end) já concluídas.
+
+    return
+        generator : Tuplas (inicio, fim) dos trechos pendentes.
+    """
+    atual = start
+    for inicio, fim in sorted(concluidos):
+        if fim <= atual:
+            continue
+        if inicio >= end:
+            break
+        if inicio > atual:
+            yield atual, inicio
+        atual = fim
+    if atual < end:
+        yield atual, end
+
+def gerar_lotes_pendentes(batch_size, start, end, concluidos):
+    """
+    summary
+        Gera os lotes de [start, end) que ainda não foram concluídos, para retomar uma transferência.
+
+    parameters
+        batch_size : int
+            Tamanho de cada lote.
+        start : int
+            Índice inicial dos dados.
+        end : int
+            Índice final dos dados (exclusivo).
+        concluidos : iterable
+            Tuplas (batch_start, batch_end) já concluídas.
+
+    return
+        generator : Tuplas (batch_start, batch_end).
+    """
+    for inicio, fim in intervalos_pendentes(start, end, concluidos):
+        yield from gerar_lotes(batch_size, inicio, fim)
+
+def produzir_lotes(data_transfer, lotes):
+    """
+    summary
+        Coloca os lotes na fila de tarefas à medida que são gerados e, ao final, uma sentinela por
+        trabalhador. Com uma fila limitada (`maxsize`), o produtor espera os trabalhadores em vez de
+        enumerar todos os lotes antecipadamente. Com um controlador adaptativo, cada lote também
+        espera uma vaga entre os trabalhadores ativos.
+
+    parameters
+        data_transfer : object
+            Objeto que contém o número de trabalhadores (`num_threads`), a fila de tarefas (`task_queue`)
+            e, opcionalmente, um `controlador` adaptativo.
+        lotes : iterable
+            Lotes a serem processados, consumidos sob demanda.
+
+    return
+        None
+    """
+    controlador = getattr(data_transfer, 'controlador', None)
+    try:
+        for lote in lotes:
+            if controlador is not None:
+                controlador.aguardar_vaga()  # Limita os lotes em andamento aos trabalhadores ativos
+            data_transfer.task_queue.put(lote)  # Espera se a fila estiver cheia
+    finally:
+        for _ in range(data_transfer.num_threads):
+            data_transfer.task_queue.put(SENTINELA)  # Encerra os trabalhadores mesmo se o produtor falhar
 
 def criar_lotes(data_transfer, start, end):
     """
     summary
-        Cria lotes de dados para transferência e os coloca na fila de tarefas.
+        Cria lotes de dados para transferência e os coloca na fila de tarefas, seguidos das sentinelas.
 
     parameters
         data_transfer : object
-            Objeto que contém o tamanho do lote (`batch_size`) e a fila de tarefas (`task_queue`).
+            Objeto que contém o tamanho do lote (`batch_size`), o número de trabalhadores (`num_threads`)
+            e a fila de tarefas (`task_queue`).
         start : int
             Índice inicial para a criação dos lotes.
         end : int
@@ -17,28 +156,31 @@ def criar_lotes(data_transfer, start, end):
     return
         None
     """
-    for i in range(start, end, data_transfer.batch_size):
-        batch_start = i  # Início do lote
-        batch_end = min(i + data_transfer.batch_size, end)  # Fim do lote, respeitando o limite 'end'
-        data_transfer.task_queue.put((batch_start, batch_end))  # Coloca o lote na fila de tarefas.
+    produzir_lotes(data_transfer, gerar_lotes(data_transfer.batch_size, start, end))
 
-def transteferir_infos(data_transfer, start, end):
+def _executar_threads(data_transfer, lotes):
     """
     summary
-        Inicia o processo de transferência de dados com múltiplas threads.
+        Inicia as threads trabalhadoras e, em seguida, produz os lotes na thread atual, de modo que
+        o primeiro lote começa a ser processado assim que é gerado.
 
     parameters
         data_transfer : object
-            Objeto que contém a configuração da transferência, como o número de threads e a fila de tarefas.
-        start : int
-            Índice inicial da transferência de dados.
-        end : int
-            Índice final da transferência de dados.
+            Objeto com `num_threads`, `task_queue`, `resultados` e o método `worker`, que processa lotes
+            até receber a sentinela.
+        lotes : iterable
+            Lotes a serem processados.
 
     return
-        None
+        list : ResultadoLote de cada lote processado.
     """
-    criar_lotes(data_transfer, start, end)  # Cria os lotes e os coloca na fila.
+    metricas = getattr(data_transfer, 'metricas', None)
+    if metricas is not None:
+        metricas.observar_fila(data_transfer.task_queue)
+    controlador = getattr(data_transfer, 'controlador', None)
+    if controlador is not None:
+        controlador.limitar_workers(data_transfer.num_threads)
+
     threads = []  # Lista para armazenar as threads.
 
     # Cria e inicia as threads
@@ -47,6 +189,327 @@ def transteferir_infos(data_transfer, start, end):
         threads.append(thread)  # Adiciona a thread à lista
         thread.start()  # Inicia a execução da thread
 
+    produzir_lotes(data_transfer, lotes)  # Alimenta a fila enquanto as threads trabalham
+
     # Aguarda todas as threads terminarem
     for thread in threads:
-        thread.join()  # Espera a thread terminar sua execução
\ No newline at end of file
+        thread.join()  # Espera a thread terminar sua execução
+
+    return list(data_transfer.resultados)
+
+def _iniciar_processo(fabrica):
+    """
+    summary
+        Inicializa um processo trabalhador, criando o seu próprio objeto de transferência
+        (e, com ele, as suas próprias conexões com Redis e PostgreSQL).
+
+    parameters
+        fabrica : callable
+            Função sem argumentos que devolve um novo objeto de transferência.
+
+    return
+        None
+    """
+    global _data_transfer_processo
+    _data_transfer_processo = fabrica()
+
+def _transferir_lote_processo(batch_start, batch_end):
+    """
+    summary
+        Transfere um lote dentro de um processo trabalhador.
+
+    parameters
+        batch_start : int
+            Índice inicial do lote.
+        batch_end : int
+            Índice final do lote.
+
+    return
+        ResultadoLote : Resultado devolvido por `transferir_lote`.
+    """
+    return _data_transfer_processo.transferir_lote(batch_start, batch_end)
+
+def _transteferir_infos_processos(data_transfer, lotes, fabrica):
+    """
+    summary
+        Distribui os lotes entre `num_threads` processos, cada um com as suas próprias conexões.
+
+    parameters
+        data_transfer : object
+            Objeto com o número de trabalhadores (`num_threads`).
+        lotes : iterable
+            Tuplas (batch_start, batch_end) a serem processadas.
+        fabrica : callable
+            Função serializável (pickle) que cria o objeto de transferência em cada processo.
+
+    return
+        list : ResultadoLote de cada lote, na ordem em que foram concluídos. Um lote cujo processo
+        falhou vem com o erro em `erro`.
+    """
+    resultados = []
+    pendentes = {}  # Futuro -> (batch_start, batch_end)
+    max_pendentes = data_transfer.num_threads * 2  # Limita os lotes submetidos e ainda não concluídos
+    metricas = getattr(data_transfer, 'metricas', None)
+    controlador = getattr(data_transfer, 'controlador', None)
+    if controlador is not None:
+        controlador.limitar_workers(data_transfer.num_threads)
+
+    def informar_controlador(futuro):
+        # Executado pelo executor ao fim de cada lote, liberando a vaga mesmo se o processo falhou
+        controlador.registrar(None if futuro.exception() else futuro.result())
+
+    def coletar(concluidos):
+        for futuro in concluidos:
+            batch_start, batch_end = pendentes.pop(futuro)
+            try:
+                resultado = futuro.result()
+            except Exception as e:
+                # A fábrica falhou no inicializador ou o processo morreu (BrokenProcessPool)
+                print(f"Erro ao transferir lote {batch_start}-{batch_end}: {e}")
+                resultado = ResultadoLote(batch_start, batch_end, 0, 0, str(e))
+            if metricas is not None:
+                # Os estágios são medidos dentro de cada processo; aqui só os totais por lote chegam ao pai
+                metricas.registrar_lote(resultado.linhas, resultado.duracao, resultado.erro, trabalhador='processos')
+            resultados.append(resultado)
+
+    with ProcessPoolExecutor(
+        max_workers=data_transfer.num_threads,
+        initializer=_iniciar_processo,
+        initargs=(fabrica,)
+    ) as executor:
+        for batch_start, batch_end in lotes:
+            if len(pendentes) >= max_pendentes:
+                coletar(wait(pendentes, return_when=FIRST_COMPLETED).done)
+            if controlador is not None:
+                controlador.aguardar_vaga()
+            futuro = executor.submit(_transferir_lote_processo, batch_start, batch_end)
+            if controlador is not None:
+                futuro.add_done_callback(informar_controlador)
+            pendentes[futuro] = (batch_start, batch_end)
+
+        coletar(wait(pendentes).done)
+
+    return resultados
+
+def transteferir_infos(data_transfer, start, end, modo='threads', fabrica=None, resume=False):
+    """
+    summary
+        Inicia o processo de transferência de dados com múltiplas threads ou múltiplos processos.
+
+    parameters
+        data_transfer : object
+            Objeto que contém a configuração da transferência, como o número de threads e a fila de tarefas.
+            O método `worker` deve processar lotes da fila até receber `SENTINELA`.
+        start : int
+            Índice inicial da transferência de dados.
+        end : int
+            Índice final da transferência de dados.
+        modo : str
+            'threads' (padrão) usa as threads de `data_transfer`; 'processos' usa um processo por
+            trabalhador, contornando o GIL nas etapas que consomem CPU.
+        fabrica : callable
+            Obrigatória no modo 'processos'. Função serializável (pickle), sem argumentos, que cria
+            em cada processo um novo objeto de transferência com as suas próprias conexões.
+        resume : bool
+            Se True, pula os intervalos devolvidos por `data_transfer.lotes_concluidos()` e processa
+            apenas os restantes, incluindo os lotes que falharam na execução anterior.
+
+        Se `data_transfer` tiver um `controlador` (ControladorAdaptativo), o tamanho de cada lote e o
+        número de lotes em andamento seguem o controlador; `num_threads` passa a ser o máximo de trabalhadores.
+
+    return
+        list : ResultadoLote de cada lote processado.
+    """
+    if modo not in ('threads', 'processos'):
+        raise ValueError(f"Modo de execução desconhecido: {modo}. Opções: threads, processos")
+    if modo == 'processos' and fabrica is None:
+        raise ValueError("O modo 'processos' exige uma fábrica de objetos de transferência.")
+
+    controlador = getattr(data_transfer, 'controlador', None)
+    if controlador is not None:
+        intervalos = intervalos_pendentes(start, end, data_transfer.lotes_concluidos()) if resume else [(start, end)]
+        lotes = (lote for inicio, fim in intervalos for lote in gerar_lotes_adaptativos(controlador, inicio, fim))
+    elif resume:
+        concluidos = data_transfer.lotes_concluidos()
+        lotes = gerar_lotes_pendentes(data_transfer.batch_size, start, end, concluidos)
+    else:
+        lotes = gerar_lotes(data_transfer.batch_size, start, end)
+
+    if modo == 'processos':
+        return _transteferir_infos_processos(data_transfer, lotes, fabrica)
+    return _executar_threads(data_transfer, lotes)
+
+
+def gerar_lotes_scan(redis_conn, batch_size, match=None, count=1000, tipo='hash'):
+    """
+    summary
+        Percorre o keyspace do Redis com SCAN e agrupa as chaves em lotes de até `batch_size` chaves,
+        sob demanda, sem materializar a lista completa de chaves. O SCAN pode devolver a mesma chave
+        mais de uma vez se o keyspace mudar durante a varredura.
+
+    parameters
+        redis_conn : redis.Redis
+            Conexão com o Redis.
+        batch_size : int
+            Número máximo de chaves por lote.
+        match : str
+            Padrão de chaves (SCAN MATCH). `None` percorre todas as chaves.
+        count : int
+            Sugestão de chaves examinadas por chamada ao SCAN (SCAN COUNT).
+        tipo : str
+            Tipo das chaves retornadas (SCAN TYPE). `None` não filtra por tipo.
+
+    return
+        generator : Listas de chaves.
+    """
+    lote = []
+    for chave in redis_conn.scan_iter(match=match, count=count, _type=tipo):
+        lote.append(chave)
+        if len(lote) >= batch_size:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+def transferir_infos_scan(data_transfer, match=None, count=1000):
+    """
+    summary
+        Transfere as chaves encontradas pelo SCAN em vez de um intervalo de inteiros. Os lotes são
+        produzidos à medida que o cursor avança e entregues às threads pela fila limitada de tarefas,
+        de modo que a memória usada não depende do tamanho do keyspace.
+
+    parameters
+        data_transfer : object
+            Objeto com `redis_conn`, `num_threads`, `batch_size`, `task_queue`, `resultados` e o método
+            `worker`, que aceita listas de chaves como lotes.
+        match : str
+            Padrão de chaves (SCAN MATCH). `None` percorre todas as chaves.
+        count : int
+            Sugestão de chaves examinadas por chamada ao SCAN (SCAN COUNT).
+
+    return
+        list : ResultadoLote de cada lote processado.
+    """
+    lotes = gerar_lotes_scan(data_transfer.redis_conn, data_transfer.batch_size, match, count)
+    return _executar_threads(data_transfer, lotes)
+
+def sincronizar_infos(data_transfer, fonte, janela=1.0, max_chaves=10000, parar=None, espera_maxima=60.0):
+    """
+    summary
+        Sincronização incremental contínua: consome as chaves alteradas informadas por `fonte` e as
+        aplica no PostgreSQL em lotes. Alterações repetidas na mesma chave dentro de uma janela são
+        agrupadas e aplicadas uma só vez, lendo o valor atual no Redis. Um lote é aplicado quando a
+        alteração mais antiga nele completa `janela` segundos ou quando ele atinge `max_chaves` chaves.
+        Se o lote falhar, as chaves são mantidas e a fonte não é confirmada. O mesmo lote é repetido
+        depois de uma espera que cresce a cada falha seguida (de `janela` até `espera_maxima`), sem ler
+        novas alterações enquanto isso, para que um erro persistente não repita o lote sem pausa nem
+        faça o lote crescer além de `max_chaves`.
+
+        O atraso da sincronização (tempo entre a alteração mais antiga do lote e o seu commit) é
+        registrado em `data_transfer.metricas`, se houver.
+
+    parameters
+        data_transfer : object
+            Objeto com o método `sincronizar_chaves(chaves)`, que devolve um ResultadoLote.
+        fonte : object
+            Fonte de alterações de `library.cdc`, com `ler(timeout)`, `confirmar()` e `fechar()`.
+        janela : float
+            Tempo máximo, em segundos, que uma alteração espera para ser aplicada.
+        max_chaves : int
+            Número de chaves distintas que dispara a aplicação antes do fim da janela.
+        parar : threading.Event
+            Evento que encerra a sincronização; sem ele, a sincronização roda até ser interrompida.
+        espera_maxima : float
+            Espera máxima, em segundos, entre as tentativas de um lote que falhou.
+
+    return
+        None
+    """
+    metricas = getattr(data_transfer, 'metricas', None)
+    politica = PoliticaRetentativa(base=janela, maximo=espera_maxima)
+    dormir = time.sleep if parar is None else parar.wait  # Com `parar`, a espera termina junto com a sincronização
+    pendentes = {}  # chave -> instante da alteração mais antiga ainda não aplicada
+    mais_antiga = None
+    falhas = 0  # Falhas seguidas do lote pendente
+
+    try:
+        while parar is None or not parar.is_set():
+            # Enquanto o lote pendente está sendo repetido, nenhuma alteração nova é lida
+            if not falhas:
+                espera = janela if mais_antiga is None else max(mais_antiga + janela - time.time(), 0)
+                for chave, instante in fonte.ler(timeout=espera):
+                    if chave not in pendentes:
+                        pendentes[chave] = instante
+                        mais_antiga = instante if mais_antiga is None else min(mais_antiga, instante)
+
+                if not pendentes or (len(pendentes) < max_chaves and time.time() - mais_antiga < janela):
+                    continue
+
+            resultado = data_transfer.sincronizar_chaves(list(pendentes))
+            if resultado.erro is not None:
+                espera = politica.espera(falhas, minimo=janela)
+                falhas += 1
+                print(f"Falha ao sincronizar {len(pendentes)} chaves ({falhas}ª seguida); "
+                      f"nova tentativa em {espera:.1f}s: {resultado.erro}")
+                dormir(espera)
+                continue
+            falhas = 0
+            fonte.confirmar()
+            if metricas is not None:
+                metricas.registrar_atraso(time.time() - mais_antiga)
+            pendentes = {}
+            mais_antiga = None
+    finally:
+        fonte.fechar()
+
+async def transferir_infos_async(data_transfer, start, end):
+    """
+    summary
+        Alternativa assíncrona a `transteferir_infos`. Lê os lotes do Redis e os grava no PostgreSQL
+        em duas etapas concorrentes ligadas por uma fila limitada: quando os escritores ficam para trás,
+        a fila enche e os leitores esperam (backpressure), limitando os lotes em memória.
+
+    parameters
+        data_transfer : object
+            Objeto com `batch_size`, `leitores` (leituras simultâneas no Redis), `escritores` (gravações
+            simultâneas no PostgreSQL), `max_em_voo` (lotes lidos aguardando gravação) e as corrotinas
+            `ler_lote(batch_start, batch_end)` e `gravar_lote(batch_start, batch_end, pacotes, falhas)`.
+        start : int
+            Índice inicial da transferência de dados.
+        end : int
+            Índice final da transferência de dados.
+
+    return
+        list : ResultadoLote de cada lote processado.
+    """
+    import asyncio  # Só o caminho assíncrono precisa dele; mantém rápida a importação do módulo
+
+    fila = asyncio.Queue(maxsize=data_transfer.max_em_voo)
+    lotes = gerar_lotes(data_transfer.batch_size, start, end)  # Compartilhado pelos leitores
+    resultados = []
+
+    async def leitor():
+        for batch_start, batch_end in lotes:
+            try:
+                pacotes, falhas = await data_transfer.ler_lote(batch_start, batch_end)
+            except Exception as e:
+                print(f"Erro ao ler lote {batch_start}-{batch_end}: {e}")
+                resultados.append(ResultadoLote(batch_start, batch_end, 0, 0, str(e)))
+                continue
+            await fila.put((batch_start, batch_end, pacotes, falhas))  # Espera se a fila estiver cheia
+
+    async def escritor():
+        while True:
+            lote = await fila.get()
+            if lote is None:  # Sentinela: não há mais lotes
+                break
+            resultados.append(await data_transfer.gravar_lote(*lote))
+
+    escritores = [asyncio.create_task(escritor()) for _ in range(data_transfer.escritores)]
+    await asyncio.gather(*(leitor() for _ in range(data_transfer.leitores)))
+
+    for _ in escritores:
+        await fila.put(None)
+    await asyncio.gather(*escritores)
+
+    return resultados
@@ -0,0 +1,522 @@
+from contextlib import contextmanager
+import threading
+from time import perf_counter
+from queue import Queue
+from library.transfer_info import ResultadoLote, SENTINELA
+from library.sinks import criar_sink
+from library.esquema import EsquemaPacotes
+from library.lote import LoteColunar
+from library.config import carregar_configuracao, parametros_postgres
+from library.resiliencia import Disjuntor, PoliticaRetentativa, enviar_com_bisseccao
+
+# Campos de cada pacote nos hashes do Redis, na ordem em que são lidos pelo HMGET
+CAMPOS = ('Destino', 'Origem', 'Peso', 'Tamanho')
+
+@contextmanager
+def conexao_do_pool(pool, conexao):
+    """
+    Empresta uma conexão do pool do PostgreSQL e a devolve ao final do bloco `with`. Sem pool,
+    fornece sempre a mesma conexão. Usada por DataTransfer e DataExport em cada lote.
+
+    Parameters:
+        pool (ThreadedConnectionPool): Pool de onde a conexão é retirada, ou None.
+        conexao (psycopg2.connection): Conexão usada quando não há pool.
+    """
+    if pool is None:
+        yield conexao
+        return
+
+    conn = pool.getconn()
+    try:
+        yield conn
+    finally:
+        pool.putconn(conn)
+
+class Connections:
+    """
+    A classe Connections é responsável por gerenciar as conexões com o Redis e o PostgreSQL.
+    As conexões vêm de pools dimensionados para o número de threads, de modo que cada
+    trabalhador use a sua própria conexão em vez de disputar uma conexão compartilhada.
+    
+    Attributes:
+        redis_pool (redis.BlockingConnectionPool): Pool de conexões com o Redis.
+        db_redis (redis.Redis): Cliente Redis que usa o pool `redis_pool`.
+        postgre_pool (ThreadedConnectionPool): Pool de conexões com o PostgreSQL.
+        db_postgre (psycopg2.connection): Conexão principal com o PostgreSQL, retirada do pool.
+    """
+
+    def __init__(self, num_threads=2, decode_responses=True, config=None):
+        """
+        Inicializa os pools de conexões com Redis e PostgreSQL. Se a conexão com PostgreSQL falhar,
+        o código tenta novamente até conseguir, com esperas crescentes e aleatorizadas entre as tentativas.
+        Os drivers são importados aqui, e não no módulo, para que o `transfer-info` inicie sem carregá-los.
+
+        Parameters:
+            num_threads (int): Número de threads que usarão as conexões (padrão: 2). Cada pool
+                comporta uma conexão por thread, mais a conexão principal.
+            decode_responses (bool): Se as respostas do Redis são decodificadas para str (padrão: True).
+                Use False para ler o formato compacto, que é binário.
+            config (dict): Configuração de `library.config.carregar_configuracao` com os hosts, portas e
+                credenciais (padrão: lida das variáveis de ambiente).
+        """
+        import redis
+        from psycopg2.pool import ThreadedConnectionPool
+
+        config = config or carregar_configuracao()
+
+        # Pool de conexões com Redis; bloqueia em vez de falhar quando todas estão em uso
+        self.redis_pool = redis.BlockingConnectionPool(
+            host=config['redis_host'], port=config['redis_port'], decode_responses=decode_responses,
+            max_connections=num_threads + 1
+        )
+        self.db_redis = redis.Redis(connection_pool=self.redis_pool)
+
+        # Pool de conexões com PostgreSQL
+        self.postgre_pool = PoliticaRetentativa(tentativas=None, base=0.5, maximo=10.0).executar(
+            ThreadedConnectionPool,
+            1,
+            num_threads + 1,
+            **parametros_postgres(config),
+            ao_repetir=lambda tentativa, erro, espera: print(
+                f"Não foi possível conectar ao PostgreSQL, nova tentativa em {espera:.1f}s..."
+            )
+        )
+        print("Conexão estabelecida com PostgreSQL")
+
+        self.db_postgre = self.postgre_pool.getconn()
+
+    def fechar_conexoes(self):
+        """
+        Fecha as conexões com o Redis e PostgreSQL.
+        """
+        self.db_redis.close()
+        self.redis_pool.disconnect()
+        self.postgre_pool.putconn(self.db_postgre)
+        self.postgre_pool.closeall()
+
+class DataTransfer:
+    """
+    A classe DataTransfer é responsável por transferir dados do Redis para o PostgreSQL,
+    utilizando multithreading e processamento em lotes.
+
+    Attributes:
+        redis_conn (redis.Redis): Conexão com o Redis.
+        postgres_conn (psycopg2.connection): Conexão com o PostgreSQL.
+        num_threads (int): Número de threads a serem usadas para a transferência.
+        batch_size (int): Tamanho dos lotes a serem processados em cada thread.
+        task_queue (Queue): Fila limitada de tarefas para os trabalhadores (threads).
+        resultados (list): ResultadoLote de cada lote processado pelas threads.
+        pipeline_depth (int): Número máximo de comandos enviados ao Redis em cada pipeline.
+        sink (object): Estratégia de gravação dos lotes no PostgreSQL (ver `library.sinks`).
+        sink_incremental (object): Sink de upsert usado pela sincronização incremental.
+        upsert (bool): Se o sink grava com upsert pela chave natural, exigindo o índice único desde o início.
+        postgres_pool (ThreadedConnectionPool): Pool de onde cada lote retira a sua conexão, se fornecido.
+        checkpoint (PostgresCheckpoint): Diário de lotes concluídos, se fornecido.
+        metricas (Metricas): Coletor de métricas da transferência, se fornecido.
+        controlador (ControladorAdaptativo): Controlador que ajusta lotes e trabalhadores, se fornecido.
+        codec (CodecCompacto): Formato compacto dos pacotes no Redis, ou None para hashes de quatro campos.
+        rejeitados (FilaRejeitados): Tabela onde as linhas que não puderam ser gravadas são guardadas, se fornecida.
+        politica (PoliticaRetentativa): Repetição dos lotes que falham com erros transitórios.
+        disjuntor_redis (Disjuntor): Disjuntor das leituras no Redis.
+        disjuntor_postgres (Disjuntor): Disjuntor das gravações no PostgreSQL.
+    """
+
+    def __init__(self, redis_conn, postgres_conn, num_threads=2, batch_size=10000, pipeline_depth=1000,
+                 sink='copy', postgres_pool=None, checkpoint=None, metricas=None, controlador=None, codec=None,
+                 rejeitados=None, politica=None):
+        """
+        Inicializa a transferência de dados com as conexões e configurações fornecidas.
+
+        Parameters:
+            redis_conn (redis.Redis): Conexão com o Redis.
+            postgres_conn (psycopg2.connection): Conexão com o PostgreSQL.
+            num_threads (int): Número de threads a serem usadas (padrão: 2).
+            batch_size (int): Tamanho dos lotes a serem processados (padrão: 10000).
+            pipeline_depth (int): Comandos por pipeline na leitura do Redis (padrão: 1000).
+            sink (str | object): Nome do sink ('copy', 'execute_values', 'insert', 'upsert_values' ou
+                'upsert_copy') ou uma instância de `library.sinks.Sink`. Uma instância que só tenha
+                `gravar(cursor, linhas)` é adaptada por `library.sinks.SinkGravar` (padrão: 'copy').
+                Os sinks de upsert tornam a transferência idempotente: reexecutá-la não duplica linhas.
+            postgres_pool (ThreadedConnectionPool): Pool de conexões para os lotes. Se omitido,
+                todos os lotes usam `postgres_conn` (padrão: None).
+            checkpoint (PostgresCheckpoint): Diário onde cada lote de intervalo concluído é registrado
+                na mesma transação dos seus dados, permitindo retomar a transferência (padrão: None).
+            metricas (Metricas): Coletor de `library.metricas`. Quando fornecido, cada estágio do lote é
+                cronometrado e as mensagens de progresso por lote deixam de ser impressas (padrão: None).
+            controlador (ControladorAdaptativo): Controlador de `library.adaptativo`, informado do resultado
+                de cada lote. `num_threads` passa a ser o máximo de trabalhadores ativos (padrão: None).
+            codec (CodecCompacto): Lê os pacotes no formato de `library.compacto`, gravado pelo
+                populador com `write_mode='compacto'`. Requer `redis_conn` com `decode_responses=False`
+                (padrão: None).
+            rejeitados (FilaRejeitados): Tabela de rejeitados de `library.resiliencia`. As linhas isoladas
+                pela divisão dos lotes com erro e as chaves com valores inválidos no Redis são gravadas nela,
+                na transação do lote; sem ela, são apenas impressas (padrão: None).
+            politica (PoliticaRetentativa): Repetição dos lotes após erros transitórios do Redis ou do
+                PostgreSQL (padrão: cinco tentativas com espera exponencial e jitter).
+        """
+        self.redis_conn = redis_conn
+        self.postgres_conn = postgres_conn
+        self.num_threads = num_threads
+        self.batch_size = batch_size
+        self.pipeline_depth = pipeline_depth
+        self.sink = criar_sink(sink)
+        self.sink_incremental = criar_sink('upsert_values')
+        self.upsert = getattr(self.sink, 'chave', None) is not None  # O sink grava com ON CONFLICT na chave
+        self.postgres_pool = postgres_pool
+        self.checkpoint = checkpoint
+        self.metricas = metricas
+        self.controlador = controlador
+        self.codec = codec
+        self.rejeitados = rejeitados
+        self.politica = politica or PoliticaRetentativa()
+        self.disjuntor_redis = Disjuntor('Redis')
+        self.disjuntor_postgres = Disjuntor('PostgreSQL')
+        self._lotes = threading.local()  # LoteColunar reutilizado por cada thread
+        self.esquema = EsquemaPacotes()
+        self.task_queue = Queue(maxsize=num_threads * 2)
+        self.resultados = []
+
+    def conexao_postgre(self):
+        """
+        Fornece a conexão com o PostgreSQL usada durante um lote (ver `conexao_do_pool`).
+        """
+        return conexao_do_pool(self.postgres_pool, self.postgres_conn)
+
+    def criar_tabela(self, recriar=True):
+        """
+        Cria a tabela no PostgreSQL para armazenar os dados transferidos, caso ela ainda não exista.
+        O índice em Destino não é criado aqui: chame `criar_indices` ao final da carga. Com um sink de
+        upsert, a tabela nunca é apagada: ela é apenas migrada, com os índices, pois o `ON CONFLICT`
+        depende do índice único na chave e reexecutar a transferência deve incorporar as linhas às já
+        gravadas, sem duplicá-las.
+
+        Parameters:
+            recriar (bool): Se True (padrão), apaga a tabela (exceto com um sink de upsert) e o diário
+                de lotes antes de criá-la. Use False para retomar uma transferência interrompida,
+                pulando os lotes do diário; uma tabela no esquema antigo é migrada para o atual.
+        """
+        if self.checkpoint is not None:
+            self.checkpoint.criar(self.postgres_conn)
+            if recriar:
+                self.checkpoint.limpar(self.postgres_conn)
+        if self.rejeitados is not None:
+            self.rejeitados.criar(self.postgres_conn)
+
+        if recriar and not self.upsert:
+            self.esquema.criar(self.postgres_conn, recriar=True, indices=False)
+        else:
+            self.esquema.migrar(self.postgres_conn)
+
+    def criar_indices(self):
+        """
+        Cria os índices da tabela que estiverem faltando. Deve ser chamado depois da carga em massa.
+        """
+        self.esquema.criar_indices(self.postgres_conn)
+
+    def lotes_concluidos(self):
+        """
+        Consulta no diário os intervalos de lotes já concluídos.
+
+        Returns:
+            list: Tuplas (batch_start, batch_end); vazia se não houver diário.
+        """
+        if self.checkpoint is None:
+            return []
+        with self.conexao_postgre() as conn:
+            return self.checkpoint.carregar(conn)
+
+    def informar(self, mensagem):
+        """
+        Imprime uma mensagem de progresso, a menos que o progresso esteja sendo reportado pelas métricas.
+
+        Parameters:
+            mensagem (str): Mensagem a ser impressa.
+        """
+        if self.metricas is None:
+            print(mensagem)
+
+    @contextmanager
+    def cronometro(self, estagio):
+        """
+        Cronometra um estágio do lote nas métricas, se houver.
+
+        Parameters:
+            estagio (str): Nome do estágio (ver `library.metricas.ESTAGIOS`).
+        """
+        if self.metricas is None:
+            yield
+        else:
+            with self.metricas.cronometro(estagio):
+                yield
+
+    def lote_da_thread(self):
+        """
+        Retorna o LoteColunar da thread atual, criado na primeira chamada e reutilizado a cada lote.
+
+        Returns:
+            LoteColunar: Lote esvaziado, pronto para uma nova leitura.
+        """
+        lote = getattr(self._lotes, 'lote', None)
+        if lote is None:
+            lote = self._lotes.lote = LoteColunar()
+        lote.limpar()
+        return lote
+
+    def ler_chaves(self, chaves):
+        """
+        Lê os pacotes das chaves informadas usando pipelines, divididos em sub-lotes de `pipeline_depth` comandos.
+        Chaves ausentes, com campos faltando ou com valores inválidos são reportadas individualmente,
+        sem interromper o lote.
+
+        Parameters:
+            chaves (range | list): Chaves a serem lidas.
+
+        Returns:
+            tuple: (pacotes, falhas), onde `pacotes` é o LoteColunar da thread, iterável em tuplas
+            (Destino, Origem, Peso, Tamanho), e `falhas` é a lista de tuplas (chave, motivo) das chaves
+            que não puderam ser lidas. O lote é reutilizado pela próxima leitura da mesma thread.
+        """
+        if self.codec is not None:
+            return self.ler_chaves_compactas(chaves)
+
+        lote = self.lote_da_thread()
+        for inicio in range(0, len(chaves), self.pipeline_depth):
+            parte = chaves[inicio:inicio + self.pipeline_depth]
+            with self.redis_conn.pipeline(transaction=False) as pipe:
+                for chave in parte:
+                    pipe.hmget(chave, CAMPOS)
+                lote.carregar_respostas(parte, pipe.execute(raise_on_error=False))
+
+        lote.validar()
+        return lote, lote.falhas
+
+    def ler_chaves_compactas(self, chaves):
+        """
+        Lê os pacotes no formato compacto com um HMGET por bucket, em pipelines de até
+        `pipeline_depth` pacotes, decodificando os registros diretamente nas colunas do lote.
+
+        Parameters:
+            chaves (range | list): Números dos pacotes a serem lidos.
+
+        Returns:
+            tuple: (pacotes, falhas), como em `ler_chaves`.
+        """
+        lote = self.lote_da_thread()
+        grupos = self.codec.agrupar(chaves)
+        comandos_por_envio = max(1, self.pipeline_depth // self.codec.tamanho_bucket)
+
+        for inicio in range(0, len(grupos), comandos_por_envio):
+            parte = grupos[inicio:inicio + comandos_por_envio]
+            with self.redis_conn.pipeline(transaction=False) as pipe:
+                for bucket, _, campos in parte:
+                    pipe.hmget(bucket, campos)
+                respostas = pipe.execute(raise_on_error=False)
+
+            for (_, chaves_bucket, _), registros in zip(parte, respostas):
+                lote.carregar_registros(chaves_bucket, registros, self.codec)
+
+        lote.validar()
+        return lote, lote.falhas
+
+    def ler_lote(self, batch_start, batch_end):
+        """
+        Lê um lote de pacotes do Redis cujas chaves são os inteiros de `batch_start` a `batch_end`.
+
+        Parameters:
+            batch_start (int): O índice inicial do lote.
+            batch_end (int): O índice final do lote.
+
+        Returns:
+            tuple: (pacotes, falhas), como em `ler_chaves`.
+        """
+        return self.ler_chaves(range(batch_start, batch_end))
+
+    def _transferir(self, chaves, batch_start, batch_end, rotulo, registrar=False, incremental=False):
+        """
+        Lê as chaves do Redis e grava os pacotes no PostgreSQL com o sink configurado,
+        confirmando o lote inteiro com um único commit. Erros transitórios repetem o lote segundo
+        `politica`; linhas que o PostgreSQL recusa são isoladas sem descartar o restante do lote.
+
+        Parameters:
+            chaves (range | list): Chaves do lote.
+            batch_start: Início do lote informado no resultado.
+            batch_end: Fim do lote informado no resultado.
+            rotulo (str): Identificação do lote nas mensagens.
+            registrar (bool): Se True, registra o lote no diário na mesma transação dos dados.
+            incremental (bool): Se True, grava com `sink_incremental` (upsert) e remove do PostgreSQL
+                as chaves que não existem mais no Redis.
+
+        Returns:
+            ResultadoLote: Linhas gravadas, chaves ignoradas e a mensagem de erro, se o lote falhou.
+        """
+        def avisar(tentativa, erro, espera):
+            print(f"Falha transitória no lote {rotulo} (tentativa {tentativa}): {erro}. Nova tentativa em {espera:.1f}s.")
+
+        inicio = perf_counter()
+        try:
+            resultado = self.politica.executar(
+                self._tentar_lote, chaves, batch_start, batch_end, rotulo, registrar, incremental, ao_repetir=avisar
+            )
+            resultado = resultado._replace(duracao=perf_counter() - inicio)
+            self.informar(f"Lote {rotulo} transferido com sucesso.")
+        except Exception as e:
+            print(f"Erro ao transferir lote {rotulo}: {e}")
+            resultado = ResultadoLote(batch_start, batch_end, 0, 0, str(e), perf_counter() - inicio)
+
+        if self.metricas is not None:
+            self.metricas.registrar_lote(resultado.linhas, resultado.duracao, resultado.erro)
+        if self.controlador is not None:
+            self.controlador.registrar(resultado)
+        return resultado
+
+    def _tentar_lote(self, chaves, batch_start, batch_end, rotulo, registrar, incremental):
+        """
+        Uma tentativa de transferir o lote, com os parâmetros de `_transferir`. O envio ao PostgreSQL
+        é feito com `enviar_com_bisseccao`: se uma linha for recusada, o lote é dividido até isolá-la
+        e ela vai para a tabela de rejeitados na mesma transação das linhas boas. Em caso de erro, a
+        transação é desfeita e o erro é propagado para `politica` decidir se repete o lote.
+
+        Returns:
+            ResultadoLote: Resultado do lote, sem a duração total.
+        """
+        with self.conexao_postgre() as conn:
+            cursor = conn.cursor()
+            try:
+                with self.disjuntor_redis.protegido(), self.cronometro('leitura_redis'):
+                    pacotes, falhas = self.ler_chaves(chaves)
+                sink = self.sink_incremental if incremental else self.sink
+                removidas = []
+                rejeitadas = []
+                for chave, motivo in falhas:
+                    if incremental and motivo == "chave ausente":
+                        removidas.append(chave)
+                    elif self.rejeitados is not None and motivo != "chave ausente":
+                        rejeitadas.append((chave, motivo))
+                    else:
+                        print(f"Chave {chave} ignorada no lote {rotulo}: {motivo}")
+
+                with self.disjuntor_postgres.protegido():
+                    with self.cronometro('codificacao'):
+                        dados = sink.preparar(pacotes)
+                    with self.cronometro('escrita_postgres'):
+                        linhas, recusadas = enviar_com_bisseccao(cursor, sink, pacotes, dados)
+                        if recusadas and self.rejeitados is None:
+                            for linha, motivo in recusadas:
+                                print(f"Linha {linha} recusada no lote {rotulo}: {motivo}")
+                        rejeitadas += recusadas
+                        if removidas:
+                            linhas += sink.remover(cursor, removidas)
+                        if rejeitadas and self.rejeitados is not None:
+                            self.rejeitados.registrar(cursor, rejeitadas, rotulo)
+                        if registrar and self.checkpoint is not None:
+                            self.checkpoint.registrar(cursor, batch_start, batch_end)
+                    inicio_commit = perf_counter()
+                    with self.cronometro('commit'):
+                        conn.commit()
+                    duracao_commit = perf_counter() - inicio_commit
+                ignoradas = len(falhas) - len(removidas) + len(recusadas)
+                return ResultadoLote(batch_start, batch_end, linhas, ignoradas, None, 0.0, duracao_commit)
+            except Exception:
+                try:
+                    conn.rollback()
+                except Exception:  # Conexão perdida: o pool descarta a conexão fechada
+                    pass
+                raise
+            finally:
+                cursor.close()
+
+    def transferir_lote(self, batch_start, batch_end):
+        """
+        Transferir um lote de dados do Redis para o PostgreSQL. O lote inteiro é gravado pelo sink
+        configurado e confirmado com um único commit.
+
+        Parameters:
+            batch_start (int): O índice inicial do lote.
+            batch_end (int): O índice final do lote.
+
+        Returns:
+            ResultadoLote: Linhas gravadas, chaves ignoradas e a mensagem de erro, se o lote falhou.
+        """
+        return self._transferir(
+            range(batch_start, batch_end), batch_start, batch_end, f"{batch_start}-{batch_end}", registrar=True
+        )
+
+    def transferir_chaves(self, chaves):
+        """
+        Transfere um lote de chaves arbitrárias, como as produzidas pelo modo SCAN, do Redis para o PostgreSQL.
+
+        Parameters:
+            chaves (list): Chaves do lote, não vazia.
+
+        Returns:
+            ResultadoLote: Resultado do lote, com a primeira e a última chave em `batch_start` e `batch_end`.
+        """
+        return self._transferir(chaves, chaves[0], chaves[-1], f"{chaves[0]}..{chaves[-1]} ({len(chaves)} chaves)")
+
+    def sincronizar_chaves(self, chaves):
+        """
+        Aplica no PostgreSQL o estado atual de chaves alteradas no Redis: as existentes são inseridas
+        ou atualizadas pela coluna Chave e as apagadas são removidas, em uma única transação. Usado
+        pela sincronização incremental (`library.transfer_info.sincronizar_infos`).
+
+        Parameters:
+            chaves (list): Chaves alteradas, sem repetição e não vazia.
+
+        Returns:
+            ResultadoLote: Resultado do lote; `linhas` soma as linhas gravadas e removidas.
+        """
+        return self._transferir(
+            chaves, chaves[0], chaves[-1], f"incremental ({len(chaves)} chaves)", incremental=True
+        )
+
+    def worker(self):
+        """
+        Função de trabalho executada pelas threads para processar os lotes de dados. Cada lote é uma
+        tupla (batch_start, batch_end) ou uma lista de chaves; a thread termina ao receber `SENTINELA`.
+        """
+        while True:
+            lote = self.task_queue.get()
+            if lote is SENTINELA:
+                self.task_queue.task_done()
+                break
+
+            if isinstance(lote, tuple):
+                batch_start, batch_end = lote
+                self.informar(f"Thread {threading.current_thread().name} processando lote {batch_start}-{batch_end}")
+                self.resultados.append(self.transferir_lote(batch_start, batch_end))
+            else:
+                self.resultados.append(self.transferir_chaves(lote))
+            self.task_queue.task_done()
+
+def criar_transferencia(num_threads=1, batch_size=10000, sink='copy', checkpoint=None, metricas=None, codec=None,
+                        rejeitados=None, config=None):
+    """
+    Cria um DataTransfer com as suas próprias conexões. Usada como fábrica no modo 'processos',
+    em que cada processo trabalhador precisa de conexões próprias.
+
+    Parameters:
+        num_threads (int): Número de threads do objeto criado (padrão: 1).
+        batch_size (int): Tamanho dos lotes a serem processados (padrão: 10000).
+        sink (str | object): Sink usado para gravar os lotes (padrão: 'copy').
+        checkpoint (PostgresCheckpoint): Diário de lotes concluídos (padrão: None).
+        metricas (Metricas): Coletor de métricas do processo (padrão: None).
+        codec (CodecCompacto): Formato compacto dos pacotes no Redis (padrão: None).
+        rejeitados (FilaRejeitados): Tabela das linhas rejeitadas (padrão: None).
+        config (dict): Configuração das conexões (padrão: lida das variáveis de ambiente).
+
+    Returns:
+        DataTransfer: Objeto de transferência com pools de conexões próprios.
+    """
+    conexoes = Connections(num_threads=num_threads, decode_responses=codec is None, config=config)
+    return DataTransfer(
+        conexoes.db_redis,
+        conexoes.db_postgre,
+        num_threads=num_threads,
+        batch_size=batch_size,
+        sink=sink,
+        postgres_pool=conexoes.postgre_pool,
+        checkpoint=checkpoint,
+        metricas=metricas,
+        codec=codec,
+        rejeitados=rejeitados
+    )
@@ -0,0 +1,114 @@
+import pytest
+from library import adaptativo
+from library.adaptativo import ControladorAdaptativo
+from library.transfer_info import ResultadoLote
+
+class Relogio:
+    """Substitui `perf_counter` do controlador; avança só quando o teste manda."""
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(adaptativo, 'perf_counter', relogio)
+    return relogio
+
+def lote(linhas=1000, duracao=0.5, commit=0.01, erro=None):
+    return ResultadoLote(0, linhas, linhas, 0, erro, duracao, commit)
+
+def janela(controlador, relogio, segundos=1.0, **kwargs):
+    """Conclui uma janela de lotes iguais em `segundos`."""
+    relogio.agora += segundos
+    for _ in range(controlador.janela):
+        controlador.aguardar_vaga()
+        controlador.registrar(lote(**kwargs))
+
+def test_limites_iniciais_sao_respeitados(relogio):
+    controlador = ControladorAdaptativo(batch_inicial=10, batch_min=100, workers_inicial=20, workers_max=4)
+    assert (controlador.batch_size, controlador.workers) == (100, 4)
+
+    controlador = ControladorAdaptativo(batch_inicial=10 ** 9, batch_max=5000)
+    assert controlador.batch_size == 5000
+
+def test_aumento_aditivo_ate_o_maximo(relogio):
+    controlador = ControladorAdaptativo(
+        batch_inicial=10000, batch_max=15000, passo_batch=2000, workers_inicial=1, workers_max=8, janela=2
+    )
+
+    janela(controlador, relogio)
+    assert (controlador.batch_size, controlador.workers) == (12000, 2)
+
+    # Mesma vazão: o lote continua crescendo, mas não vale mais um trabalhador
+    janela(controlador, relogio)
+    assert (controlador.batch_size, controlador.workers) == (14000, 2)
+
+    # Vazão dobrou: mais um trabalhador; o lote para no máximo
+    janela(controlador, relogio, segundos=0.5)
+    assert (controlador.batch_size, controlador.workers) == (15000, 3)
+    assert [decisao['decisao'] for decisao in controlador.historico] == ['aumentar'] * 3
+
+def test_erro_reduz_multiplicativamente_ate_o_minimo(relogio):
+    controlador = ControladorAdaptativo(
+        batch_inicial=8000, batch_min=1500, workers_inicial=6, workers_min=2, fator_reducao=0.5, janela=2
+    )
+
+    janela(controlador, relogio, erro="deadlock")
+    assert (controlador.batch_size, controlador.workers) == (4000, 3)
+    janela(controlador, relogio, erro="deadlock")
+    assert (controlador.batch_size, controlador.workers) == (2000, 2)
+    janela(controlador, relogio, erro="deadlock")
+    assert (controlador.batch_size, controlador.workers) == (1500, 2)
+    assert controlador.historico[-1]['decisao'] == 'reduzir'
+
+def test_pico_no_commit_reduz(relogio):
+    controlador = ControladorAdaptativo(batch_inicial=10000, workers_inicial=4, fator_pico_commit=3.0, janela=2)
+
+    janela(controlador, relogio, commit=0.1)  # Define a linha de base do commit
+    assert controlador.historico[-1]['decisao'] == 'aumentar'
+    janela(controlador, relogio, commit=0.25)  # Abaixo de 3x a base
+    assert controlador.historico[-1]['decisao'] == 'aumentar'
+    antes = controlador.batch_size
+    janela(controlador, relogio, commit=0.4)
+    assert controlador.historico[-1]['decisao'] == 'reduzir'
+    assert controlador.batch_size == antes // 2
+
+def test_commit_abaixo_do_minimo_nunca_e_pico(relogio):
+    controlador = ControladorAdaptativo(commit_minimo=0.05, janela=1)
+
+    janela(controlador, relogio, commit=0.001)
+    janela(controlador, relogio, commit=0.04)  # 40x a base, mas abaixo de commit_minimo
+    assert [decisao['decisao'] for decisao in controlador.historico] == ['aumentar', 'aumentar']
+
+def test_latencia_alta_reduz(relogio):
+    controlador = ControladorAdaptativo(batch_inicial=10000, latencia_max=2.0, janela=2)
+
+    janela(controlador, relogio, duracao=3.0)
+
+    assert controlador.historico[-1]['decisao'] == 'reduzir'
+    assert controlador.batch_size == 5000
+
+def test_limitar_workers(relogio):
+    controlador = ControladorAdaptativo(workers_inicial=6, workers_max=8, janela=1)
+
+    controlador.limitar_workers(3)
+    assert (controlador.workers, controlador.workers_max) == (3, 3)
+
+    for segundos in (1.0, 0.5, 0.25):  # Vazão sempre crescente
+        janela(controlador, relogio, segundos=segundos)
+    assert controlador.workers == 3
+
+    controlador.limitar_workers(10)  # Não amplia o limite
+    assert controlador.workers_max == 3
+
+def test_resultado_vazio_so_libera_a_vaga(relogio):
+    controlador = ControladorAdaptativo(workers_inicial=1, janela=1)
+
+    controlador.aguardar_vaga()
+    controlador.registrar(None)
+    controlador.aguardar_vaga()  # Bloquearia se a vaga não tivesse sido liberada
+
+    assert not controlador.historico
@@ -0,0 +1,95 @@
+from decimal import Decimal
+from library.cache import CacheLRU, CachePacotes
+
+class Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+class RedisFalso:
+    """Guarda as strings em um dicionário, ignorando a expiração."""
+    def __init__(self):
+        self.dados = {}
+        self.removidas = []
+
+    def get(self, chave):
+        return self.dados.get(chave)
+
+    def set(self, chave, valor, ex=None):
+        self.dados[chave] = valor
+
+    def delete(self, *chaves):
+        self.removidas.extend(chaves)
+        for chave in chaves:
+            self.dados.pop(chave, None)
+
+def test_itens_expiram_apos_o_ttl():
+    relogio = Relogio()
+    cache = CacheLRU(ttl=10.0, relogio=relogio)
+    cache.definir('a', 1)
+
+    relogio.agora = 9.9
+    assert cache.obter('a') == (True, 1)
+    relogio.agora = 10.0
+    assert cache.obter('a') == (False, None)
+    assert len(cache) == 0
+
+def test_redefinir_renova_o_ttl():
+    relogio = Relogio()
+    cache = CacheLRU(ttl=10.0, relogio=relogio)
+    cache.definir('a', 1)
+    relogio.agora = 8.0
+    cache.definir('a', 2)
+
+    relogio.agora = 15.0
+    assert cache.obter('a') == (True, 2)
+
+def test_descarta_o_item_usado_ha_mais_tempo():
+    cache = CacheLRU(tamanho_max=3, relogio=Relogio())
+    for chave in 'abc':
+        cache.definir(chave, chave.upper())
+
+    cache.obter('a')  # 'b' passa a ser o menos recente
+    cache.definir('d', 'D')
+    assert cache.obter('b') == (False, None)
+
+    cache.definir('c', 'C2')  # Redefinir também conta como uso; 'a' é o próximo a sair
+    cache.definir('e', 'E')
+    assert [cache.obter(chave)[0] for chave in 'acde'] == [False, True, True, True]
+    assert len(cache) == 3
+
+def test_remover_chave_ausente_nao_falha():
+    cache = CacheLRU(relogio=Relogio())
+    cache.remover('x')
+    assert len(cache) == 0
+
+def test_invalidar_remove_da_memoria_e_do_redis():
+    redis_conn = RedisFalso()
+    cache = CachePacotes(redis_conn)
+    carregados = []
+
+    def carregar(destino):
+        carregados.append(destino)
+        return [(1, destino, 'Natal', Decimal('1.500'), Decimal('2.000'))]
+
+    assert cache.obter('Recife', carregar) == [(1, 'Recife', 'Natal', Decimal('1.500'), Decimal('2.000'))]
+    assert cache.obter('Recife', carregar) == cache.obter('Recife', carregar)
+    assert carregados == ['Recife']
+
+    cache.invalidar('Recife', 'Olinda')
+    assert redis_conn.removidas == ['cache:pacotes:Recife', 'cache:pacotes:Olinda']
+    cache.obter('Recife', carregar)
+    assert carregados == ['Recife', 'Recife']
+    assert cache.estatisticas()['faltas'] == 2
+
+def test_segundo_nivel_preenche_a_memoria_com_decimais():
+    redis_conn = RedisFalso()
+    CachePacotes(redis_conn).definir('Recife', [(1, 'Recife', 'Natal', Decimal('1.500'), None)])
+
+    outro_processo = CachePacotes(redis_conn)
+    pacotes = outro_processo.obter('Recife', lambda destino: [])
+
+    assert pacotes == [(1, 'Recife', 'Natal', Decimal('1.500'), None)]
+    assert outro_processo.estatisticas()['acertos_redis'] == 1
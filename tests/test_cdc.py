@@ -0,0 +1,47 @@
+from library.cdc import FonteNotificacoes
+
+class PubSubFalso:
+    """Entrega as mensagens de `mensagens`, uma por chamada a `get_message`."""
+    def __init__(self, mensagens):
+        self.mensagens = list(mensagens)
+        self.padroes = []
+
+    def psubscribe(self, padrao):
+        self.padroes.append(padrao)
+
+    def get_message(self, timeout=None):
+        return self.mensagens.pop(0) if self.mensagens else None
+
+class RedisFalso:
+    def __init__(self, mensagens):
+        self.mensagens = mensagens
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return PubSubFalso(self.mensagens)
+
+def notificacao(chave, evento):
+    return {'type': 'pmessage', 'channel': f"__keyspace@0__:{chave}", 'data': evento}
+
+def test_apenas_eventos_de_hash_em_chaves_de_pacotes_viram_alteracoes():
+    fonte = FonteNotificacoes(RedisFalso([
+        notificacao('1', 'hset'),
+        notificacao('2', 'hdel'),
+        notificacao('3', 'del'),
+        notificacao('4', 'expired'),
+        notificacao('5', 'expire'),  # Só muda o TTL
+        notificacao('cache:pacotes:10', 'del'),
+        notificacao('cache:pacotes:11', 'expired'),
+        notificacao('pacotes:alteracoes', 'del'),
+        notificacao('pc:3', 'hset'),
+        {'type': 'psubscribe', 'channel': '__keyspace@0__:*', 'data': 1},
+    ]), configurar=False)
+
+    assert [chave for chave, _ in fonte.ler(timeout=0)] == ['1', '2', '3', '4']
+
+def test_prefixos_ignorados_sao_configuraveis():
+    fonte = FonteNotificacoes(RedisFalso([
+        notificacao('cache:pacotes:10', 'hset'),
+        notificacao('tmp:1', 'hset'),
+    ]), configurar=False, ignorar=('tmp:',))
+
+    assert [chave for chave, _ in fonte.ler(timeout=0)] == ['cache:pacotes:10']
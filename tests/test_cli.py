@@ -0,0 +1,12 @@
+import pytest
+from library.cli import main
+
+@pytest.mark.parametrize('flags', [
+    ['--formato-redis', 'compacto', '--sincronizacao', 'stream'],
+    ['--formato-redis', 'compacto', '--fonte', 'scan'],
+])
+def test_combinacoes_nao_suportadas_sao_configuracao_invalida(flags, monkeypatch, capsys):
+    monkeypatch.delenv('TRANSFER_INFO_CONFIG', raising=False)
+
+    assert main(['transfer', *flags]) == 2
+    assert "configuração inválida" in capsys.readouterr().err
@@ -0,0 +1,75 @@
+from decimal import Decimal
+import pytest
+from library.compacto import CABECALHO, CodecCompacto
+
+@pytest.mark.parametrize('destino, origem, peso, tamanho, esperado', [
+    ('Recife', 'Natal', 1, 2, ('Recife', 'Natal', '1.000', '2.000')),
+    ('São Paulo', 'Goiânia', '12.5', Decimal('0.125'), ('São Paulo', 'Goiânia', '12.500', '0.125')),
+    ('a', 'b', 0.1, '-0.001', ('a', 'b', '0.100', '-0.001')),
+    ('', '', -3, '-7.25', ('', '', '-3.000', '-7.250')),
+    ('x' * 255, 'ü' * 127, '999999999.999', '-999999999.999',
+     ('x' * 255, 'ü' * 127, '999999999.999', '-999999999.999')),
+])
+def test_ida_e_volta(destino, origem, peso, tamanho, esperado):
+    codec = CodecCompacto()
+    registro = codec.codificar(destino, origem, peso, tamanho)
+
+    assert len(registro) == CABECALHO.size + len(destino.encode()) + len(origem.encode())
+    assert codec.decodificar(registro) == esperado
+
+@pytest.mark.parametrize('valor, esperado', [
+    ('1.0004', '1.000'),
+    ('1.0005', '1.001'),  # Metade para longe do zero, como o NUMERIC do PostgreSQL
+    ('2.0005', '2.001'),
+    ('-1.0005', '-1.001'),
+    ('-0.0004', '0.000'),
+    ('0.0005', '0.001'),
+    (2.675, '2.675'),
+    ('999999999.9994', '999999999.999'),
+])
+def test_arredondamento_na_terceira_casa(valor, esperado):
+    codec = CodecCompacto()
+    assert codec.decodificar(codec.codificar('d', 'o', valor, 0))[2] == esperado
+
+@pytest.mark.parametrize('valor', [10 ** 9, -10 ** 9, '1000000000', '999999999.9995', '-999999999.9995', 'NaN',
+                                   'inf', 'abc'])
+def test_valores_fora_de_numeric_12_3_sao_recusados(valor):
+    with pytest.raises(ValueError):
+        CodecCompacto().codificar('d', 'o', valor, 1)
+
+def test_textos_longos_e_registros_truncados_sao_recusados():
+    codec = CodecCompacto()
+    with pytest.raises(ValueError):
+        codec.codificar('x' * 256, 'o', 1, 1)
+
+    registro = codec.codificar('Recife', 'Natal', 1, 1)
+    for invalido in (registro[:-1], registro + b'!'):
+        with pytest.raises(ValueError):
+            codec.decodificar(invalido)
+
+def test_localizar_nas_fronteiras_dos_buckets():
+    codec = CodecCompacto(tamanho_bucket=100, prefixo='pc:')
+
+    assert codec.localizar(0) == ('pc:0', 0)
+    assert codec.localizar(99) == ('pc:0', 99)
+    assert codec.localizar(100) == ('pc:1', 0)
+    assert codec.localizar('199') == ('pc:1', 99)
+    assert codec.localizar(200) == ('pc:2', 0)
+
+def test_agrupar_corta_nos_multiplos_do_tamanho_do_bucket():
+    codec = CodecCompacto(tamanho_bucket=10)
+
+    grupos = codec.agrupar(range(8, 31))
+
+    assert [bucket for bucket, _, _ in grupos] == ['pc:0', 'pc:1', 'pc:2', 'pc:3']
+    assert grupos[0][1:] == ([8, 9], [8, 9])
+    assert grupos[1][1] == list(range(10, 20)) and grupos[1][2] == list(range(10))
+    assert grupos[3][1:] == ([30], [0])
+    assert [chave for _, chaves, _ in grupos for chave in chaves] == list(range(8, 31))
+    assert all(codec.localizar(chave) == (bucket, campo)
+               for bucket, chaves, campos in grupos for chave, campo in zip(chaves, campos))
+
+def test_agrupar_preserva_a_ordem_de_chaves_fora_de_sequencia():
+    codec = CodecCompacto(tamanho_bucket=10)
+
+    assert codec.agrupar([5, 15, 6]) == [('pc:0', [5], [5]), ('pc:1', [15], [5]), ('pc:0', [6], [6])]
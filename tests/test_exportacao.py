@@ -0,0 +1,70 @@
+from library.exportacao import DataExport
+
+class CursorNomeado:
+    """Cursor no servidor que, como no psycopg2, não pode ser fechado depois do rollback."""
+    def __init__(self, conexao):
+        self.conexao = conexao
+        self.fechado = False
+
+    def execute(self, comando, parametros=None):
+        pass
+
+    def fetchmany(self, quantidade):
+        return [('1', 'a', 'b', 1, 1)]
+
+    def close(self):
+        if self.conexao.desfeita and not self.fechado:
+            raise RuntimeError("named cursor isn't valid anymore")
+        self.fechado = True
+
+class ConexaoFalsa:
+    def __init__(self):
+        self.desfeita = False
+        self.cursores = []
+
+    def cursor(self, name=None):
+        self.cursores.append(CursorNomeado(self))
+        return self.cursores[-1]
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        self.desfeita = True
+
+class PoolFalso:
+    def __init__(self, conexao=None, erro=None):
+        self.conexao = conexao
+        self.erro = erro
+        self.devolvidas = 0
+
+    def getconn(self):
+        if self.erro is not None:
+            raise self.erro
+        return self.conexao
+
+    def putconn(self, conexao):
+        self.devolvidas += 1
+
+class RedisForaDoAr:
+    def pipeline(self, transaction=True):
+        raise ConnectionError("Redis fora do ar")
+
+def test_erro_no_redis_vira_resultado_com_o_erro_original():
+    conexao = ConexaoFalsa()
+    pool = PoolFalso(conexao)
+    exportacao = DataExport(RedisForaDoAr(), None, postgres_pool=pool)
+
+    resultado = exportacao.exportar_lote(1, 100)
+
+    assert resultado.erro == "Redis fora do ar"
+    assert resultado.linhas == 0
+    assert conexao.desfeita and conexao.cursores[0].fechado
+    assert pool.devolvidas == 1
+
+def test_erro_ao_retirar_conexao_vira_resultado_com_erro():
+    exportacao = DataExport(RedisForaDoAr(), None, postgres_pool=PoolFalso(erro=RuntimeError("pool esgotado")))
+
+    resultado = exportacao.exportar_lote(1, 100)
+
+    assert resultado.erro == "pool esgotado"
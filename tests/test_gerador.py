@@ -0,0 +1,50 @@
+import pickle
+import random
+from library.gerador import GeradorPacotes
+
+# Esquema sem pools do Faker, para que o teste não dependa dele
+ESQUEMA = {
+    'Destino': {'tipo': 'pesos', 'valores': ['Recife', 'Natal', 'Olinda'], 'pesos': [5, 3, 1]},
+    'Origem': {'tipo': 'uniforme', 'minimo': 1, 'maximo': 500},
+    'Peso': {'tipo': 'lognormal', 'mu': 0.7, 'sigma': 0.9, 'minimo': 0.05, 'maximo': 1000},
+    'Tamanho': {'tipo': 'pesos', 'valores': [1, 2, 3], 'pesos': [3, 2, 1]},
+}
+
+def dividir(inicio, fim, tamanhos):
+    """Divide [inicio, fim) em lotes com os tamanhos dados, repetidos em ciclo."""
+    lotes = []
+    i = 0
+    while inicio < fim:
+        lotes.append((inicio, min(inicio + tamanhos[i % len(tamanhos)], fim)))
+        inicio = lotes[-1][1]
+        i += 1
+    return lotes
+
+def gerar_lotes(gerador, lotes):
+    return {chave: pacote for inicio, fim in lotes for chave, pacote in gerador.gerar(inicio, fim)}
+
+def test_mesmos_pacotes_com_qualquer_divisao_em_lotes():
+    inicio, fim = 37, 5250
+
+    inteiro = list(GeradorPacotes(ESQUEMA, semente=7, tamanho_particao=1000).gerar(inicio, fim))
+    lotes_grandes = gerar_lotes(GeradorPacotes(ESQUEMA, semente=7, tamanho_particao=1000), dividir(inicio, fim, [1000]))
+    lotes_irregulares = dividir(inicio, fim, [1, 333, 999, 1001, 17])
+    random.Random(3).shuffle(lotes_irregulares)  # Ordem de conclusão qualquer, como entre threads
+    lotes_pequenos = gerar_lotes(GeradorPacotes(ESQUEMA, semente=7, tamanho_particao=1000), lotes_irregulares)
+
+    assert [chave for chave, _ in inteiro] == list(range(inicio, fim))
+    assert dict(inteiro) == lotes_grandes == lotes_pequenos
+
+def test_copia_enviada_a_outro_processo_gera_os_mesmos_pacotes():
+    gerador = GeradorPacotes(ESQUEMA, semente=7, tamanho_particao=1000)
+    esperado = list(gerador.gerar(1500, 2600))
+
+    copia = pickle.loads(pickle.dumps(gerador))  # Como no modo 'processos'
+
+    assert copia._ultima_particao is None
+    assert list(copia.gerar(2000, 2600)) == esperado[500:]
+
+def test_sementes_diferentes_geram_pacotes_diferentes():
+    a = list(GeradorPacotes(ESQUEMA, semente=1).gerar(0, 100))
+    b = list(GeradorPacotes(ESQUEMA, semente=2).gerar(0, 100))
+    assert a != b
@@ -0,0 +1,35 @@
+from library.compacto import CodecCompacto
+from library.lote import LoteColunar
+
+def test_carregar_registros_usa_o_codec():
+    codec = CodecCompacto()
+    lote = LoteColunar()
+    registros = [codec.codificar('Recife', 'Natal', '1.5', 2), None, b'curto', codec.codificar('A', 'B', 0, 0)[:-1]]
+
+    lote.carregar_registros([1, 2, 3, 4], registros, codec)
+
+    assert list(lote) == [(1, 'Recife', 'Natal', '1.500', '2.000')]
+    assert [chave for chave, _ in lote.falhas] == [2, 3, 4]
+    assert lote.falhas[0][1] == "chave ausente"
+
+def test_validar_retira_valores_fora_de_numeric_12_3():
+    lote = LoteColunar()
+    valores = ['1', '99999999.5', '999999999.999', '999999999.9995', '12345678901234', '-1000000000', 'abc']
+    lote.carregar_respostas(range(len(valores)), [('d', 'o', valor, '1') for valor in valores])
+
+    assert lote.validar() == 4
+
+    assert lote.pesos == ['1', '99999999.5', '999999999.999']
+    motivos = dict(lote.falhas)
+    assert 'fora do intervalo' in motivos[3]
+    assert 'fora do intervalo' in motivos[4]
+    assert 'fora do intervalo' in motivos[5]
+    assert 'não numérico' in motivos[6]
+
+def test_validar_nao_copia_lote_valido():
+    lote = LoteColunar()
+    lote.carregar_respostas([1, 2], [('d', 'o', '0001.5', '.25'), ('d', 'o', '-3', '4.')])
+    pesos = lote.pesos
+
+    assert lote.validar() == 0
+    assert lote.pesos is pesos
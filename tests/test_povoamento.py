@@ -0,0 +1,53 @@
+import threading
+from library import povoamento
+from library.povoamento import RedisPopulator
+
+class RedisFalso:
+    def register_script(self, script):
+        return None
+
+class PopulatorComFalha(RedisPopulator):
+    """Falha nos lotes que começam em `falhos`."""
+    def __init__(self, falhos, **kwargs):
+        super().__init__(RedisFalso(), **kwargs)
+        self.falhos = set(falhos)
+
+    def populate_batch(self, batch_start, batch_end):
+        if batch_start in self.falhos:
+            raise ConnectionError("Redis fora do ar")
+        return batch_end - batch_start
+
+def executar_com_limite(funcao, segundos=5):
+    resultado = []
+    thread = threading.Thread(target=lambda: resultado.append(funcao()), daemon=True)
+    thread.start()
+    thread.join(segundos)
+    assert not thread.is_alive(), "a execução ficou bloqueada"
+    return resultado[0]
+
+def test_lotes_com_erro_nao_bloqueiam_as_threads():
+    populator = PopulatorComFalha(range(0, 1000, 10), num_threads=2, batch_size=10)
+
+    resultados = executar_com_limite(lambda: populator.run(0, 1000))
+
+    assert len(resultados) == 100
+    assert all(chaves == 0 for _, _, chaves in resultados)
+
+def test_lotes_com_erro_sao_registrados_com_zero_chaves():
+    populator = PopulatorComFalha([20], num_threads=3, batch_size=10)
+
+    resultados = executar_com_limite(lambda: populator.run(0, 50))
+
+    assert sorted(resultados) == [(0, 10, 10), (10, 20, 10), (20, 30, 0), (30, 40, 10), (40, 50, 10)]
+
+def falhar_ao_iniciar(*args):
+    raise ConnectionError("Redis fora do ar")
+
+def test_processos_que_nao_iniciam_viram_lotes_com_erro(monkeypatch):
+    # Um processo cujo inicializador falha deixa o pool quebrado (BrokenProcessPool)
+    monkeypatch.setattr(povoamento, '_iniciar_processo', falhar_ao_iniciar)
+    populator = RedisPopulator(RedisFalso(), num_threads=2, batch_size=10)
+
+    resultados = executar_com_limite(lambda: populator.run(0, 40, mode='processos'), segundos=30)
+
+    assert sorted(resultados) == [(0, 10, 0), (10, 20, 0), (20, 30, 0), (30, 40, 0)]
@@ -0,0 +1,193 @@
+import pytest
+from library.resiliencia import (
+    CircuitoAberto, Disjuntor, PoliticaRetentativa, enviar_com_bisseccao, erro_de_dados, erro_transitorio
+)
+
+class ErroPostgres(Exception):
+    """Erro com SQLSTATE, como os do psycopg2."""
+    def __init__(self, pgcode, mensagem='erro'):
+        super().__init__(mensagem)
+        self.pgcode = pgcode
+
+class Relogio:
+    """Relógio manual para o disjuntor."""
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+class CursorFalso:
+    """Registra os comandos de savepoint executados."""
+    def __init__(self):
+        self.comandos = []
+
+    def execute(self, comando):
+        self.comandos.append(comando)
+
+class SinkFalso:
+    """Recusa com `erro` qualquer envio que contenha uma linha de `ruins`."""
+    def __init__(self, ruins, erro=lambda: ErroPostgres('22P02', 'valor inválido')):
+        self.ruins = set(ruins)
+        self.erro = erro
+        self.envios = 0
+
+    def preparar(self, linhas):
+        return list(linhas)
+
+    def enviar(self, cursor, linhas):
+        self.envios += 1
+        if self.ruins.intersection(linhas):
+            raise self.erro()
+        return len(linhas)
+
+def test_erro_transitorio_e_de_dados():
+    assert erro_transitorio(ErroPostgres('40P01'))
+    assert erro_transitorio(ErroPostgres('08006'))
+    assert erro_transitorio(ConnectionError())
+    assert erro_transitorio(CircuitoAberto('redis', 1.0))
+    assert not erro_transitorio(ErroPostgres('22P02'))
+    assert not erro_transitorio(ValueError())
+
+    assert erro_de_dados(ErroPostgres('22003'))
+    assert erro_de_dados(ErroPostgres('23505'))
+    for pgcode in ('42P01', '42P10', '42501', '42703', '40P01'):
+        assert not erro_de_dados(ErroPostgres(pgcode))
+    assert not erro_de_dados(ValueError())
+
+def test_espera_respeita_os_limites():
+    politica = PoliticaRetentativa(base=0.5, maximo=4.0)
+    for tentativa in range(40):
+        limite = min(4.0, 0.5 * 2 ** tentativa)
+        for _ in range(50):
+            assert 0.0 <= politica.espera(tentativa) <= limite
+    assert politica.espera(0, minimo=7.0) == 7.0
+
+def test_executar_para_no_limite_de_tentativas():
+    esperas = []
+    chamadas = []
+
+    def falhar():
+        chamadas.append(1)
+        raise ConnectionError("caiu")
+
+    politica = PoliticaRetentativa(tentativas=3, base=0.1, dormir=esperas.append)
+    with pytest.raises(ConnectionError):
+        politica.executar(falhar)
+    assert len(chamadas) == 3
+    assert len(esperas) == 2
+
+def test_executar_repete_ate_funcionar_e_nao_repete_erros_de_dados():
+    resultados = iter([ConnectionError(), TimeoutError(), 'ok'])
+    repeticoes = []
+
+    def operacao():
+        resultado = next(resultados)
+        if isinstance(resultado, Exception):
+            raise resultado
+        return resultado
+
+    politica = PoliticaRetentativa(tentativas=None, dormir=lambda espera: None)
+    assert politica.executar(operacao, ao_repetir=lambda *args: repeticoes.append(args)) == 'ok'
+    assert [tentativa for tentativa, _, _ in repeticoes] == [1, 2]
+
+    chamadas = []
+
+    def dados_invalidos():
+        chamadas.append(1)
+        raise ErroPostgres('22P02')
+
+    with pytest.raises(ErroPostgres):
+        politica.executar(dados_invalidos)
+    assert len(chamadas) == 1
+
+def test_circuito_aberto_aumenta_a_espera():
+    esperas = []
+    erros = iter([CircuitoAberto('postgres', 8.0)])
+
+    def operacao():
+        for erro in erros:
+            raise erro
+        return 'ok'
+
+    politica = PoliticaRetentativa(base=0.1, maximo=1.0, dormir=esperas.append)
+    assert politica.executar(operacao) == 'ok'
+    assert esperas == [8.0]
+
+def test_disjuntor_abre_testa_uma_vez_e_fecha():
+    relogio = Relogio()
+    disjuntor = Disjuntor('redis', limite_falhas=2, tempo_aberto=10.0, relogio=relogio)
+
+    disjuntor.registrar_falha()
+    assert disjuntor.estado == 'fechado'
+    disjuntor.registrar_falha()
+    assert disjuntor.estado == 'aberto'
+    with pytest.raises(CircuitoAberto) as excecao:
+        disjuntor.permitir()
+    assert excecao.value.restante == pytest.approx(10.0)
+
+    relogio.agora = 10.0
+    assert disjuntor.estado == 'meio_aberto'
+    disjuntor.permitir()  # Chamada de teste
+    with pytest.raises(CircuitoAberto):
+        disjuntor.permitir()  # Só uma chamada de teste por vez
+
+    disjuntor.registrar_sucesso()
+    assert disjuntor.estado == 'fechado'
+    disjuntor.permitir()
+    assert disjuntor.falhas == 0
+
+def test_disjuntor_reabre_se_o_teste_falhar():
+    relogio = Relogio()
+    disjuntor = Disjuntor('postgres', limite_falhas=1, tempo_aberto=5.0, relogio=relogio)
+
+    with pytest.raises(ConnectionError):
+        with disjuntor.protegido():
+            raise ConnectionError()
+    assert disjuntor.estado == 'aberto'
+
+    relogio.agora = 5.0
+    with pytest.raises(ConnectionError):
+        with disjuntor.protegido():
+            raise ConnectionError()
+    assert disjuntor.estado == 'aberto'
+    assert disjuntor.aberto_ate == pytest.approx(10.0)
+
+    relogio.agora = 10.0
+    with disjuntor.protegido():
+        pass
+    assert disjuntor.estado == 'fechado'
+
+def test_erro_de_dados_nao_abre_o_disjuntor():
+    disjuntor = Disjuntor('postgres', limite_falhas=1, relogio=Relogio())
+    with pytest.raises(ErroPostgres):
+        with disjuntor.protegido():
+            raise ErroPostgres('23505')
+    assert disjuntor.estado == 'fechado'
+
+@pytest.mark.parametrize('ruins', [[], [7], [0, 63], [3, 4, 5, 40]])
+def test_bisseccao_isola_as_linhas_ruins(ruins):
+    linhas = list(range(64))
+    sink = SinkFalso(ruins)
+    cursor = CursorFalso()
+
+    gravadas, rejeitadas = enviar_com_bisseccao(cursor, sink, linhas)
+
+    assert gravadas == len(linhas) - len(ruins)
+    assert [linha for linha, _ in rejeitadas] == ruins
+    assert all(motivo == 'valor inválido' for _, motivo in rejeitadas)
+    # Cada savepoint aberto é liberado, com ou sem ROLLBACK TO
+    assert cursor.comandos.count("SAVEPOINT bisseccao") == cursor.comandos.count("RELEASE SAVEPOINT bisseccao")
+    if not ruins:
+        assert sink.envios == 1
+
+@pytest.mark.parametrize('erro', [
+    lambda: ErroPostgres('42P01', 'tabela ausente'),
+    lambda: ErroPostgres('42P10', 'sem índice único'),
+    lambda: ErroPostgres('40P01', 'deadlock'),
+])
+def test_bisseccao_propaga_erros_que_nao_sao_de_dados(erro):
+    sink = SinkFalso([5], erro=erro)
+    with pytest.raises(ErroPostgres):
+        enviar_com_bisseccao(CursorFalso(), sink, list(range(16)))
+    assert sink.envios == 1
@@ -0,0 +1,28 @@
+from library.resiliencia import enviar_com_bisseccao
+from library.sinks import CopySink, SinkGravar, criar_sink
+
+class CursorFalso:
+    def execute(self, comando):
+        pass
+
+class SoGravar:
+    """Sink antigo, apenas com `gravar`."""
+    def __init__(self):
+        self.gravadas = []
+
+    def gravar(self, cursor, linhas):
+        self.gravadas.extend(linhas)
+        return len(linhas)
+
+def test_criar_sink_adapta_objetos_que_so_tem_gravar():
+    antigo = SoGravar()
+    sink = criar_sink(antigo)
+
+    assert isinstance(sink, SinkGravar)
+    assert enviar_com_bisseccao(CursorFalso(), sink, [(1,), (2,)]) == (2, [])
+    assert antigo.gravadas == [(1,), (2,)]
+
+def test_criar_sink_mantem_instancias_de_sink():
+    sink = CopySink()
+    assert criar_sink(sink) is sink
+    assert isinstance(criar_sink('copy'), CopySink)
@@ -0,0 +1,93 @@
+from library.transfer_info import (
+    ResultadoLote, gerar_lotes_pendentes, intervalos_pendentes, sincronizar_infos, transteferir_infos
+)
+
+class FonteFalsa:
+    """Entrega as alterações de `leituras`, uma lista por chamada a `ler`, e depois nenhuma."""
+    def __init__(self, leituras):
+        self.leituras = list(leituras)
+        self.lidas = 0
+        self.confirmacoes = 0
+        self.fechada = False
+
+    def ler(self, timeout):
+        self.lidas += 1
+        return self.leituras.pop(0) if self.leituras else []
+
+    def confirmar(self):
+        self.confirmacoes += 1
+
+    def fechar(self):
+        self.fechada = True
+
+class Parada:
+    """Evento de parada que registra as esperas em vez de dormir e para depois de `limite` esperas."""
+    def __init__(self, limite):
+        self.limite = limite
+        self.esperas = []
+
+    def is_set(self):
+        return len(self.esperas) >= self.limite
+
+    def wait(self, segundos):
+        self.esperas.append(segundos)
+
+class TransferenciaFalha:
+    """Falha as primeiras `falhas` aplicações de lote."""
+    def __init__(self, falhas):
+        self.falhas = falhas
+        self.lotes = []
+
+    def sincronizar_chaves(self, chaves):
+        self.lotes.append(sorted(chaves))
+        erro = "sem índice único" if len(self.lotes) <= self.falhas else None
+        return ResultadoLote(None, None, 0 if erro else len(chaves), 0, erro, 0.0)
+
+def test_lote_que_falha_espera_e_e_repetido_sem_ler_novas_alteracoes():
+    fonte = FonteFalsa([[('a', 0.0), ('b', 0.0)], [('c', 0.0)]])
+    transferencia = TransferenciaFalha(falhas=3)
+    parada = Parada(limite=3)
+
+    sincronizar_infos(transferencia, fonte, janela=1.0, parar=parada, espera_maxima=60.0)
+
+    # As três tentativas repetem o mesmo lote, e a fonte não é lida nem confirmada entre elas
+    assert transferencia.lotes == [['a', 'b']] * 3
+    assert fonte.lidas == 1
+    assert fonte.confirmacoes == 0
+    assert all(espera >= 1.0 for espera in parada.esperas)
+    assert fonte.fechada
+
+def fabrica_sem_conexao():
+    raise ConnectionError("PostgreSQL fora do ar")
+
+class TransferenciaProcessos:
+    num_threads = 2
+    batch_size = 10
+
+def test_processos_que_falham_viram_resultados_com_erro():
+    resultados = transteferir_infos(TransferenciaProcessos(), 0, 35, modo='processos', fabrica=fabrica_sem_conexao)
+
+    assert sorted((r.batch_start, r.batch_end, r.linhas) for r in resultados) == [
+        (0, 10, 0), (10, 20, 0), (20, 30, 0), (30, 35, 0)
+    ]
+    assert all(resultado.erro for resultado in resultados)
+
+def test_intervalos_pendentes_com_concluidos_sobrepostos_e_fora_de_ordem():
+    concluidos = [(40, 60), (0, 10), (5, 20), (55, 70), (90, 120)]
+
+    assert list(intervalos_pendentes(0, 100, concluidos)) == [(20, 40), (70, 90)]
+    assert list(intervalos_pendentes(0, 100, [])) == [(0, 100)]
+    assert list(intervalos_pendentes(0, 100, [(0, 100)])) == []
+    assert list(intervalos_pendentes(50, 80, [(0, 55), (75, 200)])) == [(55, 75)]
+
+def test_lotes_pendentes_com_outro_tamanho_de_lote():
+    # Diário gravado com lotes de 10; a retomada usa lotes de 25
+    concluidos = [(0, 10), (10, 20), (30, 40), (60, 70)]
+
+    lotes = list(gerar_lotes_pendentes(25, 0, 100, concluidos))
+
+    assert lotes == [(20, 30), (40, 60), (70, 95), (95, 100)]
+    pendentes = {chave for inicio, fim in lotes for chave in range(inicio, fim)}
+    feitas = {chave for inicio, fim in concluidos for chave in range(inicio, fim)}
+    assert pendentes == set(range(100)) - feitas
+    assert all(fim - inicio <= 25 for inicio, fim in lotes)
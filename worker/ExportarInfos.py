@@ -0,0 +1,8 @@
+"""
+Mantido por compatibilidade: equivale a `transfer-info export`, com as mesmas variáveis de ambiente e flags.
+"""
+import sys
+from library.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main(['export'] + sys.argv[1:]))
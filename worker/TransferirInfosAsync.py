@@ -0,0 +1,179 @@
+import asyncio
+import os
+import asyncpg
+from decimal import Decimal
+import redis.asyncio as aioredis
+from library.transfer_info import transferir_infos_async, ResultadoLote
+from library.esquema import EsquemaPacotes
+from library.lote import LoteColunar
+from library.sinks import COLUNAS
+from library.transferencia import CAMPOS
+
+def numero(valor):
+    """
+    Converte um valor lido do Redis para Decimal.
+
+    Parameters:
+        valor (str): Valor numérico em texto, ou None.
+
+    Returns:
+        Decimal: O valor convertido, ou None se `valor` for None.
+    """
+    return None if valor is None else Decimal(valor)
+
+class AsyncDataTransfer:
+    """
+    A classe AsyncDataTransfer é a versão assíncrona de DataTransfer. Em vez de bloquear uma thread
+    a cada ida e volta na rede, mantém vários lotes em andamento em um único processo, usando
+    `redis.asyncio` e `asyncpg`.
+
+    Attributes:
+        redis_conn (redis.asyncio.Redis): Conexão assíncrona com o Redis.
+        postgres_pool (asyncpg.Pool): Pool de conexões assíncronas com o PostgreSQL.
+        batch_size (int): Tamanho dos lotes a serem processados.
+        pipeline_depth (int): Número máximo de comandos enviados ao Redis em cada pipeline.
+        leitores (int): Número de lotes lidos do Redis simultaneamente.
+        escritores (int): Número de lotes gravados no PostgreSQL simultaneamente.
+        max_em_voo (int): Número máximo de lotes já lidos aguardando gravação.
+    """
+
+    def __init__(self, redis_conn, postgres_pool, batch_size=10000, pipeline_depth=1000,
+                 leitores=4, escritores=2, max_em_voo=8):
+        """
+        Inicializa a transferência assíncrona com as conexões e configurações fornecidas.
+
+        Parameters:
+            redis_conn (redis.asyncio.Redis): Conexão assíncrona com o Redis.
+            postgres_pool (asyncpg.Pool): Pool de conexões com o PostgreSQL, com ao menos `escritores` conexões.
+            batch_size (int): Tamanho dos lotes a serem processados (padrão: 10000).
+            pipeline_depth (int): Comandos por pipeline na leitura do Redis (padrão: 1000).
+            leitores (int): Leituras simultâneas no Redis (padrão: 4).
+            escritores (int): Gravações simultâneas no PostgreSQL (padrão: 2).
+            max_em_voo (int): Lotes lidos aguardando gravação antes de os leitores esperarem (padrão: 8).
+        """
+        self.redis_conn = redis_conn
+        self.postgres_pool = postgres_pool
+        self.batch_size = batch_size
+        self.pipeline_depth = pipeline_depth
+        self.leitores = leitores
+        self.escritores = escritores
+        self.max_em_voo = max_em_voo
+        self.esquema = EsquemaPacotes()
+
+    async def criar_tabela(self):
+        """
+        Recria a tabela no PostgreSQL para armazenar os dados transferidos, sem o índice em Destino.
+        """
+        async with self.postgres_pool.acquire() as conn:
+            await conn.execute(f"DROP TABLE IF EXISTS {self.esquema.tabela}")
+            for comando in self.esquema.sql_criar_tabela():
+                await conn.execute(comando)
+
+    async def criar_indices(self):
+        """
+        Cria os índices da tabela. Deve ser chamado depois da carga em massa.
+        """
+        async with self.postgres_pool.acquire() as conn:
+            for comando in self.esquema.sql_criar_indices():
+                await conn.execute(comando)
+
+    async def ler_lote(self, batch_start, batch_end):
+        """
+        Lê um lote de pacotes do Redis usando pipelines de até `pipeline_depth` comandos.
+
+        Parameters:
+            batch_start (int): O índice inicial do lote.
+            batch_end (int): O índice final do lote.
+
+        Returns:
+            tuple: (pacotes, falhas), como em `DataTransfer.ler_lote`. Cada lote tem o seu próprio
+            LoteColunar, pois vários lotes ficam em andamento ao mesmo tempo.
+        """
+        lote = LoteColunar()
+
+        for inicio in range(batch_start, batch_end, self.pipeline_depth):
+            fim = min(inicio + self.pipeline_depth, batch_end)
+            async with self.redis_conn.pipeline(transaction=False) as pipe:
+                for i in range(inicio, fim):
+                    pipe.hmget(i, CAMPOS)
+                respostas = await pipe.execute(raise_on_error=False)
+
+            lote.carregar_respostas(range(inicio, fim), respostas)
+
+        lote.validar()
+        return lote, lote.falhas
+
+    async def gravar_lote(self, batch_start, batch_end, pacotes, falhas):
+        """
+        Grava um lote já lido no PostgreSQL com `COPY`, em uma única transação.
+
+        Parameters:
+            batch_start (int): O índice inicial do lote.
+            batch_end (int): O índice final do lote.
+            pacotes (LoteColunar): Pacotes (Chave, Destino, Origem, Peso, Tamanho) a serem gravados.
+            falhas (list): Tuplas (chave, motivo) das chaves ignoradas na leitura.
+
+        Returns:
+            ResultadoLote: Linhas gravadas, chaves ignoradas e a mensagem de erro, se o lote falhou.
+        """
+        for chave, motivo in falhas:
+            print(f"Chave {chave} ignorada no lote {batch_start}-{batch_end}: {motivo}")
+
+        async with self.postgres_pool.acquire() as conn:
+            try:
+                # O COPY binário do asyncpg exige Decimal nas colunas NUMERIC
+                registros = [
+                    (str(chave), destino, origem, numero(peso), numero(tamanho))
+                    for chave, destino, origem, peso, tamanho in pacotes
+                ]
+                async with conn.transaction():
+                    # Identificadores sem aspas são guardados em minúsculas pelo PostgreSQL
+                    await conn.copy_records_to_table(
+                        self.esquema.tabela, records=registros, columns=[coluna.lower() for coluna in COLUNAS]
+                    )
+                print(f"Lote {batch_start}-{batch_end} transferido com sucesso.")
+                return ResultadoLote(batch_start, batch_end, len(pacotes), len(falhas), None)
+            except Exception as e:
+                print(f"Erro ao transferir lote {batch_start}-{batch_end}: {e}")
+                return ResultadoLote(batch_start, batch_end, 0, 0, str(e))
+
+async def main():
+    """
+    Executa a transferência assíncrona de dados do Redis para o PostgreSQL.
+    """
+    leitores = 4
+    escritores = 2
+
+    redis_host = os.getenv('HOST_TO_REDIS', 'localhost')
+    redis_pool = aioredis.BlockingConnectionPool(
+        host=redis_host, port=6379, decode_responses=True, max_connections=leitores
+    )
+    redis_conn = aioredis.Redis(connection_pool=redis_pool)
+
+    post_host = os.getenv('HOST_TO_POSTGRES', 'localhost')
+    postgres_pool = await asyncpg.create_pool(
+        database="mydatabase",
+        user="root",
+        password="root",
+        host=post_host,
+        port=5432,
+        min_size=escritores,
+        max_size=escritores
+    )
+
+    transferencia = AsyncDataTransfer(
+        redis_conn, postgres_pool, batch_size=10000, leitores=leitores, escritores=escritores
+    )
+    await transferencia.criar_tabela()
+
+    resultados = await transferir_infos_async(transferencia, start=1, end=1000001)
+    await transferencia.criar_indices()
+    linhas = sum(resultado.linhas for resultado in resultados)
+    falhos = [resultado for resultado in resultados if resultado.erro]
+    print(f"Transferência concluída: {linhas} linhas em {len(resultados)} lotes, {len(falhos)} lotes com erro.")
+
+    await redis_conn.aclose()
+    await postgres_pool.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())